@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+API load and soak test.
+
+Starts the real FastAPI app under uvicorn in a child process, backed by the
+same stand-ins as bench_pipeline.py (fakeredis, in-memory Qdrant, SQLite, a
+fake embedding model, a fake Ollama and a local corpus server). Ingestion
+tasks run on an in-process worker pool instead of a broker. The parent sends
+a synthetic or replayed mix of /api/query, /api/ingest-url and /api/status
+requests at a fixed arrival rate, samples the server's RSS, and checks the
+results against latency, error-rate and memory SLOs.
+
+    python benchmarks/bench_load.py --rate 20 --duration 600 --slo p99_ms=800
+
+Arrivals are open-loop: each request has a scheduled send time, and its
+latency is measured from that time. A server that falls behind shows up as
+growing latency, not as a lower request rate. The exit status is 1 if any SLO
+is violated.
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy as np
+
+ENDPOINTS = {"/api/query": "query", "/api/ingest-url": "ingest", "/api/status": "status"}
+
+# Checked unless overridden with --slo; "<endpoint>.<metric>=<value>" scopes one to an endpoint
+DEFAULT_SLOS = ["p95_ms=500", "p99_ms=1000", "error_rate=0.01", "rss_growth_mb=64"]
+
+# Metrics an SLO may name; min_rps is a floor, the rest are ceilings
+SLO_METRICS = {
+    "p50_ms": "p50_ms", "p95_ms": "p95_ms", "p99_ms": "p99_ms",
+    "error_rate": "error_rate", "rss_growth_mb": "rss_growth_mb", "min_rps": "throughput_rps",
+}
+
+
+def child(args):
+    """Serve the app on args.port; prints the corpus URLs as one JSON line once the preload is done"""
+    from benchmarks.standins import (CorpusServer, FakeEmbeddingModel, FakeOllamaServer,
+                                     LocalCeleryWorker, install_fake_redis)
+    install_fake_redis()
+
+    import uvicorn
+    from src.config.settings import settings
+    from src.services import embeddings
+
+    # Every corpus page lives on 127.0.0.1; per-domain throttling would only measure the limiter
+    settings.domain_politeness_enabled = False
+    # Chords need a real broker, and corpus pages are far below the fan-out size anyway
+    settings.fanout_min_chunks = 0
+    if not args.real_model:
+        fake_model = FakeEmbeddingModel(per_text_ms=args.embed_latency_ms)
+        embeddings._create_model = lambda model_name: fake_model
+
+    from src.api.dependencies import get_vector_store
+    from src.api.main import app
+    from src.database.connection import SessionLocal, create_tables
+    from src.models.ingestion import URLIngestion
+    from src.services.vector_store import VectorStore
+    from src.workers import tasks
+    from src.workers.celery_app import celery_app
+
+    # One in-memory Qdrant shared by the worker pool and the API
+    vector_store = VectorStore()
+    tasks.VectorStore = lambda: vector_store
+    app.dependency_overrides[get_vector_store] = lambda: vector_store
+
+    worker = LocalCeleryWorker(celery_app, threads=args.worker_threads).install()
+    with CorpusServer(paragraphs_per_page=args.paragraphs) as corpus, \
+            FakeOllamaServer(settings.llm_model, latency_ms=args.llm_latency_ms) as ollama:
+        settings.ollama_base_url = ollama.base_url
+        urls = corpus.urls(args.pages, 0)
+
+        # Ingest the first half up front so queries have something to retrieve;
+        # the rest is first submitted by the ingest traffic
+        create_tables()
+        preload = urls[:len(urls) // 2]
+        db = SessionLocal()
+        try:
+            for url in preload:
+                db.add(URLIngestion(url=url, status="pending"))
+            db.commit()
+        finally:
+            db.close()
+        for url in preload:
+            tasks.process_url_task.apply(args=[url, False])
+
+        print(json.dumps({"urls": urls}), flush=True)
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+        try:
+            server.run()
+        finally:
+            worker.close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args):
+    env = dict(os.environ)
+    db_dir = tempfile.mkdtemp(prefix="rag-load-")
+    # Worker threads and the API share the SQLite file
+    env.setdefault("POSTGRES_URL", f"sqlite:///{os.path.join(db_dir, 'load.db')}?check_same_thread=false&timeout=30")
+    env.setdefault("QDRANT_URL", ":memory:")
+    env.setdefault("HF_HUB_OFFLINE", "1")
+    env["PYTHONPATH"] = project_root
+    port = free_port()
+    command = [sys.executable, os.path.abspath(__file__), "--child", "--port", str(port),
+               "--pages", str(args.pages), "--paragraphs", str(args.paragraphs),
+               "--worker-threads", str(args.worker_threads),
+               "--llm-latency-ms", str(args.llm_latency_ms), "--embed-latency-ms", str(args.embed_latency_ms)]
+    command += ["--real-model"] if args.real_model else []
+    process = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line:
+        raise RuntimeError(f"server exited during setup (status {process.wait()})")
+    urls = json.loads(line)["urls"]
+    return process, f"http://127.0.0.1:{port}", urls
+
+
+def wait_until_ready(client, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if client.get("/ready").status_code == 200:
+                return
+        except Exception:
+            pass  # not listening yet
+        time.sleep(0.1)
+    raise RuntimeError(f"/ready did not pass within {timeout}s")
+
+
+def read_rss_mb(pid):
+    """Resident set size of a process from /proc (None where that isn't available)"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class RSSSampler(threading.Thread):
+    """Samples a process's RSS every `interval` seconds as (elapsed seconds, MB)"""
+
+    def __init__(self, pid, interval, start_time):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.start_time = start_time
+        self.samples = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            rss = read_rss_mb(self.pid)
+            if rss is not None:
+                self.samples.append((time.perf_counter() - self.start_time, rss))
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def synthetic_requests(urls, mix, seed):
+    """Endless weighted mix of the three endpoints"""
+    from benchmarks.bench_pipeline import build_queries
+
+    rng = random.Random(seed)
+    queries = build_queries(200, seed)
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    while True:
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "query":
+            yield {"method": "POST", "path": "/api/query", "json": {"query": rng.choice(queries), "limit": 5}}
+        elif kind == "ingest":
+            # Mostly URLs that are already ingested or in flight, like resubmissions in production
+            yield {"method": "POST", "path": "/api/ingest-url", "json": {"url": rng.choice(urls)}}
+        else:
+            yield {"method": "GET", "path": "/api/status"}
+
+
+def replayed_requests(path, urls):
+    """Loop over a JSONL recording of {"method", "path", "json"?, "params"?} lines.
+
+    "{corpus}" in a JSON string value is replaced with a corpus page URL, so
+    recorded ingest calls point at the local corpus server.
+    """
+    with open(path) as f:
+        recorded = [json.loads(line) for line in f if line.strip()]
+    if not recorded:
+        raise ValueError(f"{path} has no requests")
+    rng = random.Random(0)
+    while True:
+        for request in recorded:
+            body = request.get("json")
+            if isinstance(body, dict):
+                body = {k: v.replace("{corpus}", rng.choice(urls)) if isinstance(v, str) else v
+                        for k, v in body.items()}
+            yield {**request, "json": body}
+
+
+def run_load(client, requests, rate, duration, concurrency):
+    """Send requests at `rate` per second for `duration` seconds.
+
+    Returns (start time, samples). Each sample is (scheduled offset, endpoint,
+    latency ms, status code or None, error).
+    """
+    samples = []
+    lock = threading.Lock()
+
+    def send(request, scheduled):
+        status, error = None, None
+        try:
+            response = client.request(request["method"], request["path"],
+                                      json=request.get("json"), params=request.get("params"))
+            status = response.status_code
+            if status >= 400:
+                error = f"HTTP {status}"
+        except Exception as e:
+            error = type(e).__name__
+        latency_ms = (time.perf_counter() - scheduled) * 1000.0
+        endpoint = ENDPOINTS.get(request["path"], request["path"])
+        with lock:
+            samples.append((scheduled - start, endpoint, latency_ms, status, error))
+
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i, request in enumerate(requests):
+            scheduled = start + i * interval
+            if scheduled - start >= duration:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, request, scheduled)
+    return start, samples
+
+
+def summarize(samples, seconds):
+    latencies = np.asarray([s[2] for s in samples]) if samples else None
+    errors = [s[4] for s in samples if s[4]]
+    by_error = {}
+    for error in errors:
+        by_error[error] = by_error.get(error, 0) + 1
+    return {
+        "requests": len(samples),
+        "throughput_rps": len(samples) / seconds if seconds else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50)) if samples else None,
+        "p95_ms": float(np.percentile(latencies, 95)) if samples else None,
+        "p99_ms": float(np.percentile(latencies, 99)) if samples else None,
+        "max_ms": float(latencies.max()) if samples else None,
+        "error_rate": len(errors) / len(samples) if samples else 0.0,
+        "errors": by_error,
+    }
+
+
+def rss_growth(samples, warmup):
+    """RSS at the start and end of the measured period, each averaged over a tenth of the samples"""
+    measured = [rss for elapsed, rss in samples if elapsed >= warmup]
+    if len(measured) < 2:
+        return {"rss_start_mb": None, "rss_end_mb": None, "rss_peak_mb": None,
+                "rss_growth_mb": None, "rss_slope_mb_per_min": None}
+    window = max(1, len(measured) // 10)
+    times = np.asarray([elapsed for elapsed, rss in samples if elapsed >= warmup])
+    start_mb = float(np.mean(measured[:window]))
+    end_mb = float(np.mean(measured[-window:]))
+    return {
+        "rss_start_mb": start_mb,
+        "rss_end_mb": end_mb,
+        "rss_peak_mb": float(max(measured)),
+        "rss_growth_mb": end_mb - start_mb,
+        "rss_slope_mb_per_min": float(np.polyfit(times / 60.0, measured, 1)[0]),
+    }
+
+
+def windows(samples, rss_samples, warmup, duration, size):
+    """Per-window throughput, p95 and error rate, to see degradation over a soak run"""
+    rows = []
+    t = warmup
+    while t < duration:
+        end = min(t + size, duration)
+        in_window = [s for s in samples if t <= s[0] < end]
+        rss = [mb for elapsed, mb in rss_samples if t <= elapsed < end]
+        stats = summarize(in_window, end - t)
+        rows.append({
+            "start_s": round(t, 3),
+            "requests": stats["requests"],
+            "throughput_rps": stats["throughput_rps"],
+            "p95_ms": stats["p95_ms"],
+            "error_rate": stats["error_rate"],
+            "rss_mb": float(np.mean(rss)) if rss else None,
+        })
+        t = end
+    return rows
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in ("query", "ingest", "status"):
+            raise argparse.ArgumentTypeError(f"unknown endpoint {kind!r} in --mix")
+        mix[kind.strip()] = float(weight)
+    return mix
+
+
+def parse_slos(values):
+    slos = []
+    for value in values:
+        name, _, threshold = value.partition("=")
+        endpoint, _, metric = name.strip().rpartition(".")
+        if metric not in SLO_METRICS or endpoint not in ("", "query", "ingest", "status"):
+            raise argparse.ArgumentTypeError(f"unknown SLO {name!r}")
+        if metric == "rss_growth_mb" and endpoint:
+            raise argparse.ArgumentTypeError("rss_growth_mb is per process, not per endpoint")
+        slos.append((endpoint or None, metric, float(threshold)))
+    return slos
+
+
+def check_slos(slos, load, endpoints):
+    checks = []
+    for endpoint, metric, threshold in slos:
+        section = endpoints.get(endpoint, {}) if endpoint else load
+        value = section.get(SLO_METRICS[metric])
+        if value is None:
+            passed = None  # e.g. RSS can't be read on this platform, or no traffic for the endpoint
+        elif metric == "min_rps":
+            passed = value >= threshold
+        else:
+            passed = value <= threshold
+        checks.append({"slo": f"{endpoint + '.' if endpoint else ''}{metric}", "threshold": threshold,
+                       "value": value, "passed": passed})
+    return checks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sustained mixed-traffic load test with SLO checks")
+    parser.add_argument("--rate", type=float, default=20.0, help="Requests per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of traffic, warm-up included")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds left out of the statistics")
+    parser.add_argument("--concurrency", type=int, default=32, help="Most requests in flight at once")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("query=0.7,ingest=0.1,status=0.2"),
+                        help="Relative weights of query, ingest and status requests")
+    parser.add_argument("--replay", default=None, help="JSONL recording to replay instead of the synthetic mix")
+    parser.add_argument("--slo", action="append", default=None,
+                        help=f"[endpoint.]metric=threshold, repeatable (default: {' '.join(DEFAULT_SLOS)})")
+    parser.add_argument("--window", type=float, default=60.0, help="Seconds per row of the time series")
+    parser.add_argument("--rss-interval", type=float, default=1.0, help="Seconds between RSS samples")
+    parser.add_argument("--pages", type=int, default=40, help="Corpus pages (half are ingested before the run)")
+    parser.add_argument("--paragraphs", type=int, default=12, help="Paragraphs per page")
+    parser.add_argument("--worker-threads", type=int, default=2, help="Threads running ingestion tasks")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0,
+                        help="Simulated model cost per encoded text")
+    parser.add_argument("--real-model", action="store_true",
+                        help="Use the configured sentence-transformers model instead of the fake one")
+    parser.add_argument("--ready-timeout", type=float, default=120.0, help="Seconds to wait for /ready")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--output", default=None,
+                        help="Result file (default: benchmarks/results/load-<git-rev>.json)")
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    try:
+        slos = parse_slos(args.slo or DEFAULT_SLOS)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    if args.warmup >= args.duration:
+        parser.error("--warmup must be shorter than --duration")
+
+    import httpx
+
+    print(f"Starting API with {args.pages} corpus pages...")
+    process, base_url, urls = start_server(args)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        with httpx.Client(base_url=base_url, timeout=30.0, limits=limits) as client:
+            wait_until_ready(client, args.ready_timeout)
+            requests = replayed_requests(args.replay, urls) if args.replay else synthetic_requests(urls, args.mix, args.seed)
+            print(f"Sending {args.rate:g} req/s for {args.duration:g}s...")
+            sampler = RSSSampler(process.pid, args.rss_interval, time.perf_counter())
+            sampler.start()
+            start, samples = run_load(client, requests, args.rate, args.duration, args.concurrency)
+            elapsed = time.perf_counter() - start
+            sampler.stop()
+    finally:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    # Imported late: bench_pipeline sets its own POSTGRES_URL default on import
+    from benchmarks.bench_pipeline import git_revision
+
+    # RSS sample times count from just before the first request, close enough to share the warm-up cut
+    measured = [s for s in samples if s[0] >= args.warmup]
+    seconds = elapsed - args.warmup
+    load = summarize(measured, seconds)
+    load["target_rps"] = args.rate
+    load.update(rss_growth(sampler.samples, args.warmup))
+    endpoints = {
+        endpoint: summarize([s for s in measured if s[1] == endpoint], seconds)
+        for endpoint in sorted({s[1] for s in measured})
+    }
+    checks = check_slos(slos, load, endpoints)
+
+    results = {
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("child", "port")},
+        "load": load,
+        "endpoints": endpoints,
+        "windows": windows(samples, sampler.samples, args.warmup, args.duration, args.window),
+        "rss_samples": [[round(t, 3), round(mb, 2)] for t, mb in sampler.samples],
+        "slo": checks,
+    }
+
+    output = args.output or os.path.join(project_root, "benchmarks", "results", f"load-{results['revision']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(json.dumps({k: results[k] for k in ("load", "endpoints")}, indent=2))
+    violations = 0
+    for check in checks:
+        if check["passed"] is None:
+            verdict = "SKIPPED (no value)"
+        else:
+            verdict = "ok" if check["passed"] else "VIOLATED"
+            violations += not check["passed"]
+        value = "n/a" if check["value"] is None else f"{check['value']:.4g}"
+        print(f"SLO {check['slo']:24} {value:>10} (limit {check['threshold']:g})  {verdict}")
+    print(f"Results written to {output}")
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Offline ingestion and retrieval benchmark.
+
+Runs the real ingestion task and /api/query route against local stand-ins:
+a generated HTML corpus server, fakeredis, Qdrant in-memory mode, SQLite for
+the metadata store, a hashed fake embedding model and a fake Ollama endpoint.
+Results are written as JSON so runs can be compared between commits with
+benchmarks/compare.py.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+# Settings are read at import time, so configure them before importing src
+_db_dir = tempfile.mkdtemp(prefix="rag-bench-")
+os.environ.setdefault("POSTGRES_URL", f"sqlite:///{os.path.join(_db_dir, 'bench.db')}")
+os.environ.setdefault("QDRANT_URL", ":memory:")
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+import numpy as np
+
+from benchmarks.standins import CorpusServer, FakeEmbeddingModel, FakeOllamaServer, install_fake_redis
+
+
+class CacheCounter:
+    """Counts embedding cache hits/misses by wrapping CacheService lookups"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def install(self):
+        from src.services.cache import CacheService
+        original_get = CacheService.get_embedding
+        original_batch = CacheService.get_embeddings_batch
+        counter = self
+
+        def get_embedding(cache, text):
+            result = original_get(cache, text)
+            counter._record([result])
+            return result
+
+        def get_embeddings_batch(cache, texts):
+            results = original_batch(cache, texts)
+            counter._record(results)
+            return results
+
+        CacheService.get_embedding = get_embedding
+        CacheService.get_embeddings_batch = get_embeddings_batch
+
+    def _record(self, results):
+        for result in results:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+    def snapshot(self):
+        return self.hits, self.misses
+
+    @staticmethod
+    def rate(before, after):
+        hits = after[0] - before[0]
+        misses = after[1] - before[1]
+        total = hits + misses
+        return {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+
+
+def percentiles(samples_ms):
+    if not samples_ms:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None}
+    arr = np.asarray(samples_ms)
+    return {
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "mean_ms": float(arr.mean()),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def run_ingestion(urls, force_refresh, counter):
+    """Run process_url_task eagerly for every URL and time the whole pass"""
+    from src.workers.tasks import process_url_task
+
+    before = counter.snapshot()
+    pages_ok = 0
+    pages_failed = 0
+    chunks = 0
+    errors = {}
+    start = time.perf_counter()
+    for url in urls:
+        result = process_url_task.apply(args=[url, force_refresh])
+        if result.successful():
+            pages_ok += 1
+            chunks += result.result.get("chunks_created", 0)
+        else:
+            pages_failed += 1
+            message = str(result.result).replace(url, "<url>")[:200]
+            errors[message] = errors.get(message, 0) + 1
+    elapsed = time.perf_counter() - start
+    return {
+        "pages": len(urls),
+        "pages_ok": pages_ok,
+        "pages_failed": pages_failed,
+        "chunks": chunks,
+        "seconds": elapsed,
+        "pages_per_sec": pages_ok / elapsed if elapsed else 0.0,
+        "chunks_per_sec": chunks / elapsed if elapsed else 0.0,
+        "embedding_cache": CacheCounter.rate(before, counter.snapshot()),
+        "errors": errors,
+    }
+
+
+def run_queries(client, queries, limit, counter):
+    """Issue /api/query requests through the FastAPI app and collect latencies"""
+    before = counter.snapshot()
+    latencies = []
+    failures = 0
+    for query in queries:
+        start = time.perf_counter()
+        response = client.post("/api/query", json={"query": query, "limit": limit})
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        if response.status_code != 200:
+            failures += 1
+    stats = percentiles(latencies)
+    stats.update({
+        "queries": len(queries),
+        "failures": failures,
+        "embedding_cache": CacheCounter.rate(before, counter.snapshot()),
+    })
+    return stats
+
+
+def build_queries(count, seed=7):
+    from benchmarks.standins import WORDS
+    import random
+    rng = random.Random(seed)
+    # Half repeated questions (cache-friendly), half unique
+    distinct = [" ".join(rng.choice(WORDS) for _ in range(6)) + "?" for _ in range(max(1, count // 2))]
+    return [distinct[i % len(distinct)] if i % 2 else " ".join(rng.choice(WORDS) for _ in range(6)) + "?"
+            for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ingestion/retrieval benchmark")
+    parser.add_argument("--static-pages", type=int, default=50)
+    parser.add_argument("--js-pages", type=int, default=5,
+                        help="Client-rendered pages (need Playwright's chromium installed)")
+    parser.add_argument("--paragraphs", type=int, default=12, help="Paragraphs per page")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0,
+                        help="Simulated model cost per encoded text")
+    parser.add_argument("--real-model", action="store_true",
+                        help="Use the configured sentence-transformers model instead of the fake one")
+    parser.add_argument("--output", default=None,
+                        help="Result file (default: benchmarks/results/<git-rev>.json)")
+    args = parser.parse_args()
+
+    install_fake_redis()
+
+    from src.config.settings import settings
+    from src.services import embeddings
+
+    # Every corpus page lives on 127.0.0.1; per-domain throttling would only measure the limiter
+    settings.domain_politeness_enabled = False
+
+    fake_model = None
+    if not args.real_model:
+        fake_model = FakeEmbeddingModel(per_text_ms=args.embed_latency_ms)
+        embeddings._create_model = lambda model_name: fake_model
+
+    counter = CacheCounter()
+    counter.install()
+
+    from fastapi.testclient import TestClient
+    from src.api.dependencies import get_vector_store
+    from src.api.main import app
+    from src.database.connection import SessionLocal, create_tables
+    from src.models.ingestion import URLIngestion
+    from src.services.vector_store import VectorStore
+    from src.workers import tasks
+
+    # One in-memory Qdrant shared by the worker task and the API
+    vector_store = VectorStore()
+    tasks.VectorStore = lambda: vector_store
+    app.dependency_overrides[get_vector_store] = lambda: vector_store
+
+    with CorpusServer(paragraphs_per_page=args.paragraphs) as corpus, \
+            FakeOllamaServer(settings.llm_model, latency_ms=args.llm_latency_ms) as ollama:
+        settings.ollama_base_url = ollama.base_url
+        urls = corpus.urls(args.static_pages, args.js_pages)
+
+        create_tables()
+        db = SessionLocal()
+        try:
+            for url in urls:
+                db.add(URLIngestion(url=url, status="pending"))
+            db.commit()
+        finally:
+            db.close()
+
+        print(f"Ingesting {len(urls)} pages (cold)...")
+        cold = run_ingestion(urls, force_refresh=False, counter=counter)
+        print(f"Re-ingesting {len(urls)} pages (force refresh, warm embedding cache)...")
+        warm = run_ingestion(urls, force_refresh=True, counter=counter)
+
+        print(f"Running {args.queries} queries...")
+        with TestClient(app) as client:
+            queries = run_queries(client, build_queries(args.queries), args.limit, counter)
+
+    results = {
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": vars(args),
+        "ingestion_cold": cold,
+        "ingestion_warm": warm,
+        "query": queries,
+        "model_texts_encoded": fake_model.texts_encoded if fake_model else None,
+    }
+
+    output = args.output or os.path.join(project_root, "benchmarks", "results", f"{results['revision']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(json.dumps({k: results[k] for k in ("ingestion_cold", "ingestion_warm", "query")}, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+API cold-start benchmark.
+
+Each run starts a fresh interpreter and measures how long `import src.api.main`
+takes, which heavy modules that import dragged in, the time until /ready
+passes (embedding model loaded and warmed, dependencies probed, LLM preloaded
+in a fake Ollama) and the time until the first /api/query succeeds. Same stand-ins as bench_pipeline.py, so no
+services are needed.
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+# Imports the API process should not need before serving its first request
+HEAVY_MODULES = ["torch", "sentence_transformers", "transformers", "playwright", "trafilatura", "bs4",
+                 "src.workers.tasks", "src.services.scraper"]
+
+
+def loaded_heavy_modules():
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def child(args):
+    """One cold start, reported as a JSON line on stdout"""
+    start = time.perf_counter()
+    import src.api.main  # noqa: F401
+    import_seconds = time.perf_counter() - start
+    after_import = loaded_heavy_modules()
+
+    from benchmarks.standins import FakeEmbeddingModel, FakeOllamaServer, install_fake_redis
+    install_fake_redis()
+    from src.config.settings import settings
+    from src.services import embeddings
+    if not args.real_model:
+        embeddings._create_model = lambda model_name: FakeEmbeddingModel()
+
+    from fastapi.testclient import TestClient
+    with FakeOllamaServer(settings.llm_model, latency_ms=0) as ollama:
+        settings.ollama_base_url = ollama.base_url
+        with TestClient(src.api.main.app) as client:
+            deadline = time.monotonic() + args.ready_timeout
+            while client.get("/ready").status_code != 200 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            ready_seconds = time.perf_counter() - start
+            response = client.post("/api/query", json={"query": "What is in the corpus?"})
+            first_query_seconds = time.perf_counter() - start
+    print(json.dumps({
+        "ok": response.status_code == 200,
+        "import_seconds": import_seconds,
+        "ready_seconds": ready_seconds,
+        "first_query_seconds": first_query_seconds,
+        "heavy_modules_after_import": after_import,
+        "heavy_modules_after_query": loaded_heavy_modules(),
+    }))
+
+
+def run_once(args):
+    env = dict(os.environ)
+    db_dir = tempfile.mkdtemp(prefix="rag-startup-")
+    env.setdefault("POSTGRES_URL", f"sqlite:///{os.path.join(db_dir, 'startup.db')}")
+    env.setdefault("QDRANT_URL", ":memory:")
+    env.setdefault("HF_HUB_OFFLINE", "1")
+    env["PYTHONPATH"] = project_root
+    command = [sys.executable, os.path.abspath(__file__), "--child", "--ready-timeout", str(args.ready_timeout)]
+    command += ["--real-model"] if args.real_model else []
+    start = time.perf_counter()
+    output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+    process_seconds = time.perf_counter() - start
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_seconds"] = process_seconds  # includes interpreter start and shutdown
+    return result
+
+
+def summarize(runs, key):
+    values = [run[key] for run in runs]
+    return {"median": statistics.median(values), "min": min(values), "max": max(values)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API import time and time-to-first-query")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--real-model", action="store_true",
+                        help="Load the configured sentence-transformers model instead of the fake one")
+    parser.add_argument("--ready-timeout", type=float, default=120.0, help="Seconds to wait for /ready")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output", default=None,
+                        help="Result file (default: benchmarks/results/startup-<git-rev>.json)")
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    from benchmarks.bench_pipeline import git_revision
+
+    runs = []
+    for i in range(args.runs):
+        runs.append(run_once(args))
+        print(f"run {i + 1}: import {runs[-1]['import_seconds']:.2f}s, ready {runs[-1]['ready_seconds']:.2f}s, "
+              f"first query {runs[-1]['first_query_seconds']:.2f}s")
+
+    import_time = summarize(runs, "import_seconds")
+    first_query = summarize(runs, "first_query_seconds")
+    results = {
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k != "child"},
+        # Medians under the keys benchmarks/compare.py tracks
+        "startup": {
+            "import_seconds": import_time["median"],
+            "ready_seconds": summarize(runs, "ready_seconds")["median"],
+            "first_query_seconds": first_query["median"],
+            "process_seconds": summarize(runs, "process_seconds")["median"],
+            "failures": sum(not run["ok"] for run in runs),
+        },
+        "import_seconds": import_time,
+        "first_query_seconds": first_query,
+        "heavy_modules_after_import": runs[-1]["heavy_modules_after_import"],
+        "heavy_modules_after_query": runs[-1]["heavy_modules_after_query"],
+    }
+
+    output = args.output or os.path.join(project_root, "benchmarks", "results", f"startup-{results['revision']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(json.dumps({k: results[k] for k in ("startup", "heavy_modules_after_import")}, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
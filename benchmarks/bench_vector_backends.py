@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Vector backend benchmark: embedded memmap index vs Qdrant.
+
+Loads the same synthetic clustered vectors (a stand-in for sentence
+embeddings) into each backend at several corpus sizes and reports load
+throughput, on-disk size, search latency percentiles and recall@k against
+exact search. Qdrant runs against --qdrant-url; without one, its in-memory
+local mode is used, which is brute force in Python and skipped above
+--qdrant-local-max vectors.
+
+    python benchmarks/bench_vector_backends.py --sizes 10000,100000,1000000
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy as np
+
+from benchmarks.bench_pipeline import git_revision, percentiles
+
+LOAD_BATCH = 10_000
+
+
+def make_corpus(size, dim, clusters, seed):
+    """Unit vectors drawn around random topic centres, generated in batches"""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    for start in range(0, size, LOAD_BATCH):
+        count = min(LOAD_BATCH, size - start)
+        batch = centres[rng.integers(0, clusters, count)] + 0.6 * rng.normal(size=(count, dim)).astype(np.float32)
+        yield start, batch / np.linalg.norm(batch, axis=1, keepdims=True)
+
+
+def make_queries(count, dim, clusters, seed):
+    return next(make_corpus(count, dim, clusters, seed))[1]
+
+
+def payload(i):
+    return {"url": f"https://site{i % 100}.example/page{i}", "domain": f"site{i % 100}.example",
+            "ingested_at": 1_700_000_000 + i, "chunk_index": 0}
+
+
+def timed_searches(search, queries):
+    samples, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples), results
+
+
+def recall(found, truth):
+    return float(np.mean([len(set(f) & set(t)) / max(1, len(t)) for f, t in zip(found, truth)]))
+
+
+def directory_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def bench_local(args, size, queries):
+    from src.services.local_index import MemmapVectorIndex
+    from src.config.settings import settings
+
+    path = tempfile.mkdtemp(prefix="rag-local-index-")
+    try:
+        index = MemmapVectorIndex(path, args.dim)
+        start = time.perf_counter()
+        for offset, batch in make_corpus(size, args.dim, args.clusters, args.seed):
+            index.add_vectors([f"p{offset + i}" for i in range(len(batch))], batch,
+                              [payload(offset + i) for i in range(len(batch))])
+        load_seconds = time.perf_counter() - start
+
+        settings.local_index_ann = False
+        exact_latency, exact = timed_searches(
+            lambda q: [p.id for p in index.search([q], args.limit)[0]], queries)
+
+        start = time.perf_counter()
+        nlist = index.build_ann_index(nlist=args.nlist)
+        build_seconds = time.perf_counter() - start
+        settings.local_index_ann = True
+        settings.local_index_nprobe = args.nprobe
+        ann_latency, ann = timed_searches(
+            lambda q: [p.id for p in index.search([q], args.limit)[0]], queries)
+
+        result = {
+            "load_vectors_per_sec": size / load_seconds,
+            "disk_bytes": directory_bytes(path),
+            "exact": exact_latency,
+            "ivf": {**ann_latency, "nlist": nlist, "nprobe": args.nprobe,
+                    "build_seconds": build_seconds, f"recall_at_{args.limit}": recall(ann, exact)},
+        }
+        return result, exact
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def bench_qdrant(args, size, queries, truth):
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Distance, PointStruct, VectorParams
+
+    if not args.qdrant_url and size > args.qdrant_local_max:
+        return {"skipped": f"local mode above {args.qdrant_local_max} vectors; pass --qdrant-url"}
+    client = QdrantClient(location=args.qdrant_url or ":memory:")
+    collection = f"bench_{size}"
+    client.recreate_collection(collection, vectors_config=VectorParams(size=args.dim, distance=Distance.COSINE))
+    try:
+        start = time.perf_counter()
+        for offset, batch in make_corpus(size, args.dim, args.clusters, args.seed):
+            client.upsert(collection, points=[
+                PointStruct(id=offset + i, vector=vector.tolist(), payload=payload(offset + i))
+                for i, vector in enumerate(batch)
+            ], wait=True)
+        load_seconds = time.perf_counter() - start
+        latency, found = timed_searches(
+            lambda q: [f"p{p.id}" for p in client.search(collection, query_vector=q.tolist(), limit=args.limit)],
+            queries)
+        return {"load_vectors_per_sec": size / load_seconds, "search": latency,
+                f"recall_at_{args.limit}": recall(found, truth)}
+    finally:
+        client.delete_collection(collection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedded memmap index vs Qdrant")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=256, help="Topic centres in the synthetic corpus")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None, help="IVF clusters (default 4*sqrt(n))")
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--qdrant-url", default=None, help="Qdrant server; default is the in-memory local mode")
+    parser.add_argument("--qdrant-local-max", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None,
+                        help="Result file (default: benchmarks/results/vector-<git-rev>.json)")
+    args = parser.parse_args()
+
+    queries = make_queries(args.queries, args.dim, args.clusters, args.seed + 1)
+    results = {
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": vars(args),
+        "sizes": {},
+    }
+    for size in [int(s) for s in args.sizes.split(",")]:
+        print(f"{size} vectors: local index...")
+        local, truth = bench_local(args, size, queries)
+        print(f"{size} vectors: qdrant...")
+        results["sizes"][str(size)] = {"local": local, "qdrant": bench_qdrant(args, size, queries, truth)}
+
+    output = args.output or os.path.join(project_root, "benchmarks", "results", f"vector-{results['revision']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(json.dumps(results["sizes"], indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
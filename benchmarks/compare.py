@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark result files, e.g. from two commits:
+
+    python benchmarks/compare.py benchmarks/results/abc123.json benchmarks/results/def456.json
+"""
+import argparse
+import json
+import sys
+
+# (section, metric, higher_is_better)
+METRICS = [
+    ("ingestion_cold", "pages_per_sec", True),
+    ("ingestion_cold", "chunks_per_sec", True),
+    ("ingestion_warm", "pages_per_sec", True),
+    ("ingestion_warm", "chunks_per_sec", True),
+    ("query", "p50_ms", False),
+    ("query", "p95_ms", False),
+    ("query", "p99_ms", False),
+    ("startup", "import_seconds", False),
+    ("startup", "ready_seconds", False),
+    ("startup", "first_query_seconds", False),
+    ("load", "throughput_rps", True),
+    ("load", "p95_ms", False),
+    ("load", "p99_ms", False),
+    ("load", "rss_growth_mb", False),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative change counted as a regression (default 10%%)")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"{'metric':40} {baseline['revision']:>12} {candidate['revision']:>12} {'change':>9}")
+    regressions = 0
+    for section, metric, higher_is_better in METRICS:
+        old = baseline.get(section, {}).get(metric)
+        new = candidate.get(section, {}).get(metric)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        regressed = change < -args.threshold if higher_is_better else change > args.threshold
+        regressions += regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{section + '.' + metric:40} {old:12.2f} {new:12.2f} {change:+8.1%}{flag}")
+
+    for section in ("ingestion_cold", "ingestion_warm", "query"):
+        old = baseline.get(section, {}).get("embedding_cache", {}).get("hit_rate")
+        new = candidate.get(section, {}).get("embedding_cache", {}).get("hit_rate")
+        if old is not None and new is not None:
+            print(f"{section + '.embedding_hit_rate':40} {old:12.2%} {new:12.2%}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Local stand-ins for the external services used by the pipeline, so
+benchmarks run without network access or running infrastructure.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Union
+
+import numpy as np
+
+WORDS = (
+    "energy solar wind grid battery storage carbon policy market price demand supply "
+    "network protocol latency cache server request response index vector search query "
+    "model training dataset token embedding retrieval answer context document page "
+    "history river mountain city culture language music science biology chemistry"
+).split()
+
+
+def generate_paragraphs(seed: int, count: int) -> List[str]:
+    """Deterministic filler text for one page"""
+    rng = random.Random(seed)
+    paragraphs = []
+    for _ in range(count):
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(8, 18))]
+            sentences.append(" ".join(words).capitalize() + ".")
+        paragraphs.append(" ".join(sentences))
+    return paragraphs
+
+
+class _BackgroundServer:
+    """ThreadingHTTPServer on an ephemeral localhost port"""
+
+    def __init__(self, handler_class):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class CorpusServer(_BackgroundServer):
+    """Serves /static/<i>.html (server-rendered) and /js/<i>.html (client-rendered) pages"""
+
+    def __init__(self, paragraphs_per_page: int = 12):
+        corpus = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = corpus.render(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.paragraphs_per_page = paragraphs_per_page
+        super().__init__(Handler)
+
+    def render(self, path: str):
+        try:
+            kind, name = path.strip("/").split("/", 1)
+            page_id = int(name.split(".")[0])
+        except ValueError:
+            return None
+        paragraphs = generate_paragraphs(page_id, self.paragraphs_per_page)
+        title = f"Benchmark page {page_id}"
+        if kind == "static":
+            body = "\n".join(f"<p>{p}</p>" for p in paragraphs)
+            return (
+                f"<html><head><title>{title}</title></head><body>"
+                f"<article><h1>{title}</h1>\n{body}</article></body></html>"
+            )
+        if kind == "js":
+            payload = json.dumps(paragraphs)
+            return (
+                f"<html><head><title>{title}</title></head><body><div id=\"app\"></div>"
+                f"<script>document.getElementById('app').innerHTML = "
+                f"{payload}.map(p => '<p>' + p + '</p>').join('');</script></body></html>"
+            )
+        return None
+
+    def urls(self, static_pages: int, js_pages: int) -> List[str]:
+        return (
+            [f"{self.base_url}/static/{i}.html" for i in range(static_pages)]
+            + [f"{self.base_url}/js/{i}.html" for i in range(js_pages)]
+        )
+
+
+class FakeOllamaServer(_BackgroundServer):
+    """Answers /api/generate, /api/tags and /api/ps like Ollama, after a configurable delay"""
+
+    def __init__(self, model: str, latency_ms: float = 200.0):
+        ollama = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path in ("/api/tags", "/api/ps"):
+                    self._send_json({"models": [{"name": ollama.model}]})
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                time.sleep(ollama.latency_ms / 1000.0)
+                prompt = request.get("prompt", "")
+                self._send_json({
+                    "model": ollama.model,
+                    "response": f"Synthetic answer ({len(prompt)} prompt chars).",
+                    "done": True,
+                })
+
+        self.model = model
+        self.latency_ms = latency_ms
+        super().__init__(Handler)
+
+
+class FakeEmbeddingModel:
+    """Drop-in for SentenceTransformer: deterministic hashed bag-of-words vectors"""
+
+    def __init__(self, dimension: int = 384, per_text_ms: float = 0.0):
+        self.dimension = dimension
+        self.per_text_ms = per_text_ms
+        self.texts_encoded = 0
+
+    def _vector(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dimension, dtype=np.float32)
+        for token in text.lower().split():
+            digest = hashlib.md5(token.encode()).digest()
+            vec[int.from_bytes(digest[:4], "little") % self.dimension] += 1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, texts: Union[str, List[str]], **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        if self.per_text_ms:
+            time.sleep(self.per_text_ms * len(batch) / 1000.0)
+        self.texts_encoded += len(batch)
+        vectors = np.stack([self._vector(t) for t in batch]) if batch else np.zeros((0, self.dimension))
+        return vectors[0] if single else vectors
+
+
+def install_fake_redis():
+    """Point the shared Redis pools at an in-process fakeredis server"""
+    import fakeredis
+    import redis
+    import redis.asyncio as aioredis
+    from src.services import redis_client
+
+    server = fakeredis.FakeServer()
+    redis_client._pool = redis.ConnectionPool(
+        connection_class=fakeredis.FakeConnection, server=server, decode_responses=True
+    )
+    redis_client._async_pool = aioredis.ConnectionPool(
+        connection_class=fakeredis.FakeAsyncConnection, server=server, decode_responses=True
+    )
+    return server
+
+
+class LocalCeleryWorker:
+    """Runs tasks sent by name on a thread pool instead of going through a broker.
+
+    Countdowns become timers, so deferred and retried tasks still come back
+    later. Only send_task is replaced; chords (document fan-out) still need a
+    real broker, so callers should keep fan-out disabled.
+    """
+
+    def __init__(self, celery_app, threads: int = 2):
+        from concurrent.futures import ThreadPoolExecutor
+        self.celery_app = celery_app
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="local-worker")
+        self.timers = set()
+        self.lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self._original_send_task = None
+
+    def install(self):
+        self._original_send_task = self.celery_app.send_task
+        self.celery_app.send_task = self.send_task
+        return self
+
+    def send_task(self, name, args=None, kwargs=None, countdown=None, task_id=None, **options):
+        import uuid
+        task_id = task_id or str(uuid.uuid4())
+        if countdown:
+            timer = threading.Timer(countdown, self._submit, (name, args, kwargs, task_id))
+            timer.daemon = True
+            with self.lock:
+                self.timers.add(timer)
+            timer.start()
+        else:
+            self._submit(name, args, kwargs, task_id)
+        return self.celery_app.AsyncResult(task_id)
+
+    def _submit(self, name, args, kwargs, task_id):
+        with self.lock:
+            self.timers = {t for t in self.timers if t.is_alive()}
+        try:
+            self.pool.submit(self._run, name, args, kwargs, task_id)
+        except RuntimeError:
+            pass  # shut down while the timer was pending
+
+    def _run(self, name, args, kwargs, task_id):
+        result = self.celery_app.tasks[name].apply(args=args or [], kwargs=kwargs or {}, task_id=task_id)
+        with self.lock:
+            if result.successful():
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def close(self):
+        with self.lock:
+            for timer in self.timers:
+                timer.cancel()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        if self._original_send_task is not None:
+            self.celery_app.send_task = self._original_send_task
@@ -39,6 +39,26 @@ def ingest_url(url: str) -> Dict[str, Any]:
     except requests.exceptions.RequestException as e:
         return {"error": f"Connection error: {str(e)}"}
 
+def wait_for_ingestion(url_id: int, timeout: int = 300) -> Dict[str, Any]:
+    """Follow the URL's status event stream until it completes or fails (no polling)"""
+    try:
+        with requests.get(
+            f"{API_BASE_URL}/api/events/url/{url_id}",
+            stream=True,
+            timeout=(5, timeout)
+        ) as response:
+            if response.status_code != 200:
+                return {"error": f"API returned status {response.status_code}: {response.text}"}
+            last_event = {}
+            for line in response.iter_lines(decode_unicode=True):
+                if line and line.startswith("data: "):
+                    last_event = json.loads(line[len("data: "):])
+                    if last_event.get("status") in ("completed", "failed"):
+                        break
+            return last_event
+    except requests.exceptions.RequestException as e:
+        return {"error": f"Connection error: {str(e)}"}
+
 def query_knowledge_base(question: str) -> Dict[str, Any]:
     """Query the knowledge base"""
     # working_endpoint = get_working_api_endpoint()
@@ -153,21 +173,20 @@ def main():
                     st.session_state.ingesting = False
                 else:
                     st.success("✅ URL submitted for processing!")
-                    st.info("⏳ Content is being processed in the background...")
                     st.info(result.get("message", ""))
-                    # st.json(result)
                     
-                    # # Simulate processing completion (in real app, you'd check task status)
+                    if result.get("status") == "pending" and result.get("url_id"):
+                        with st.spinner("⏳ Content is being processed in the background..."):
+                            outcome = wait_for_ingestion(result["url_id"])
+                        if "error" in outcome:
+                            st.error(f"Error: {outcome['error']}")
+                        elif outcome.get("status") == "failed":
+                            st.error(f"Ingestion failed: {outcome.get('error', 'unknown error')}")
+                        elif outcome.get("status") == "completed":
+                            st.success("🎉 Content ingested successfully! You can now ask questions.")
 
                     st.session_state.ingesting = False
                     st.session_state.ingestion_complete = True
-
-                    if(result.get("message") != "Processed Earlier & Unchanged"):
-                        # import time
-                        # time.sleep(2)
-                        st.success("🎉 Content ingested successfully! You can now ask questions.")
-
-                    # st.rerun()
             else:
                 st.warning("Please enter a URL")
         
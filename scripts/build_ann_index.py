@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Build (or rebuild) the IVF index of the embedded vector backend.
+
+Rows added later are assigned to the nearest existing cluster, so rebuild
+after the corpus has grown substantially:
+
+    python scripts/build_ann_index.py --nlist 1024
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local vector index's IVF clusters")
+    parser.add_argument("--path", default=None, help="Index directory (default: the active model's index)")
+    parser.add_argument("--nlist", type=int, default=None, help="Clusters (default 4*sqrt(n))")
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+    
+    from src.config.settings import settings
+    from src.services.local_index import MemmapVectorIndex
+    from src.services.vector_store import create_backend
+    
+    if not args.path and settings.vector_backend != "local":
+        print("Error: VECTOR_BACKEND is not 'local'; pass --path to an index directory")
+        sys.exit(1)
+    try:
+        index = MemmapVectorIndex(args.path) if args.path else create_backend()
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Clustering {index.count} vectors in {index.path}...")
+    start = time.perf_counter()
+    try:
+        nlist = index.build_ann_index(nlist=args.nlist, iterations=args.iterations)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Built {nlist} clusters in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
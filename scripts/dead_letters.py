@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Inspect and re-queue URLs that failed for good.
+
+    python scripts/dead_letters.py list --limit 20
+    python scripts/dead_letters.py requeue --limit 100
+
+`requeue` takes the oldest entries off the dead-letter list, sets their
+records back to pending and queues them on the bulk lane with a fresh retry
+budget.
+"""
+import argparse
+import json
+import os
+import sys
+import uuid
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+def list_command(args):
+    from src.services.dead_letters import count_dead_letters, list_dead_letters
+
+    print(f"{count_dead_letters()} dead letters")
+    for entry in list_dead_letters(args.limit):
+        print(json.dumps(entry))
+
+def requeue_command(args):
+    from src.database.connection import SessionLocal
+    from src.models.ingestion import URLIngestion
+    from src.services.dead_letters import pop_dead_letters
+    from src.services.ingest_lease import IngestLease
+    from src.workers.celery_app import BULK_QUEUE
+    from src.workers.enqueue import enqueue_url
+
+    entries = pop_dead_letters(args.limit)
+    leases = IngestLease()
+    requeued = 0
+    db = SessionLocal()
+    try:
+        for entry in entries:
+            task_id = str(uuid.uuid4())
+            if leases.claim(entry["url"], task_id) is not None:
+                continue  # submitted again since it failed, and still in flight
+            url_record = db.query(URLIngestion).filter(URLIngestion.url == entry["url"]).first()
+            if url_record:
+                url_record.status = "pending"
+                url_record.error_message = None
+                db.commit()
+            enqueue_url(entry["url"], lane=BULK_QUEUE, task_id=task_id)
+            requeued += 1
+    finally:
+        db.close()
+    print(f"Re-queued {requeued} of {len(entries)} URLs")
+
+def main():
+    parser = argparse.ArgumentParser(description="Dead-letter list of permanently failed URLs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="Show the newest entries")
+    list_parser.add_argument("--limit", type=int, default=20)
+    requeue_parser = commands.add_parser("requeue", help="Queue the oldest entries again")
+    requeue_parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    if args.command == "list":
+        list_command(args)
+    else:
+        requeue_command(args)
+
+if __name__ == "__main__":
+    main()
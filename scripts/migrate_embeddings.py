@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Migrate the vector corpus to a new embedding model without downtime.
+
+    python scripts/migrate_embeddings.py start BAAI/bge-small-en-v1.5
+    python scripts/migrate_embeddings.py status
+    python scripts/migrate_embeddings.py swap
+
+`start` creates the new model's collection and queues a background job that
+re-embeds every chunk from its stored text (no re-scraping). New ingestions
+are written to both collections meanwhile. Once the job reports "ready",
+`swap` switches reads to the new collection in one step.
+"""
+import argparse
+import json
+import os
+import sys
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+def _count(backend):
+    try:
+        return backend.count
+    except Exception:
+        return "unknown"
+
+def start_command(args):
+    from src.services.embeddings import EmbeddingService
+    from src.services.vector_store import create_backend
+    from src.services.vector_versions import start_migration
+    from src.workers.celery_app import BULK_QUEUE
+    from src.workers.tasks import reembed_collection_task
+    
+    # Loading the model validates the name and gives the new collection's dimension
+    service = EmbeddingService(args.model)
+    create_backend(args.model, service.dimension)
+    migration = start_migration(args.model)
+    reembed_collection_task.apply_async(queue=BULK_QUEUE)
+    print(f"Re-embedding {migration['source_model']} -> {args.model} ({service.dimension}-d)")
+
+def status_command(args):
+    from src.services.vector_store import create_backend
+    from src.services.vector_versions import get_active_model, get_migration
+    
+    active = get_active_model()
+    print(f"Active model: {active} ({_count(create_backend(active))} points)")
+    migration = get_migration()
+    if not migration:
+        print("No migration in progress")
+        return
+    target = _count(create_backend(migration["model"]))
+    print(json.dumps({**migration, "target_points": target}, indent=2))
+
+def pause_command(args, status="paused"):
+    from src.services.vector_versions import get_migration, update_migration
+    from src.workers.celery_app import BULK_QUEUE
+    from src.workers.tasks import reembed_collection_task
+    
+    if not get_migration():
+        print("No migration in progress")
+        sys.exit(1)
+    update_migration(status=status)
+    if status == "running":
+        reembed_collection_task.apply_async(queue=BULK_QUEUE)
+    print(f"Migration {status}")
+
+def swap_command(args):
+    from src.config.settings import settings
+    from src.services.vector_store import create_backend
+    from src.services.vector_versions import get_migration, set_active_model, clear_migration
+    
+    migration = get_migration()
+    if not migration:
+        print("No migration in progress")
+        sys.exit(1)
+    if migration["status"] != "ready" and not args.force:
+        print(f"Migration is {migration['status']}, not ready (use --force to swap anyway)")
+        sys.exit(1)
+    
+    # One SET: every VectorStore created from now on reads the new collection
+    set_active_model(migration["model"])
+    clear_migration()
+    print(f"Reads now use {migration['model']}")
+    
+    if settings.vector_backend == "qdrant":
+        if create_backend(migration["model"]).point_alias():
+            print(f"Alias {settings.qdrant_collection_name} -> new collection")
+        else:
+            print(f"Collection {settings.qdrant_collection_name} predates versioning; "
+                  f"delete it once no longer needed to free the alias name")
+    print(f"Set EMBEDDING_MODEL={migration['model']} in your environment for new deployments")
+
+def abort_command(args):
+    from src.services.vector_versions import clear_migration
+    
+    clear_migration()
+    print("Migration cancelled; the new collection is left in place")
+
+def main():
+    parser = argparse.ArgumentParser(description="Zero-downtime embedding model migration")
+    commands = parser.add_subparsers(dest="command", required=True)
+    start_parser = commands.add_parser("start", help="Create the new collection and start re-embedding")
+    start_parser.add_argument("model")
+    commands.add_parser("status", help="Show progress")
+    commands.add_parser("pause", help="Stop after the current batch")
+    commands.add_parser("resume", help="Continue a paused or stalled migration")
+    swap_parser = commands.add_parser("swap", help="Switch reads to the new collection")
+    swap_parser.add_argument("--force", action="store_true", help="Swap before re-embedding has finished")
+    commands.add_parser("abort", help="Cancel the migration")
+    args = parser.parse_args()
+    
+    try:
+        if args.command == "start":
+            start_command(args)
+        elif args.command == "status":
+            status_command(args)
+        elif args.command == "pause":
+            pause_command(args)
+        elif args.command == "resume":
+            pause_command(args, status="running")
+        elif args.command == "swap":
+            swap_command(args)
+        else:
+            abort_command(args)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
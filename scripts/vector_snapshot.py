@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Export the vector corpus to a snapshot directory, or load one back.
+
+    python scripts/vector_snapshot.py export /backups/corpus-2024-10-01
+    python scripts/vector_snapshot.py import /backups/corpus-2024-10-01 --workers 8
+
+Restoring a snapshot skips fetching, extraction and embedding entirely. The
+configured backend (VECTOR_BACKEND) is the source for export and the target
+for import, using the collection of the active model (which
+migrate_embeddings.py swap may have moved away from EMBEDDING_MODEL).
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+def export_command(args, model, settings):
+    from src.services.chunk_store import load_chunks
+    from src.services.snapshot import export_snapshot
+    from src.services.vector_store import create_backend
+    
+    backend = create_backend(model)
+    print(f"Exporting {settings.vector_backend} vectors of {model} to {args.path}...")
+    start = time.perf_counter()
+    manifest = export_snapshot(
+        backend, args.path, shard_size=args.shard_size, dtype=args.dtype,
+        metadata={"embedding_model": model, "source_backend": settings.vector_backend},
+        load_texts=load_chunks
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Exported {manifest['count']} points in {len(manifest['shards'])} shards ({elapsed:.1f}s)")
+    missing = sum(shard.get("texts_missing", 0) for shard in manifest["shards"])
+    if missing:
+        print(f"Warning: {missing} slim-payload points have no row in chunk_texts; they will restore without text")
+
+def import_command(args, model, settings):
+    from src.services.chunk_store import save_chunks
+    from src.services.snapshot import import_snapshot, read_manifest
+    from src.services.vector_store import create_backend
+    
+    manifest = read_manifest(args.path)
+    if manifest.get("embedding_model") not in (None, model) and not args.force:
+        print(f"Error: snapshot was embedded with {manifest['embedding_model']}, "
+              f"but the active model is {model} (use --force to load anyway)")
+        sys.exit(1)
+    
+    # The dimension only shapes a collection/index created here; import_snapshot
+    # rejects an existing one of another size
+    backend = create_backend(model, manifest["dimension"])
+    print(f"Importing {manifest['count']} points into {settings.vector_backend} ({model})...")
+    start = time.perf_counter()
+    
+    def progress(loaded, total):
+        rate = loaded / max(time.perf_counter() - start, 1e-9)
+        print(f"  {loaded}/{total} points ({rate:.0f}/s)")
+    
+    loaded = import_snapshot(backend, args.path, batch_size=args.batch_size, workers=args.workers,
+                             progress=progress, save_texts=save_chunks)
+    print(f"Imported {loaded} points in {time.perf_counter() - start:.1f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Export/import the vector corpus")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    export_parser = commands.add_parser("export", help="Write every point to a snapshot directory")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--shard-size", type=int, default=50_000, help="Points per shard file")
+    export_parser.add_argument("--dtype", choices=["float16", "float32"], default="float16")
+    
+    import_parser = commands.add_parser("import", help="Bulk-load a snapshot directory")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--batch-size", type=int, default=1000, help="Points per upsert")
+    import_parser.add_argument("--workers", type=int, default=4, help="Upserts in flight")
+    import_parser.add_argument("--force", action="store_true", help="Ignore an embedding model mismatch")
+    args = parser.parse_args()
+    
+    from src.config.settings import settings
+    from src.services.vector_versions import get_active_model
+    
+    # Resolved once, so the snapshot's label, the model check and the backend agree
+    model = get_active_model()
+    try:
+        if args.command == "export":
+            export_command(args, model, settings)
+        else:
+            import_command(args, model, settings)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
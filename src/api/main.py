@@ -1,7 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from src.api.routes import ingest, query
-from src.database.connection import create_tables
+from src.api.routes import ingest, query, events
+from src.database.connection import create_tables, SessionLocal
+from src.services.status_counts import ensure_status_counts
+from src.services.redis_client import close_async_redis
+from src.services.metrics import render_metrics
+from src.services.events import status_hub
+from src.services.readiness import readiness
+from src.services.llm_client import close_llm_client
 
 # Create FastAPI app
 app = FastAPI(
@@ -22,16 +29,44 @@ app.add_middleware(
 # Include routers
 app.include_router(ingest.router, prefix="/api", tags=["ingestion"])
 app.include_router(query.router, prefix="/api", tags=["query"])
+app.include_router(events.router, prefix="/api", tags=["events"])
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database tables on startup"""
+    """Initialize database tables and status counters, then warm up in the background"""
     create_tables()
+    db = SessionLocal()
+    try:
+        ensure_status_counts(db)
+    finally:
+        db.close()
+    readiness.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the status subscription and warm-up, and release pooled Redis and LLM connections"""
+    await readiness.close()
+    await status_hub.close()
+    await close_async_redis()
+    await close_llm_client()
 
 @app.get("/")
 async def root():
     return {"message": "RAG Engine API is running"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/health")
 async def health():
+    """Liveness: the process is serving requests (no dependency calls)"""
     return {"status": "healthy"}
+
+@app.get("/ready")
+async def ready():
+    """Readiness: models warmed up and dependencies reachable; 503 until then"""
+    report = await readiness.check()
+    return JSONResponse(report, status_code=200 if report["status"] == "ready" else 503)
@@ -0,0 +1,76 @@
+import asyncio
+import json
+from typing import Any, Callable, Dict, Optional
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from src.api.dependencies import get_db
+from src.database.connection import SessionLocal
+from src.config.settings import settings
+from src.models.ingestion import URLIngestion
+from src.services.events import status_hub, TERMINAL_STATUSES
+
+router = APIRouter()
+
+def _sse(event: Dict[str, Any]) -> str:
+    return f"event: status\ndata: {json.dumps(event, default=str)}\n\n"
+
+async def _event_stream(request: Request, topic: str,
+                        read_snapshot: Optional[Callable[[], Optional[Dict[str, Any]]]] = None,
+                        until_terminal: bool = False):
+    """Server-sent events for a topic, with heartbeats so proxies keep the connection open"""
+    async with status_hub.watch(topic) as queue:
+        # Read only once the subscription is confirmed, so no transition falls in between
+        snapshot = read_snapshot() if read_snapshot else None
+        if snapshot:
+            yield _sse(snapshot)
+            if until_terminal and snapshot["status"] in TERMINAL_STATUSES:
+                return
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.status_events_heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield _sse(event)
+            if until_terminal and event["status"] in TERMINAL_STATUSES:
+                return
+
+def _url_snapshot(url_id: int) -> Optional[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        url_record = db.query(URLIngestion).filter(URLIngestion.id == url_id).first()
+        if not url_record:
+            return None
+        return {
+            "url_id": url_record.id,
+            "url": url_record.url,
+            "status": url_record.status,
+            "error": url_record.error_message,
+        }
+    finally:
+        db.close()
+
+def _stream(generator) -> StreamingResponse:
+    return StreamingResponse(
+        generator,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/events")
+async def stream_all_events(request: Request):
+    """Stream every ingestion status transition"""
+    return _stream(_event_stream(request, "all"))
+
+@router.get("/events/url/{url_id}")
+async def stream_url_events(url_id: int, request: Request, db: Session = Depends(get_db)):
+    """Stream one URL's status, starting with its current state; ends once completed or failed"""
+    if not db.query(URLIngestion.id).filter(URLIngestion.id == url_id).first():
+        raise HTTPException(status_code=404, detail="URL not found")
+    return _stream(_event_stream(request, f"url:{url_id}", lambda: _url_snapshot(url_id), until_terminal=True))
+
+@router.get("/events/batch/{batch_id}")
+async def stream_batch_events(batch_id: str, request: Request):
+    """Stream status transitions for the URLs of one /ingest-urls batch"""
+    return _stream(_event_stream(request, f"batch:{batch_id}"))
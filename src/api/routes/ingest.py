@@ -1,10 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Header
 from pydantic import BaseModel, HttpUrl
+from typing import Optional, List, Tuple
+import uuid
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from src.api.dependencies import get_db
 from src.models.ingestion import URLIngestion
-from src.workers.tasks import process_url_task
-from src.services.cache import CacheService
+from src.config.settings import settings
+from src.workers.celery_app import INTERACTIVE_QUEUE, BULK_QUEUE
+from src.workers.enqueue import enqueue_url
+from src.services.cache import AsyncCacheService
+from src.services.url_utils import get_domain, interleave_by_domain, ingestion_key
+from src.services.near_duplicates import get_duplicate_of
+from src.services.events import publish_status_async
+from src.services.status_counts import get_status_counts
+from src.services.dead_letters import read_dead_letters_async
+from src.services.ingest_lease import claim_async, release_async, get_duplicate_count
 import validators
 
 router = APIRouter()
@@ -16,91 +27,211 @@ class URLIngestResponse(BaseModel):
     message: str
     url: str
     status: str
+    url_id: Optional[int] = None
+    task_id: Optional[str] = None
 
-@router.post("/ingest-url", response_model=URLIngestResponse)
+class BulkIngestRequest(BaseModel):
+    urls: List[HttpUrl]
+    force_refresh: bool = False
+
+class BulkIngestResponse(BaseModel):
+    batch_id: str
+    queued: int
+    results: List[URLIngestResponse]
+
+@router.post("/ingest-url", response_model=URLIngestResponse, response_model_exclude_none=True)
 async def ingest_url(
     request: URLIngestRequest, 
     db: Session = Depends(get_db),
-    force_refresh: bool = Query(False, description="Force refresh even if content hasn't changed")
+    force_refresh: bool = Query(False, description="Force refresh even if content hasn't changed"),
+    x_debug_trace: bool = Header(False, description="Store a span tree with the Celery task result"),
+    x_debug_profile: bool = Header(False, description="Also sample a wall-clock profile on the worker")
 ):
     """Submit URL for processing with content change detection"""
-    url = str(request.url)
+    url = ingestion_key(str(request.url))
     
     # Validate URL
     if not validators.url(url):
         raise HTTPException(status_code=400, detail="Invalid URL format")
     
-    cache = CacheService()
+    task_id = str(uuid.uuid4())
+    attached = await _attach_to_in_flight(url, db, task_id)
+    if attached:
+        return attached
+    skipped, url_record = await _register_url(url, db, AsyncCacheService(), force_refresh)
+    if skipped:
+        await release_async(url, task_id)
+        return skipped
+    
+    # Queue processing task on the interactive lane
+    try:
+        task = enqueue_url(
+            url, force_refresh, lane=INTERACTIVE_QUEUE, task_id=task_id,
+            debug_trace=x_debug_trace, debug_profile=x_debug_profile
+        )
+        return URLIngestResponse(
+            message="URL queued for processing",
+            url=url,
+            status="pending",
+            url_id=url_record.id,
+            task_id=task.id
+        )
+    except Exception as e:
+        await release_async(url, task_id)
+        raise HTTPException(status_code=500, detail=f"Failed to queue URL: {str(e)}")
+
+@router.post("/ingest-urls", response_model=BulkIngestResponse)
+async def ingest_urls(request: BulkIngestRequest, db: Session = Depends(get_db)):
+    """Queue a backfill on the bulk lane, interleaved and paced per domain.
+
+    Progress for the whole batch can be followed at /api/events/batch/{batch_id}.
+    """
+    cache = AsyncCacheService()
+    batch_id = uuid.uuid4().hex
+    results = []
+    per_domain = {}
+    queued = 0
+    
+    # Variants that canonicalize to the same URL are queued once
+    urls = list(dict.fromkeys(ingestion_key(str(u)) for u in request.urls))
+    for url in interleave_by_domain(urls):
+        if not validators.url(url):
+            results.append(URLIngestResponse(message="Invalid URL format", url=url, status="rejected"))
+            continue
+        task_id = str(uuid.uuid4())
+        attached = await _attach_to_in_flight(url, db, task_id)
+        if attached:
+            results.append(attached)
+            continue
+        skipped, url_record = await _register_url(url, db, cache, request.force_refresh, batch_id)
+        if skipped:
+            await release_async(url, task_id)
+            results.append(skipped)
+            continue
+        
+        # Spread each domain's URLs over time at its rate limit so workers
+        # aren't handed tasks that would only be deferred again
+        domain = get_domain(url)
+        position = per_domain.get(domain, 0)
+        per_domain[domain] = position + 1
+        countdown = None
+        if settings.domain_politeness_enabled and position >= settings.domain_burst:
+            countdown = (position - settings.domain_burst + 1) / settings.domain_rate_limit
+        
+        try:
+            task = enqueue_url(url, request.force_refresh, lane=BULK_QUEUE, countdown=countdown,
+                               task_id=task_id, batch_id=batch_id)
+        except Exception as e:
+            await release_async(url, task_id)
+            raise HTTPException(status_code=500, detail=f"Failed to queue URL: {str(e)}")
+        queued += 1
+        results.append(URLIngestResponse(
+            message="URL queued for processing", url=url, status="pending",
+            url_id=url_record.id, task_id=task.id
+        ))
     
-    # Check if URL already exists
+    return BulkIngestResponse(batch_id=batch_id, queued=queued, results=results)
+
+async def _attach_to_in_flight(url: str, db: Session, task_id: str) -> Optional[URLIngestResponse]:
+    """Claim the URL's lease for task_id.
+
+    If another task already holds it (a concurrent submission, a recrawl, a
+    deferred retry), returns a response pointing at that task instead.
+    """
+    holder = await claim_async(url, task_id)
+    if holder is None:
+        return None
     existing_url = db.query(URLIngestion).filter(URLIngestion.url == url).first()
+    return URLIngestResponse(
+        message="URL already queued, attached to the in-flight task",
+        url=url,
+        status=existing_url.status if existing_url else "pending",
+        url_id=existing_url.id if existing_url else None,
+        task_id=holder
+    )
+
+async def _register_url(url: str, db: Session, cache: AsyncCacheService, force_refresh: bool,
+                        batch_id: Optional[str] = None) -> Tuple[Optional[URLIngestResponse], URLIngestion]:
+    """Create/reset the URL record.
+
+    Returns (response, record); response is set when the URL should not be queued.
+    """
+    # Check if URL already exists; the row lock makes check-and-transition atomic
+    existing_url = db.query(URLIngestion).filter(URLIngestion.url == url).with_for_update().first()
     
     if existing_url and not force_refresh:
         if existing_url.status == "completed":
             # Check if content has changed by comparing hashes
-            cached_hash = cache.get_content_hash(url)
+            cached_hash = await cache.get_content_hash(url)
             if cached_hash and cached_hash == existing_url.content_hash:
+                db.commit()  # releases the row lock
                 return URLIngestResponse(
                     message="Processed Earlier & Unchanged",
                     url=url,
-                    status=existing_url.status
-                )
+                    status=existing_url.status,
+                    url_id=existing_url.id
+                ), existing_url
             else:
                 # Content might have changed, reprocess
                 existing_url.status = "pending"
                 db.commit()
         elif existing_url.status == "processing":
+            db.commit()
             return URLIngestResponse(
                 message="URL is currently being processed",
                 url=url,
-                status=existing_url.status
-            )
+                status=existing_url.status,
+                url_id=existing_url.id
+            ), existing_url
     
     # Create or update URL record
     if existing_url:
-        existing_url.status = "pending"
+        url_record = existing_url
+        url_record.status = "pending"
         db.commit()
     else:
         url_record = URLIngestion(url=url, status="pending")
         db.add(url_record)
-        db.commit()
-    
-    # Queue processing task
-    try:
-        process_url_task.delay(url, force_refresh)
-        return URLIngestResponse(
-            message="URL queued for processing",
-            url=url,
-            status="pending"
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to queue URL: {str(e)}")
+        try:
+            db.commit()
+        except IntegrityError:
+            # Inserted by a concurrent submission (only possible if the lease failed open)
+            db.rollback()
+            existing_url = db.query(URLIngestion).filter(URLIngestion.url == url).first()
+            return URLIngestResponse(
+                message="URL queued by a concurrent request",
+                url=url,
+                status=existing_url.status,
+                url_id=existing_url.id
+            ), existing_url
+    await publish_status_async(url_record.id, url, "pending", batch_id)
+    return None, url_record
 
-@router.post("/refresh-url", response_model=URLIngestResponse)
-async def refresh_url(request: URLIngestRequest, db: Session = Depends(get_db)):
+@router.post("/refresh-url", response_model=URLIngestResponse, response_model_exclude_none=True)
+async def refresh_url(
+    request: URLIngestRequest,
+    db: Session = Depends(get_db),
+    x_debug_trace: bool = Header(False),
+    x_debug_profile: bool = Header(False)
+):
     """Force refresh a URL even if content hasn't changed"""
-    return await ingest_url(request, db, force_refresh=True)
+    return await ingest_url(
+        request, db, force_refresh=True, x_debug_trace=x_debug_trace, x_debug_profile=x_debug_profile
+    )
 
 @router.get("/status")
 async def get_overall_status(db: Session = Depends(get_db)):
     """Get overall ingestion status"""
-    from sqlalchemy import func
-    
-    # Count URLs by status
-    status_counts = db.query(
-        URLIngestion.status,
-        func.count(URLIngestion.id).label('count')
-    ).group_by(URLIngestion.status).all()
-    
-    # Convert to dictionary
-    status_dict = {status: count for status, count in status_counts}
+    # Counters are maintained on every transition, so this never scans url_ingestions
+    status_dict = get_status_counts(db)
     
     return {
         "pending_urls": status_dict.get("pending", 0),
         "processing_urls": status_dict.get("processing", 0),
         "completed_urls": status_dict.get("completed", 0),
         "failed_urls": status_dict.get("failed", 0),
-        "total_urls": sum(status_dict.values())
+        "total_urls": sum(status_dict.values()),
+        "duplicate_submissions": await get_duplicate_count()
     }
 
 @router.get("/status/{url_id}")
@@ -117,5 +248,45 @@ async def get_ingestion_status(url_id: int, db: Session = Depends(get_db)):
         "created_at": url_record.created_at,
         "updated_at": url_record.updated_at,
         "error_message": url_record.error_message,
-        "content_hash": url_record.content_hash
+        "content_hash": url_record.content_hash,
+        "duplicate_of": get_duplicate_of(db, url_record.id)
+    }
+
+@router.get("/dead-letters")
+async def get_dead_letters(
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0)
+):
+    """URLs that failed for good (newest first); scripts/dead_letters.py re-queues them"""
+    page = await read_dead_letters_async(limit, offset)
+    if page is None:
+        return {"total": 0, "items": [], "error": "dead-letter list unavailable"}
+    total, items = page
+    return {"total": total, "items": items}
+
+@router.get("/urls")
+async def list_urls(
+    status: Optional[str] = Query(None, description="Only URLs with this status"),
+    after_id: int = Query(0, ge=0, description="Cursor: next_after_id from the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """List ingested URLs by id using keyset pagination (served by the (status, id) index)"""
+    query = db.query(URLIngestion).filter(URLIngestion.id > after_id)
+    if status:
+        query = query.filter(URLIngestion.status == status)
+    records = query.order_by(URLIngestion.id).limit(limit).all()
+    
+    return {
+        "items": [
+            {
+                "id": record.id,
+                "url": record.url,
+                "status": record.status,
+                "updated_at": record.updated_at,
+                "error_message": record.error_message
+            }
+            for record in records
+        ],
+        "next_after_id": records[-1].id if len(records) == limit else None
     }
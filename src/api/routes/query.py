@@ -1,35 +1,86 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
-from src.api.dependencies import get_vector_store, get_llm_service
-from src.services.vector_store import VectorStore
+from datetime import datetime
+import asyncio
+import json
+from src.config.settings import settings
+from sqlalchemy.orm import Session
+from src.api.dependencies import get_db, get_vector_store, get_llm_service
+from src.services.vector_store import VectorStore, build_filter
 from src.services.llm_service import LLMService
+from src.services.llm_client import get_llm_client, LLMOverloaded
+from src.services.redis_client import get_pool_stats
+from src.services.tracing import start_trace
+from src.services.events import status_hub
+from src.services.near_duplicates import expand_duplicate_urls
+from src.services.url_utils import ingestion_key
 
 router = APIRouter()
 
 class QueryRequest(BaseModel):
     query: str
     limit: Optional[int] = 5
+    # Optional restrictions, served by Qdrant payload indexes
+    urls: Optional[List[str]] = None
+    domains: Optional[List[str]] = None
+    ingested_after: Optional[datetime] = None
+    ingested_before: Optional[datetime] = None
+
+class QueryBatchRequest(BaseModel):
+    queries: List[str]
+    limit: Optional[int] = 5
+    generate: bool = True  # False: retrieval only, no LLM calls
+    concurrency: Optional[int] = None  # LLM calls in flight, capped by the server setting
+    urls: Optional[List[str]] = None
+    domains: Optional[List[str]] = None
+    ingested_after: Optional[datetime] = None
+    ingested_before: Optional[datetime] = None
 
 class QueryResponse(BaseModel):
     answer: str
     sources: List[Dict[str, Any]]
     query: str
+    trace: Optional[Dict[str, Any]] = None  # only with X-Debug-Trace
 
-@router.post("/query", response_model=QueryResponse)
+@router.post("/query", response_model=QueryResponse, response_model_exclude_none=True)
 async def query_knowledge_base(
     request: QueryRequest,
     vector_store: VectorStore = Depends(get_vector_store),
-    llm_service: LLMService = Depends(get_llm_service)
+    llm_service: LLMService = Depends(get_llm_service),
+    db: Session = Depends(get_db),
+    x_debug_trace: bool = Header(False, description="Return a span tree of the request"),
+    x_debug_profile: bool = Header(False, description="Also sample a wall-clock profile (implies X-Debug-Trace)")
 ):
     """Query the knowledge base"""
     
     if not request.query.strip():
         raise HTTPException(status_code=400, detail="Query cannot be empty")
     
+    if request.urls:
+        # Stored URLs are canonical, so match them in that form
+        request.urls = expand_duplicate_urls(db, [ingestion_key(url) for url in request.urls])
+    if not (x_debug_trace or x_debug_profile):
+        return await _answer_query(request, vector_store, llm_service)
+    
+    with start_trace("query", profile=x_debug_profile, query_chars=len(request.query), limit=request.limit) as root:
+        response = await _answer_query(request, vector_store, llm_service)
+    response.trace = root.to_dict()
+    return response
+
+async def _answer_query(request: QueryRequest, vector_store: VectorStore, llm_service: LLMService) -> QueryResponse:
     try:
         # Search for relevant documents
-        search_results = vector_store.search(request.query, limit=request.limit)
+        query_filter = build_filter(
+            urls=request.urls,
+            domains=request.domains,
+            ingested_after=request.ingested_after,
+            ingested_before=request.ingested_before
+        )
+        search_results = vector_store.search(request.query, limit=request.limit, query_filter=query_filter)
+        # Only the chunks sent to the LLM need their full text
+        search_results = vector_store.load_content(search_results)
         
         if not search_results:
             return QueryResponse(
@@ -41,25 +92,116 @@ async def query_knowledge_base(
         # Generate answer using LLM
         answer = await llm_service.generate_answer(request.query, search_results)
         
-        # Format sources
-        sources = [
-            {
-                "url": result["url"],
-                "content_preview": result["content"][:200] + "..." if len(result["content"]) > 200 else result["content"],
-                "relevance_score": result["score"]
-            }
-            for result in search_results
-        ]
-        
         return QueryResponse(
             answer=answer,
-            sources=sources,
+            sources=_format_sources(search_results),
             query=request.query
         )
         
+    except LLMOverloaded as e:
+        # Shed load early instead of queueing into the generation timeout
+        raise HTTPException(status_code=503, detail=f"LLM overloaded: {e}",
+                            headers={"Retry-After": str(int(settings.llm_queue_timeout))})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
 
+def _format_sources(search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "url": result["url"],
+            "content_preview": result["content"][:200] + "..." if len(result["content"]) > 200 else result["content"],
+            "relevance_score": result["score"]
+        }
+        for result in search_results
+    ]
+
+@router.post("/query-batch")
+async def query_batch(
+    request: QueryBatchRequest,
+    vector_store: VectorStore = Depends(get_vector_store),
+    llm_service: LLMService = Depends(get_llm_service),
+    db: Session = Depends(get_db)
+):
+    """Answer many queries at once, streamed back as NDJSON.
+
+    Queries are embedded and searched a chunk at a time (one model batch and
+    one Qdrant batch search each), so memory stays flat however long the
+    list is. Each line carries the query's `index`; with generation on,
+    lines within a chunk arrive in completion order.
+    """
+    if len(request.queries) > settings.query_batch_max_queries:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.query_batch_max_queries} queries per batch"
+        )
+    query_filter = build_filter(
+        # A near duplicate's chunks are the original's
+        urls=expand_duplicate_urls(db, [ingestion_key(url) for url in request.urls]) if request.urls else None,
+        domains=request.domains,
+        ingested_after=request.ingested_after,
+        ingested_before=request.ingested_before
+    )
+    concurrency = min(request.concurrency or settings.query_batch_max_concurrency,
+                      settings.query_batch_max_concurrency)
+    return StreamingResponse(
+        _query_batch_lines(request, query_filter, max(1, concurrency), vector_store, llm_service),
+        media_type="application/x-ndjson"
+    )
+
+def _search_chunk(vector_store: VectorStore, queries: List[str], limit: int, query_filter) -> List[List[Dict[str, Any]]]:
+    batches = vector_store.search_batch(queries, limit=limit, query_filter=query_filter)
+    # One side-store read for the whole chunk (a no-op without slim payloads)
+    vector_store.load_content([result for results in batches for result in results])
+    return batches
+
+async def _query_batch_lines(request: QueryBatchRequest, query_filter, concurrency: int,
+                             vector_store: VectorStore, llm_service: LLMService):
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def answer(index: int, query: str, search_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        line = {"index": index, "query": query, "sources": _format_sources(search_results)}
+        if not request.generate:
+            return line
+        if not search_results:
+            line["answer"] = "I don't have any information to answer this question. Please try ingesting some URLs first."
+            return line
+        async with semaphore:
+            try:
+                line["answer"] = await llm_service.generate_answer(query, search_results)
+            except LLMOverloaded as e:
+                line["error"] = f"LLM overloaded: {e}"
+        return line
+    
+    chunk_size = settings.query_batch_chunk_size
+    for start in range(0, len(request.queries), chunk_size):
+        chunk = list(enumerate(request.queries[start:start + chunk_size], start))
+        valid = [(index, query) for index, query in chunk if query.strip()]
+        for index, query in chunk:
+            if not query.strip():
+                yield json.dumps({"index": index, "query": query, "error": "Query cannot be empty"}) + "\n"
+        if not valid:
+            continue
+        
+        try:
+            # Embedding and search are blocking; keep the event loop free for other requests
+            batches = await asyncio.to_thread(
+                _search_chunk, vector_store, [query for _, query in valid], request.limit, query_filter
+            )
+        except Exception as e:
+            for index, query in valid:
+                yield json.dumps({"index": index, "query": query, "error": f"Search failed: {str(e)}"}) + "\n"
+            continue
+        
+        tasks = [asyncio.ensure_future(answer(index, query, results))
+                 for (index, query), results in zip(valid, batches)]
+        try:
+            for next_line in asyncio.as_completed(tasks):
+                yield json.dumps(await next_line) + "\n"
+        finally:
+            # Client went away mid-chunk: don't leave LLM calls running
+            for task in tasks:
+                task.cancel()
+
 @router.get("/health")
 async def health_check(llm_service: LLMService = Depends(get_llm_service)):
     """Health check endpoint"""
@@ -71,5 +213,8 @@ async def health_check(llm_service: LLMService = Depends(get_llm_service)):
         "services": {
             "vector_store": "available",
             "llm": "available" if llm_available else "unavailable"
-        }
+        },
+        "redis_pool": get_pool_stats(),
+        "llm_queue": get_llm_client().stats(),
+        "status_watchers": status_hub.watcher_count
     }
@@ -8,6 +8,10 @@ class Settings(BaseSettings):
     
     # Redis Configuration
     redis_url: str = Field(default="redis://localhost:6379", env="REDIS_URL")
+    redis_max_connections: int = Field(default=50, env="REDIS_MAX_CONNECTIONS")  # per process
+    redis_socket_timeout: float = Field(default=5.0, env="REDIS_SOCKET_TIMEOUT")
+    redis_pool_timeout: float = Field(default=2.0, env="REDIS_POOL_TIMEOUT")  # wait for a free pooled connection
+    redis_health_check_interval: int = Field(default=30, env="REDIS_HEALTH_CHECK_INTERVAL")
     
     # Cache Configuration
     embedding_cache_ttl: int = Field(default=86400, env="EMBEDDING_CACHE_TTL")  # 24 hours
@@ -24,19 +28,133 @@ class Settings(BaseSettings):
     # Qdrant Configuration - Single collection
     qdrant_url: str = Field(default="http://localhost:6333", env="QDRANT_URL")
     qdrant_collection_name: str = Field(default="web_content", env="QDRANT_COLLECTION_NAME")
+    # Keep chunk text in Postgres (compressed) and only ids/small fields in Qdrant payloads
+    slim_payloads: bool = Field(default=False, env="SLIM_PAYLOADS")
+    # "qdrant", or "local" for the embedded memory-mapped index (small/offline deployments)
+    vector_backend: str = Field(default="qdrant", env="VECTOR_BACKEND")
+    local_index_dir: str = Field(default="./data/vector-index", env="LOCAL_INDEX_DIR")
+    local_index_ann: bool = Field(default=True, env="LOCAL_INDEX_ANN")  # use the IVF index once built
+    local_index_nprobe: int = Field(default=8, env="LOCAL_INDEX_NPROBE")  # IVF clusters scored per query
+    # Chunk upserts: batches written in parallel with the next batch's embedding
+    upsert_batch_size: int = Field(default=256, env="UPSERT_BATCH_SIZE")  # points per request
+    upsert_parallelism: int = Field(default=2, env="UPSERT_PARALLELISM")  # batches in flight per document
+    upsert_wait: bool = Field(default=False, env="UPSERT_WAIT")  # false: don't wait for each batch to be applied
+    
+    # Embedding model migrations (see scripts/migrate_embeddings.py)
+    vector_active_model_key: str = Field(default="vector:active_model", env="VECTOR_ACTIVE_MODEL_KEY")
+    vector_migration_key: str = Field(default="vector:migration", env="VECTOR_MIGRATION_KEY")
+    reembed_batch_size: int = Field(default=256, env="REEMBED_BATCH_SIZE")
+    reembed_rate_limit: float = Field(default=200.0, env="REEMBED_RATE_LIMIT")  # chunks/sec, 0 = unlimited
+    reembed_stall_seconds: int = Field(default=300, env="REEMBED_STALL_SECONDS")  # beat resumes a stalled run
+    
+    # Batch queries (/api/query-batch)
+    query_batch_max_queries: int = Field(default=5000, env="QUERY_BATCH_MAX_QUERIES")
+    query_batch_chunk_size: int = Field(default=64, env="QUERY_BATCH_CHUNK_SIZE")  # queries per embed+search round
+    query_batch_max_concurrency: int = Field(default=8, env="QUERY_BATCH_MAX_CONCURRENCY")  # LLM calls in flight
     
     # API Configuration
     api_port: int = Field(default=8000, env="API_PORT")
     
+    # Metrics (0 disables the worker's metrics server)
+    worker_metrics_port: int = Field(default=9100, env="WORKER_METRICS_PORT")
+    
+    # Debug tracing (opt-in per request/task)
+    trace_profile_dir: str = Field(default="/tmp/rag-profiles", env="TRACE_PROFILE_DIR")
+    trace_profile_interval_ms: float = Field(default=5.0, env="TRACE_PROFILE_INTERVAL_MS")
+    
     # Embedding Model
     embedding_model: str = Field(
         default="sentence-transformers/all-MiniLM-L6-v2", 
         env="EMBEDDING_MODEL"
     )
+    embedding_dimension: int = Field(default=384, env="EMBEDDING_DIMENSION")  # all-MiniLM-L6-v2
+    # On an embedding-cache miss, read the chunk's vector back from the vector store before running the model
+    embedding_store_fallback: bool = Field(default=True, env="EMBEDDING_STORE_FALLBACK")
     
     # LLM Configuration
     ollama_base_url: str = Field(default="http://localhost:11434", env="OLLAMA_BASE_URL")
     llm_model: str = Field(default="llama3.2:3b", env="LLM_MODEL")
+    ollama_keep_alive: str = Field(default="30m", env="OLLAMA_KEEP_ALIVE")  # how long Ollama keeps the model loaded
+    ollama_base_urls: str = Field(default="", env="OLLAMA_BASE_URLS")  # comma-separated; overrides OLLAMA_BASE_URL
+    llm_max_concurrency: int = Field(default=2, env="LLM_MAX_CONCURRENCY")  # generations per backend (match OLLAMA_NUM_PARALLEL)
+    llm_queue_max_depth: int = Field(default=32, env="LLM_QUEUE_MAX_DEPTH")  # waiting generations per API process
+    llm_queue_timeout: float = Field(default=30.0, env="LLM_QUEUE_TIMEOUT")  # max seconds waiting for a slot
+    llm_request_timeout: float = Field(default=60.0, env="LLM_REQUEST_TIMEOUT")
+    llm_backend_cooldown: float = Field(default=30.0, env="LLM_BACKEND_COOLDOWN")  # skip a backend after a connection error
+    
+    # Readiness (/ready): startup warm-up and dependency probes
+    readiness_warmup_rounds: int = Field(default=3, env="READINESS_WARMUP_ROUNDS")  # batched encodes after loading
+    readiness_warmup_batch_size: int = Field(default=32, env="READINESS_WARMUP_BATCH_SIZE")
+    readiness_retry_interval: float = Field(default=5.0, env="READINESS_RETRY_INTERVAL")  # seconds between warm-up attempts
+    readiness_probe_ttl: float = Field(default=5.0, env="READINESS_PROBE_TTL")  # probe results are reused this long
+    readiness_probe_timeout: float = Field(default=2.0, env="READINESS_PROBE_TIMEOUT")
+    readiness_require_llm: bool = Field(default=True, env="READINESS_REQUIRE_LLM")
+    
+    # Per-domain politeness (shared across workers through Redis)
+    domain_politeness_enabled: bool = Field(default=True, env="DOMAIN_POLITENESS_ENABLED")
+    domain_rate_limit: float = Field(default=1.0, env="DOMAIN_RATE_LIMIT")  # fetches/sec per domain
+    domain_burst: int = Field(default=3, env="DOMAIN_BURST")
+    domain_max_concurrency: int = Field(default=2, env="DOMAIN_MAX_CONCURRENCY")
+    domain_lease_ttl: int = Field(default=300, env="DOMAIN_LEASE_TTL")  # matches task_time_limit
+    domain_penalty_seconds: float = Field(default=60.0, env="DOMAIN_PENALTY_SECONDS")  # after 429 without Retry-After
+    domain_key_prefix: str = Field(default="polite:", env="DOMAIN_KEY_PREFIX")
+    
+    # Failing hosts: per-domain circuit breaker, retry back-off and dead letters
+    circuit_breaker_enabled: bool = Field(default=True, env="CIRCUIT_BREAKER_ENABLED")
+    circuit_failure_threshold: int = Field(default=5, env="CIRCUIT_FAILURE_THRESHOLD")  # consecutive failures
+    circuit_open_seconds: float = Field(default=60.0, env="CIRCUIT_OPEN_SECONDS")  # doubles on each re-trip
+    circuit_max_open_seconds: float = Field(default=1800.0, env="CIRCUIT_MAX_OPEN_SECONDS")
+    circuit_probe_ttl: int = Field(default=120, env="CIRCUIT_PROBE_TTL")  # half-open probe lease, > fetch timeouts
+    retry_max_attempts: int = Field(default=4, env="RETRY_MAX_ATTEMPTS")  # retries after the first try
+    retry_backoff_base: float = Field(default=30.0, env="RETRY_BACKOFF_BASE")  # seconds, doubles per attempt
+    retry_backoff_max: float = Field(default=1800.0, env="RETRY_BACKOFF_MAX")
+    dead_letter_key: str = Field(default="ingest:dead_letters", env="DEAD_LETTER_KEY")
+    dead_letter_max_length: int = Field(default=10000, env="DEAD_LETTER_MAX_LENGTH")
+    
+    # One in-flight task per URL: Redis lease claimed before enqueueing
+    ingest_lease_ttl: int = Field(default=900, env="INGEST_LEASE_TTL")  # extended on every deferral
+    ingest_lease_prefix: str = Field(default="ingest:lease:", env="INGEST_LEASE_PREFIX")
+    
+    # HTTP fetch limits (checked while streaming, before the body is buffered)
+    fetch_max_bytes: int = Field(default=10485760, env="FETCH_MAX_BYTES")  # 10 MiB
+    fetch_allowed_content_types: str = Field(
+        default="text/html,application/xhtml+xml,text/plain",
+        env="FETCH_ALLOWED_CONTENT_TYPES"
+    )
+    
+    # URL canonicalization and near-duplicate pages
+    url_canonicalize: bool = Field(default=True, env="URL_CANONICALIZE")
+    url_tracking_params: str = Field(
+        default="utm_*,gclid,fbclid,msclkid,dclid,mc_cid,mc_eid,_ga,_hsenc,_hsmi,igshid,ref_src",
+        env="URL_TRACKING_PARAMS"
+    )  # trailing * matches a prefix
+    near_duplicate_enabled: bool = Field(default=True, env="NEAR_DUPLICATE_ENABLED")
+    near_duplicate_max_distance: int = Field(default=3, env="NEAR_DUPLICATE_MAX_DISTANCE")  # SimHash bits, <= 3
+    
+    # Large documents are embedded by parallel sub-tasks of FANOUT_BATCH_SIZE chunks
+    fanout_min_chunks: int = Field(default=200, env="FANOUT_MIN_CHUNKS")  # 0 disables fan-out
+    fanout_batch_size: int = Field(default=64, env="FANOUT_BATCH_SIZE")
+    fanout_progress_ttl: int = Field(default=604800, env="FANOUT_PROGRESS_TTL")  # keep finished batches for a resume (7 days)
+    fanout_key_prefix: str = Field(default="fanout:", env="FANOUT_KEY_PREFIX")
+    
+    # Adaptive recrawl (intervals in seconds)
+    recrawl_enabled: bool = Field(default=True, env="RECRAWL_ENABLED")
+    recrawl_check_interval: int = Field(default=300, env="RECRAWL_CHECK_INTERVAL")  # beat period
+    recrawl_initial_interval: int = Field(default=86400, env="RECRAWL_INITIAL_INTERVAL")  # 1 day
+    recrawl_min_interval: int = Field(default=3600, env="RECRAWL_MIN_INTERVAL")  # 1 hour
+    recrawl_max_interval: int = Field(default=2592000, env="RECRAWL_MAX_INTERVAL")  # 30 days
+    recrawl_backoff_factor: float = Field(default=2.0, env="RECRAWL_BACKOFF_FACTOR")  # unchanged
+    recrawl_speedup_factor: float = Field(default=0.5, env="RECRAWL_SPEEDUP_FACTOR")  # changed
+    recrawl_batch_size: int = Field(default=200, env="RECRAWL_BATCH_SIZE")
+    recrawl_budget_per_hour: int = Field(default=1000, env="RECRAWL_BUDGET_PER_HOUR")
+    
+    # Ingestion status events (Redis pub/sub -> SSE)
+    status_events_channel: str = Field(default="ingest:events", env="STATUS_EVENTS_CHANNEL")
+    status_events_queue_size: int = Field(default=100, env="STATUS_EVENTS_QUEUE_SIZE")  # per watcher
+    status_events_heartbeat: float = Field(default=15.0, env="STATUS_EVENTS_HEARTBEAT")  # seconds
+    
+    # Status counters
+    status_reconcile_interval: int = Field(default=3600, env="STATUS_RECONCILE_INTERVAL")  # seconds
     
     # Text Processing
     chunk_size: int = Field(default=1000, env="CHUNK_SIZE")
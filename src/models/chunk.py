@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, LargeBinary, DateTime
+from datetime import datetime
+from src.database.connection import Base
+
+class ChunkText(Base):
+    """Chunk text kept outside Qdrant when slim payloads are enabled"""
+    __tablename__ = "chunk_texts"
+    
+    chunk_id = Column(String, primary_key=True)  # Qdrant point id (md5 of the text)
+    content = Column(LargeBinary, nullable=False)  # zlib-compressed UTF-8
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey
+from datetime import datetime
+from src.database.connection import Base
+
+class PageFingerprint(Base):
+    """SimHash of a page's extracted text, banded for LSH lookups of near duplicates"""
+    __tablename__ = "page_fingerprints"
+    
+    url_id = Column(Integer, ForeignKey("url_ingestions.id", ondelete="CASCADE"), primary_key=True)
+    simhash = Column(BigInteger, nullable=False)  # 64-bit fingerprint stored as signed
+    # 16-bit bands: fingerprints within 3 bits of each other share at least one
+    band_0 = Column(Integer, nullable=False, index=True)
+    band_1 = Column(Integer, nullable=False, index=True)
+    band_2 = Column(Integer, nullable=False, index=True)
+    band_3 = Column(Integer, nullable=False, index=True)
+    # Set when this page's chunks were not embedded because it duplicates another page
+    duplicate_of_id = Column(Integer, ForeignKey("url_ingestions.id", ondelete="SET NULL"), nullable=True, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
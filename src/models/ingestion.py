@@ -1,14 +1,82 @@
-from sqlalchemy import Column, String, DateTime, Text, Integer
+from collections import Counter
+from sqlalchemy import Column, String, DateTime, Text, Integer, Index, event, inspect, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, column_property
 from datetime import datetime
 from src.database.connection import Base
 
 class URLIngestion(Base):
     __tablename__ = "url_ingestions"
+    __table_args__ = (
+        # Keyset pagination of the listing endpoint filtered by status
+        Index("ix_url_ingestions_status_id", "status", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String, unique=True, index=True)
-    status = Column(String, default="pending")  # pending, processing, completed, failed
+    # active_history: the old value is loaded on assignment so transitions can be counted
+    status = column_property(Column(String, default="pending"), active_history=True)  # pending, processing, completed, failed
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     error_message = Column(Text, nullable=True)
     content_hash = Column(String, nullable=True)
+    
+    # Change history for adaptive recrawling
+    last_fetched_at = Column(DateTime, nullable=True)
+    next_fetch_at = Column(DateTime, nullable=True, index=True)
+    recrawl_interval = Column(Integer, nullable=True)  # seconds
+    fetch_count = Column(Integer, default=0)
+    change_count = Column(Integer, default=0)
+
+class IngestionStatusCount(Base):
+    """Number of url_ingestions rows per status, kept in step with every transition"""
+    __tablename__ = "ingestion_status_counts"
+    
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_DIALECTS = {"postgresql": postgresql, "sqlite": sqlite}
+
+@event.listens_for(Session, "before_flush")
+def _track_status_counts(session, flush_context, instances):
+    """Apply status transitions to ingestion_status_counts in the same transaction"""
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, URLIngestion):
+            deltas[obj.status or "pending"] += 1
+    for obj in session.dirty:
+        if isinstance(obj, URLIngestion):
+            history = inspect(obj).attrs.status.history
+            if history.added and history.deleted and history.added[0] != history.deleted[0]:
+                deltas[history.deleted[0]] -= 1
+                deltas[history.added[0]] += 1
+    for obj in session.deleted:
+        if isinstance(obj, URLIngestion):
+            deltas[obj.status] -= 1
+    
+    if not any(deltas.values()):
+        return
+    connection = session.connection()
+    upsert = _UPSERT_DIALECTS.get(connection.dialect.name)
+    # Rows are always locked in status order, so two transitions in opposite
+    # directions (pending->processing, processing->pending) can't deadlock
+    for status in sorted(s for s in deltas if s is not None):
+        delta = deltas[status]
+        if not delta:
+            continue
+        if upsert is not None:
+            # A status seen for the first time may be inserted by two transactions at once
+            insert = upsert.insert(IngestionStatusCount).values(status=status, count=delta)
+            connection.execute(insert.on_conflict_do_update(
+                index_elements=[IngestionStatusCount.status],
+                set_={"count": IngestionStatusCount.count + insert.excluded.count}
+            ))
+            continue
+        result = connection.execute(
+            update(IngestionStatusCount)
+            .where(IngestionStatusCount.status == status)
+            .values(count=IngestionStatusCount.count + delta)
+        )
+        if result.rowcount == 0:
+            connection.execute(IngestionStatusCount.__table__.insert().values(status=status, count=delta))
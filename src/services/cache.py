@@ -1,13 +1,15 @@
-import redis
 import json
 import hashlib
 from typing import List, Optional, Any, Dict
 from src.config.settings import settings
+from src.services.redis_client import get_redis, get_async_redis
+from src.services.vector_versions import model_slug
 
-class CacheService:
-    def __init__(self):
-        self.redis_client = redis.from_url(settings.redis_url, decode_responses=True)
-        self.embedding_prefix = settings.embedding_cache_prefix
+class _CacheKeys:
+    """Key layout shared by the sync and async cache services"""
+    def __init__(self, model_name: Optional[str] = None):
+        # Embeddings are namespaced per model: emb:<model-slug>:<text sha256>
+        self.embedding_prefix = f"{settings.embedding_cache_prefix}{model_slug(model_name or settings.embedding_model)}:"
         self.embedding_ttl = settings.embedding_cache_ttl
         self.content_prefix = settings.content_cache_prefix
         self.content_ttl = settings.content_cache_ttl
@@ -20,6 +22,21 @@ class CacheService:
         """Generate cache key for URL"""
         return f"{self.content_prefix}{hashlib.md5(url.encode()).hexdigest()}"
     
+    def _serialize_content(self, url: str, content: str, content_hash: str,
+                           raw_hash: Optional[str] = None) -> str:
+        return json.dumps({
+            "content": content,
+            "content_hash": content_hash,
+            "raw_hash": raw_hash,  # sha256 of the fetched body, when fetched over HTTP
+            "url": url
+        })
+
+class CacheService(_CacheKeys):
+    def __init__(self, model_name: Optional[str] = None):
+        super().__init__(model_name)
+        # Shared process-wide pool; constructing a CacheService is cheap
+        self.redis_client = get_redis()
+    
     # Embedding cache methods
     def get_embedding(self, text: str) -> Optional[List[float]]:
         """Get cached embedding for text"""
@@ -53,7 +70,7 @@ class CacheService:
     def set_embeddings_batch(self, texts: List[str], embeddings: List[List[float]]) -> bool:
         """Cache embeddings for multiple texts"""
         try:
-            pipe = self.redis_client.pipeline()
+            pipe = self.redis_client.pipeline(transaction=False)
             for text, embedding in zip(texts, embeddings):
                 key = f"{self.embedding_prefix}{self._get_text_hash(text)}"
                 pipe.setex(key, self.embedding_ttl, json.dumps(embedding))
@@ -78,16 +95,24 @@ class CacheService:
         """Cache content for URL with hash"""
         try:
             key = self._get_url_key(url)
-            cache_data = {
-                "content": content,
-                "content_hash": content_hash,
-                "url": url
-            }
-            self.redis_client.setex(key, self.content_ttl, json.dumps(cache_data))
+            self.redis_client.setex(key, self.content_ttl, self._serialize_content(url, content, content_hash))
             return True
         except Exception:
             return False
     
+    def swap_content(self, url: str, content: str, content_hash: str,
+                     raw_hash: Optional[str] = None) -> Optional[str]:
+        """Cache content for URL and return the previously cached hash, in one round trip"""
+        try:
+            key = self._get_url_key(url)
+            pipe = self.redis_client.pipeline()
+            pipe.get(key)
+            pipe.setex(key, self.content_ttl, self._serialize_content(url, content, content_hash, raw_hash))
+            previous, _ = pipe.execute()
+            return json.loads(previous)["content_hash"] if previous else None
+        except Exception:
+            return None
+    
     def get_content_hash(self, url: str) -> Optional[str]:
         """Get cached content hash for URL"""
         cached_data = self.get_content(url)
@@ -101,3 +126,24 @@ class CacheService:
             return True
         except Exception:
             return False
+
+class AsyncCacheService(_CacheKeys):
+    """Non-blocking cache access for the API event loop"""
+    def __init__(self):
+        super().__init__()
+        self.redis_client = get_async_redis()
+    
+    async def get_content(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get cached content for URL"""
+        try:
+            cached = await self.redis_client.get(self._get_url_key(url))
+            if cached:
+                return json.loads(cached)
+            return None
+        except Exception:
+            return None
+    
+    async def get_content_hash(self, url: str) -> Optional[str]:
+        """Get cached content hash for URL"""
+        cached_data = await self.get_content(url)
+        return cached_data["content_hash"] if cached_data else None
@@ -0,0 +1,43 @@
+import zlib
+from typing import Dict, Iterable
+from sqlalchemy.dialects import postgresql, sqlite
+from src.database.connection import SessionLocal
+from src.models.chunk import ChunkText
+
+# zlib level 6 is the usual size/speed balance; chunks are ~1KB of prose
+_COMPRESSION_LEVEL = 6
+
+def _insert_ignore(dialect_name: str):
+    dialect = sqlite if dialect_name == "sqlite" else postgresql
+    return dialect.insert(ChunkText.__table__)
+
+def save_chunks(chunks: Dict[str, str]):
+    """Store chunk texts keyed by point id; ids already stored are left alone.
+
+    Ids are content hashes, so an existing row always holds the same text.
+    """
+    if not chunks:
+        return
+    rows = [
+        {"chunk_id": chunk_id, "content": zlib.compress(text.encode("utf-8"), _COMPRESSION_LEVEL)}
+        for chunk_id, text in chunks.items()
+    ]
+    db = SessionLocal()
+    try:
+        stmt = _insert_ignore(db.get_bind().dialect.name).on_conflict_do_nothing(index_elements=["chunk_id"])
+        db.execute(stmt, rows)
+        db.commit()
+    finally:
+        db.close()
+
+def load_chunks(chunk_ids: Iterable[str]) -> Dict[str, str]:
+    """Fetch and decompress chunk texts in one query"""
+    chunk_ids = list(set(chunk_ids))
+    if not chunk_ids:
+        return {}
+    db = SessionLocal()
+    try:
+        rows = db.query(ChunkText.chunk_id, ChunkText.content).filter(ChunkText.chunk_id.in_(chunk_ids)).all()
+    finally:
+        db.close()
+    return {chunk_id: zlib.decompress(content).decode("utf-8") for chunk_id, content in rows}
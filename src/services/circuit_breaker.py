@@ -0,0 +1,124 @@
+import time
+from src.config.settings import settings
+from src.services.redis_client import get_redis
+
+# Breaker state per domain lives in one hash: state (closed/open/half_open),
+# failures (consecutive), trips (opens since the last success), until (ms:
+# end of the open period, or of the half-open probe's lease) and probe (the
+# task holding that lease). No hash means closed.
+
+# KEYS[1] = breaker hash; ARGV = now_ms, task_id, probe_ttl_ms
+# Returns 0 when the task may fetch, otherwise the suggested wait in ms.
+_CHECK_SCRIPT = """
+local state = redis.call('HGET', KEYS[1], 'state')
+if not state or state == 'closed' then
+    return 0
+end
+local now = tonumber(ARGV[1])
+local until_ms = tonumber(redis.call('HGET', KEYS[1], 'until')) or 0
+if state == 'open' then
+    if now < until_ms then
+        return until_ms - now
+    end
+    -- Cool-down over: this task becomes the single half-open probe
+    redis.call('HSET', KEYS[1], 'state', 'half_open', 'probe', ARGV[2], 'until', now + tonumber(ARGV[3]))
+    return 0
+end
+if redis.call('HGET', KEYS[1], 'probe') == ARGV[2] then
+    return 0
+end
+if now >= until_ms then
+    -- The previous probe never reported back (worker died); take over its lease
+    redis.call('HSET', KEYS[1], 'probe', ARGV[2], 'until', now + tonumber(ARGV[3]))
+    return 0
+end
+return until_ms - now
+"""
+
+# KEYS[1] = breaker hash; ARGV = now_ms, threshold, open_ms, max_open_ms
+# Returns the open period in ms if this failure tripped the breaker, else 0.
+_FAILURE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local max_open = tonumber(ARGV[4])
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+local state = redis.call('HGET', KEYS[1], 'state')
+local opened = 0
+if state == 'half_open' or (state ~= 'open' and failures >= tonumber(ARGV[2])) then
+    -- Each re-trip without a success in between doubles the open period
+    local trips = redis.call('HINCRBY', KEYS[1], 'trips', 1)
+    opened = math.min(max_open, tonumber(ARGV[3]) * 2 ^ (trips - 1))
+    redis.call('HSET', KEYS[1], 'state', 'open', 'until', now + opened)
+    redis.call('HDEL', KEYS[1], 'probe')
+end
+redis.call('PEXPIRE', KEYS[1], max_open + 3600000)
+return opened
+"""
+
+# KEYS[1] = breaker hash. A success reported while the breaker is open comes
+# from a fetch that started before it tripped, so it doesn't close it.
+_SUCCESS_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'state') ~= 'open' then
+    redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+class DomainCircuitBreaker:
+    """Per-domain circuit breaker shared by all workers via Redis.
+
+    CIRCUIT_FAILURE_THRESHOLD consecutive host failures open the breaker for
+    CIRCUIT_OPEN_SECONDS (doubling on every re-trip, up to
+    CIRCUIT_MAX_OPEN_SECONDS). While open, check() returns the seconds left so
+    the task can defer itself. After that one task is let through as a
+    half-open probe: its success closes the breaker, its failure opens it again.
+    """
+    def __init__(self):
+        self.redis_client = get_redis()
+        self.prefix = settings.domain_key_prefix
+        self._check = self.redis_client.register_script(_CHECK_SCRIPT)
+        self._failure = self.redis_client.register_script(_FAILURE_SCRIPT)
+        self._success = self.redis_client.register_script(_SUCCESS_SCRIPT)
+
+    def _key(self, domain: str) -> str:
+        return f"{self.prefix}circuit:{domain}"
+
+    def check(self, domain: str, task_id: str) -> float:
+        """0 if the task may fetch from the domain, else seconds to wait"""
+        try:
+            wait_ms = self._check(
+                keys=[self._key(domain)],
+                args=[int(time.time() * 1000), task_id, settings.circuit_probe_ttl * 1000]
+            )
+            return int(wait_ms) / 1000.0
+        except Exception:
+            # Fail open, like the politeness limiter
+            return 0.0
+
+    def record_failure(self, domain: str) -> float:
+        """Count a host failure; returns the open period in seconds if the breaker tripped"""
+        try:
+            opened_ms = self._failure(
+                keys=[self._key(domain)],
+                args=[int(time.time() * 1000), settings.circuit_failure_threshold,
+                      int(settings.circuit_open_seconds * 1000), int(settings.circuit_max_open_seconds * 1000)]
+            )
+            return int(opened_ms) / 1000.0
+        except Exception:
+            return 0.0
+
+    def record_success(self, domain: str):
+        """The host answered: reset the failure count and close a half-open breaker"""
+        try:
+            self._success(keys=[self._key(domain)])
+        except Exception:
+            pass
+
+    def state(self, domain: str) -> dict:
+        try:
+            return self.redis_client.hgetall(self._key(domain)) or {"state": "closed"}
+        except Exception:
+            return {"state": "unknown"}
+
+def retry_delay(attempt: int) -> float:
+    """Back-off before retry number `attempt` (1-based), before jitter"""
+    return min(settings.retry_backoff_max, settings.retry_backoff_base * 2 ** (attempt - 1))
@@ -0,0 +1,53 @@
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from src.config.settings import settings
+from src.services.redis_client import get_redis, get_async_redis
+
+# URLs that failed for good (permanent error, or retries exhausted), newest
+# first, as JSON entries in one capped Redis list (settings.dead_letter_key).
+
+def push_dead_letter(url: str, error: str, attempts: int, lane: Optional[str] = None,
+                     batch_id: Optional[str] = None) -> bool:
+    entry = {
+        "url": url,
+        "error": error,
+        "attempts": attempts,
+        "lane": lane,
+        "batch_id": batch_id,
+        "failed_at": time.time(),
+    }
+    try:
+        pipe = get_redis().pipeline()
+        pipe.lpush(settings.dead_letter_key, json.dumps(entry))
+        pipe.ltrim(settings.dead_letter_key, 0, settings.dead_letter_max_length - 1)
+        pipe.execute()
+        return True
+    except Exception:
+        return False
+
+def list_dead_letters(limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+    entries = get_redis().lrange(settings.dead_letter_key, offset, offset + limit - 1)
+    return [json.loads(entry) for entry in entries]
+
+def count_dead_letters() -> int:
+    return get_redis().llen(settings.dead_letter_key)
+
+async def read_dead_letters_async(limit: int = 100, offset: int = 0) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+    """(total, page of entries) for the API in one round trip; None if Redis is unreachable"""
+    try:
+        pipe = get_async_redis().pipeline()
+        pipe.llen(settings.dead_letter_key)
+        pipe.lrange(settings.dead_letter_key, offset, offset + limit - 1)
+        total, entries = await pipe.execute()
+    except Exception:
+        return None
+    return total, [json.loads(entry) for entry in entries]
+
+def pop_dead_letters(limit: int) -> List[Dict[str, Any]]:
+    """Remove and return up to `limit` of the oldest entries"""
+    pipe = get_redis().pipeline()
+    pipe.lrange(settings.dead_letter_key, -limit, -1)
+    pipe.ltrim(settings.dead_letter_key, 0, -limit - 1)
+    entries, _ = pipe.execute()
+    return [json.loads(entry) for entry in reversed(entries)]
@@ -1,32 +1,89 @@
-from sentence_transformers import SentenceTransformer
-from typing import List
+import threading
+from typing import Any, Callable, Dict, List, Optional
 from src.config.settings import settings
 from src.services.cache import CacheService
+from src.services.metrics import track_stage, count_items, record_cache
+
+_models: Dict[str, Any] = {}
+_models_lock = threading.Lock()
+
+def _create_model(model_name: str):
+    # sentence-transformers imports torch (seconds); only processes that embed pay for it
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+def _load_model(model_name: str):
+    """Load each model once per process (two are resident during a migration)"""
+    with _models_lock:
+        if model_name not in _models:
+            _models[model_name] = _create_model(model_name)
+        return _models[model_name]
 
 class EmbeddingService:
-    def __init__(self):
-        self.model = SentenceTransformer(settings.embedding_model)
-        self.cache = CacheService()
+    def __init__(self, model_name: Optional[str] = None):
+        self.model_name = model_name or settings.embedding_model
+        self.model = _load_model(self.model_name)
+        # Cache keys are namespaced by model so a switch never serves stale vectors
+        self.cache = CacheService(self.model_name)
+    
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+    
+    def warm_up(self, rounds: int, batch_size: int):
+        """Run throwaway encodes so the first real request doesn't pay for lazy init.
+
+        The first torch inference allocates buffers and picks kernels; a
+        single query and then full batches of chunk-sized texts cover the
+        shapes the query and batch paths use. Nothing is cached.
+        """
+        with track_stage("embedding_warmup", rounds=rounds, batch_size=batch_size):
+            self.model.encode("warm-up query")
+            for round_number in range(rounds):
+                words = max(1, settings.chunk_size // 6) * (round_number + 1) // rounds
+                self.model.encode([f"warm-up passage {i} " + "lorem " * words for i in range(batch_size)])
     
     def embed_text(self, text: str) -> List[float]:
         """Generate embeddings for text with caching"""
         # Try cache first
-        cached_embedding = self.cache.get_embedding(text)
+        with track_stage("embedding_cache_lookup"):
+            cached_embedding = self.cache.get_embedding(text)
+            record_cache("embedding", hits=1 if cached_embedding else 0, misses=0 if cached_embedding else 1)
         if cached_embedding:
             return cached_embedding
         
         # Generate embedding
-        embedding = self.model.encode(text).tolist()
+        with track_stage("embed_model", text_chars=len(text)):
+            embedding = self.model.encode(text).tolist()
+            count_items("embed_model", 1)
         
         # Cache the result
         self.cache.set_embedding(text, embedding)
         
         return embedding
     
-    def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts with caching"""
+    def embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Encode without touching the cache (bulk re-embedding would only flood it)"""
+        with track_stage("embed_model"):
+            embeddings = self.model.encode(texts).tolist()
+            count_items("embed_model", len(texts))
+        return embeddings
+    
+    def embed_batch(self, texts: List[str],
+                    stored: Optional[Callable[[List[str]], List[Optional[List[float]]]]] = None) -> List[List[float]]:
+        """Generate embeddings for multiple texts with caching.
+
+        `stored` is consulted for cache misses before the model runs: it maps
+        texts to vectors already persisted elsewhere (None where absent).
+        Vectors it returns are written back to the cache.
+        """
+        with track_stage("embed_batch"):
+            return self._embed_batch(texts, stored)
+    
+    def _embed_batch(self, texts: List[str], stored=None) -> List[List[float]]:
         # Check cache for all texts
-        cached_embeddings = self.cache.get_embeddings_batch(texts)
+        with track_stage("embedding_cache_lookup"):
+            cached_embeddings = self.cache.get_embeddings_batch(texts)
         
         # Identify texts that need embedding
         texts_to_embed = []
@@ -37,9 +94,18 @@ class EmbeddingService:
                 texts_to_embed.append(text)
                 indices_to_embed.append(i)
         
+        record_cache("embedding", hits=len(texts) - len(texts_to_embed), misses=len(texts_to_embed))
+        
+        if texts_to_embed and stored is not None:
+            texts_to_embed, indices_to_embed = self._recover_stored(
+                texts_to_embed, indices_to_embed, cached_embeddings, stored
+            )
+        
         # Generate embeddings for uncached texts
         if texts_to_embed:
-            new_embeddings = self.model.encode(texts_to_embed).tolist()
+            with track_stage("embed_model"):
+                new_embeddings = self.model.encode(texts_to_embed).tolist()
+                count_items("embed_model", len(texts_to_embed))
             
             # Cache new embeddings
             self.cache.set_embeddings_batch(texts_to_embed, new_embeddings)
@@ -49,3 +115,17 @@ class EmbeddingService:
                 cached_embeddings[idx] = embedding
         
         return cached_embeddings
+    
+    def _recover_stored(self, texts: List[str], indices: List[int], results: List, stored):
+        """Fill results from `stored` where it has a vector; returns what still needs the model"""
+        with track_stage("embedding_store_lookup", texts=len(texts)):
+            vectors = stored(texts)
+        recovered = [(text, index, vector) for text, index, vector in zip(texts, indices, vectors) if vector is not None]
+        record_cache("embedding_store", hits=len(recovered), misses=len(texts) - len(recovered))
+        if not recovered:
+            return texts, indices
+        for _, index, vector in recovered:
+            results[index] = vector
+        self.cache.set_embeddings_batch([text for text, _, _ in recovered], [vector for _, _, vector in recovered])
+        remaining = [(text, index) for text, index, vector in zip(texts, indices, vectors) if vector is None]
+        return [text for text, _ in remaining], [index for _, index in remaining]
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set
+from src.config.settings import settings
+from src.services.redis_client import get_redis, get_async_redis
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+# The pubsub polls in short reads instead of blocking in listen(): an idle
+# channel would otherwise hit the pool's socket_timeout and look like an outage
+_POLL_SECONDS = 1.0
+# How long a new watcher waits for the hub's SUBSCRIBE to be confirmed
+_SUBSCRIBE_WAIT_SECONDS = 5.0
+
+def _build_event(url_id: Optional[int], url: str, status: str,
+                 batch_id: Optional[str] = None, **extra) -> str:
+    event = {"url_id": url_id, "url": url, "status": status, "ts": time.time()}
+    if batch_id:
+        event["batch_id"] = batch_id
+    event.update({k: v for k, v in extra.items() if v is not None})
+    return json.dumps(event)
+
+def publish_status(url_id: Optional[int], url: str, status: str,
+                   batch_id: Optional[str] = None, **extra) -> bool:
+    """Announce an ingestion status transition (one PUBLISH, best effort)"""
+    try:
+        get_redis().publish(settings.status_events_channel, _build_event(url_id, url, status, batch_id, **extra))
+        return True
+    except Exception:
+        return False
+
+async def publish_status_async(url_id: Optional[int], url: str, status: str,
+                               batch_id: Optional[str] = None, **extra) -> bool:
+    """publish_status for the API event loop"""
+    try:
+        await get_async_redis().publish(
+            settings.status_events_channel, _build_event(url_id, url, status, batch_id, **extra)
+        )
+        return True
+    except Exception:
+        return False
+
+def _offer(queue: asyncio.Queue, event: Dict) -> None:
+    """Queue an event for a watcher whose queue may be full.
+
+    A slow consumer misses progress events (it will see the next
+    transition), but a completed/failed event ends a URL's stream, so room
+    is made for it by dropping the oldest progress event still queued.
+    """
+    try:
+        queue.put_nowait(event)
+        return
+    except asyncio.QueueFull:
+        if event.get("status") not in TERMINAL_STATUSES:
+            return
+    queued = [queue.get_nowait() for _ in range(queue.qsize())]
+    dropped = next((index for index, old in enumerate(queued) if old.get("status") not in TERMINAL_STATUSES), 0)
+    del queued[dropped]
+    for old in queued + [event]:
+        queue.put_nowait(old)
+
+class StatusEventHub:
+    """Fans the status channel out to in-process watchers.
+
+    Each API process holds a single Redis subscription no matter how many
+    SSE clients are connected; watchers are just asyncio queues keyed by
+    topic ("all", "url:<id>", "batch:<id>").
+    """
+    def __init__(self):
+        self._watchers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed = asyncio.Event()
+
+    @property
+    def watcher_count(self) -> int:
+        return sum(len(queues) for queues in self._watchers.values())
+
+    def _ensure_listening(self):
+        if self._listener is None or self._listener.done():
+            self._subscribed = asyncio.Event()
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            pubsub = get_async_redis().pubsub()
+            try:
+                await pubsub.subscribe(settings.status_events_channel)
+                while True:
+                    # Returns None when nothing arrived within the timeout
+                    message = await pubsub.get_message(timeout=_POLL_SECONDS)
+                    if message is None:
+                        continue
+                    if message["type"] == "subscribe":
+                        self._subscribed.set()
+                    elif message["type"] == "message":
+                        self._dispatch(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(1.0)  # Redis went away; resubscribe
+            finally:
+                self._subscribed.clear()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def _dispatch(self, data: str):
+        try:
+            event = json.loads(data)
+        except ValueError:
+            return
+        topics = ["all", f"url:{event.get('url_id')}"]
+        if event.get("batch_id"):
+            topics.append(f"batch:{event['batch_id']}")
+        for topic in topics:
+            for queue in list(self._watchers.get(topic, ())):
+                _offer(queue, event)
+
+    @asynccontextmanager
+    async def watch(self, topic: str):
+        """Yield a queue receiving every event for the topic.
+
+        Only yields once the hub's subscription is confirmed, so anything read
+        inside the block (e.g. a status snapshot) can't miss a later event.
+        Gives up waiting after a few seconds if Redis is unreachable.
+        """
+        self._ensure_listening()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.status_events_queue_size)
+        self._watchers[topic].add(queue)
+        try:
+            try:
+                await asyncio.wait_for(self._subscribed.wait(), timeout=_SUBSCRIBE_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                pass  # best effort, like publishing
+            yield queue
+        finally:
+            self._watchers[topic].discard(queue)
+            if not self._watchers[topic]:
+                del self._watchers[topic]
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+# One hub per API process
+status_hub = StatusEventHub()
@@ -0,0 +1,30 @@
+from typing import Set
+from src.config.settings import settings
+from src.services.redis_client import get_redis
+
+class DocumentProgress:
+    """Which embedding batches of a fanned-out document are already stored.
+
+    Keyed by URL id and content hash: re-ingesting the same content after a
+    partial failure skips the batches recorded here, while changed content
+    starts from scratch. Chunking is deterministic, so batch numbers line up
+    between runs.
+    """
+    def __init__(self, url_id: int, content_hash: str):
+        self.redis_client = get_redis()
+        self.key = f"{settings.fanout_key_prefix}{url_id}:{content_hash}"
+
+    def completed(self) -> Set[int]:
+        return {int(index) for index in self.redis_client.smembers(self.key)}
+
+    def is_done(self, batch_index: int) -> bool:
+        return bool(self.redis_client.sismember(self.key, batch_index))
+
+    def mark_done(self, batch_index: int):
+        pipe = self.redis_client.pipeline()
+        pipe.sadd(self.key, batch_index)
+        pipe.expire(self.key, settings.fanout_progress_ttl)
+        pipe.execute()
+
+    def clear(self):
+        self.redis_client.delete(self.key)
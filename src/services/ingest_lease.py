@@ -0,0 +1,118 @@
+import hashlib
+from typing import Optional
+from src.config.settings import settings
+from src.services.redis_client import get_redis, get_async_redis
+from src.services.metrics import count_items
+
+# One lease per (canonical) URL while it has a task in flight:
+#   {settings.ingest_lease_prefix}<sha1(url)> -> id of the task that owns it
+# Claimed with SET NX before enqueueing, handed on when the task re-queues
+# itself (deferral, retry, fan-out) and released when it reaches a final state.
+# A crashed worker's lease simply expires.
+
+# KEYS[1] = lease; ARGV = current holder, new holder, ttl_ms, take_missing.
+# With take_missing = "1", also takes a lease that has expired or was never
+# claimed (tasks queued before leases existed).
+_HAND_OVER_SCRIPT = """
+local holder = redis.call('GET', KEYS[1])
+if holder then
+    if holder ~= ARGV[1] then
+        return 0
+    end
+elseif ARGV[4] ~= '1' then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[3])
+return 1
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def _key(url: str) -> str:
+    return f"{settings.ingest_lease_prefix}{hashlib.sha1(url.encode()).hexdigest()}"
+
+def _duplicates_key() -> str:
+    return f"{settings.ingest_lease_prefix}duplicates"
+
+class IngestLease:
+    """Worker-side (sync) operations on a URL's in-flight lease"""
+    def __init__(self):
+        self.redis_client = get_redis()
+        self._hand_over = self.redis_client.register_script(_HAND_OVER_SCRIPT)
+        self._release = self.redis_client.register_script(_RELEASE_SCRIPT)
+
+    def claim(self, url: str, task_id: str) -> Optional[str]:
+        """Take the lease for task_id; returns None if taken, else the task already holding it"""
+        try:
+            if self.redis_client.set(_key(url), task_id, nx=True, ex=settings.ingest_lease_ttl):
+                return None
+            holder = self.redis_client.get(_key(url))
+        except Exception:
+            # Fail open: a Redis hiccup means a possible duplicate, not a lost URL
+            return None
+        if holder is None:
+            return self.claim(url, task_id)  # released in between
+        record_duplicate()
+        return holder
+
+    def hand_over(self, url: str, task_id: str, new_task_id: str, ttl: float, take_missing: bool = True) -> bool:
+        """Pass the lease to the task that continues this one, for ttl seconds"""
+        try:
+            return bool(self._hand_over(
+                keys=[_key(url)], args=[task_id, new_task_id, int(ttl * 1000), "1" if take_missing else "0"]
+            ))
+        except Exception:
+            return False
+
+    def release(self, url: str, task_id: Optional[str] = None):
+        """Drop the lease if task_id holds it (unconditionally without one)"""
+        try:
+            if task_id is None:
+                self.redis_client.delete(_key(url))
+            else:
+                self._release(keys=[_key(url)], args=[task_id])
+        except Exception:
+            pass
+
+def record_duplicate():
+    count_items("ingest_duplicate", 1)
+    try:
+        get_redis().incr(_duplicates_key())
+    except Exception:
+        pass
+
+async def claim_async(url: str, task_id: str) -> Optional[str]:
+    """API-side claim(): None if task_id now holds the lease, else the in-flight task's id"""
+    client = get_async_redis()
+    try:
+        if await client.set(_key(url), task_id, nx=True, ex=settings.ingest_lease_ttl):
+            return None
+        holder = await client.get(_key(url))
+    except Exception:
+        return None
+    if holder is None:
+        return await claim_async(url, task_id)
+    count_items("ingest_duplicate", 1)
+    try:
+        await client.incr(_duplicates_key())
+    except Exception:
+        pass
+    return holder
+
+async def release_async(url: str, task_id: str):
+    """Give back a lease claimed for a submission that ended up not being queued"""
+    try:
+        await get_async_redis().eval(_RELEASE_SCRIPT, 1, _key(url), task_id)
+    except Exception:
+        pass
+
+async def get_duplicate_count() -> int:
+    try:
+        return int(await get_async_redis().get(_duplicates_key()) or 0)
+    except Exception:
+        return 0
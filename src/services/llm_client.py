@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import httpx
+from src.config.settings import settings
+from src.services.metrics import track_stage, count_items, record_error
+from src.services.tracing import annotate
+
+class LLMOverloaded(Exception):
+    """The generation queue is full, or a request waited too long for a slot"""
+
+class LLMUnavailable(Exception):
+    """Ollama answered with an error status"""
+
+class OllamaBackend:
+    def __init__(self, base_url: str, max_concurrency: int):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.unhealthy_until = 0.0  # skipped for routing until then, after a connection failure
+
+    @property
+    def load(self) -> float:
+        return self.in_flight / self.max_concurrency
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "healthy": time.monotonic() >= self.unhealthy_until,
+        }
+
+def configured_base_urls() -> List[str]:
+    urls = [url.strip() for url in settings.ollama_base_urls.split(",") if url.strip()]
+    return urls or [settings.ollama_base_url]
+
+class LLMClient:
+    """Process-wide Ollama client.
+
+    - One pooled httpx client for all requests.
+    - At most LLM_MAX_CONCURRENCY generations per backend. Up to
+      LLM_QUEUE_MAX_DEPTH more wait (FIFO) for a slot. Beyond that, or after
+      LLM_QUEUE_TIMEOUT seconds of waiting, LLMOverloaded is raised right away
+      rather than letting every request run into the HTTP timeout.
+    - Identical in-flight requests (same model and prompt) share one upstream
+      generation.
+    - With several OLLAMA_BASE_URLS, each generation goes to the least-loaded
+      healthy backend.
+    """
+    def __init__(self, base_urls: List[str]):
+        self.base_urls = list(base_urls)
+        self.backends = [OllamaBackend(url, settings.llm_max_concurrency) for url in self.base_urls]
+        self.http = httpx.AsyncClient(
+            timeout=settings.llm_request_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_concurrency * len(self.backends) + 8,
+                max_keepalive_connections=settings.llm_max_concurrency * len(self.backends)
+            )
+        )
+        self.waiting = 0
+        self._slots = asyncio.Condition()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _free_backend(self) -> Optional[OllamaBackend]:
+        free = [b for b in self.backends if b.in_flight < b.max_concurrency]
+        if not free:
+            return None
+        now = time.monotonic()
+        # Prefer healthy backends; if all are marked unhealthy, try anyway
+        healthy = [b for b in free if now >= b.unhealthy_until]
+        return min(healthy or free, key=lambda b: b.load)
+
+    async def _acquire(self) -> OllamaBackend:
+        async with self._slots:
+            backend = self._free_backend()
+            if backend is None:
+                if self.waiting >= settings.llm_queue_max_depth:
+                    record_error("llm_admission")
+                    raise LLMOverloaded(f"{self.waiting} generations already queued")
+                self.waiting += 1
+                try:
+                    with track_stage("llm_queue_wait", queued=self.waiting):
+                        await asyncio.wait_for(
+                            self._slots.wait_for(lambda: self._free_backend() is not None),
+                            settings.llm_queue_timeout
+                        )
+                except asyncio.TimeoutError:
+                    record_error("llm_admission")
+                    raise LLMOverloaded(f"No generation slot within {settings.llm_queue_timeout}s")
+                finally:
+                    self.waiting -= 1
+                backend = self._free_backend()
+            backend.in_flight += 1
+            return backend
+
+    async def _release(self, backend: OllamaBackend):
+        async with self._slots:
+            backend.in_flight -= 1
+            # Waiters re-check in FIFO order; the first one takes the slot
+            self._slots.notify_all()
+
+    async def _run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        backend = await self._acquire()
+        try:
+            with track_stage("llm_generate", backend=backend.base_url):
+                try:
+                    response = await self.http.post(f"{backend.base_url}/api/generate", json=payload)
+                except (httpx.ConnectError, httpx.ConnectTimeout):
+                    # Refused or unreachable; a slow generation (ReadTimeout) says nothing about health
+                    backend.unhealthy_until = time.monotonic() + settings.llm_backend_cooldown
+                    raise
+                annotate(status_code=response.status_code, response_bytes=len(response.content))
+            if response.status_code != 200:
+                record_error("llm_generate")
+                raise LLMUnavailable(f"Ollama returned {response.status_code}")
+            return response.json()
+        finally:
+            await self._release(backend)
+
+    async def generate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST /api/generate through admission control, coalescing identical requests"""
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        shared = self._inflight.get(key)
+        if shared is None:
+            shared = asyncio.ensure_future(self._run(payload))
+            self._inflight[key] = shared
+            shared.add_done_callback(lambda future: self._finished(key, future))
+        else:
+            count_items("llm_coalesced", 1)
+        # A caller that disconnects must not cancel the generation others are waiting on
+        return await asyncio.shield(shared)
+
+    def _finished(self, key: str, future: asyncio.Future):
+        self._inflight.pop(key, None)
+        if not future.cancelled():
+            future.exception()  # retrieved here in case every caller gave up waiting
+
+    async def each_backend(self, request: Callable[[httpx.AsyncClient, str], Awaitable[Any]]) -> List[Any]:
+        """Run a small control request (tags, ps, preload) against every backend"""
+        results = await asyncio.gather(
+            *(request(self.http, backend.base_url) for backend in self.backends),
+            return_exceptions=True
+        )
+        return [None if isinstance(result, Exception) else result for result in results]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": self.waiting, "coalescing": len(self._inflight),
+                "backends": [backend.describe() for backend in self.backends]}
+
+# One client per event loop: httpx connections and asyncio primitives are loop-bound
+_client: Optional[Tuple[asyncio.AbstractEventLoop, LLMClient]] = None
+_closing: Set[asyncio.Task] = set()
+
+def _close_replaced(owner: asyncio.AbstractEventLoop, client: LLMClient):
+    """Close a replaced client's connection pool on the loop its connections belong to"""
+    if owner is asyncio.get_running_loop():
+        task = owner.create_task(client.http.aclose())
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+    elif owner.is_running():
+        asyncio.run_coroutine_threadsafe(client.http.aclose(), owner)
+    # A closed loop can no longer close its transports; they go with the loop
+
+def get_llm_client() -> LLMClient:
+    global _client
+    loop = asyncio.get_running_loop()
+    if _client is None or _client[0] is not loop or _client[1].base_urls != configured_base_urls():
+        if _client is not None:
+            _close_replaced(*_client)
+        _client = (loop, LLMClient(configured_base_urls()))
+    return _client[1]
+
+async def close_llm_client():
+    global _client
+    if _client is not None:
+        await _client[1].http.aclose()
+        _client = None
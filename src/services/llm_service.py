@@ -1,22 +1,24 @@
-import httpx
 from typing import List, Dict, Any
 from src.config.settings import settings
+from src.services.llm_client import get_llm_client, LLMOverloaded, LLMUnavailable
+from src.services.metrics import track_stage
+from src.services.tracing import annotate
 
 class LLMService:
     def __init__(self):
-        self.base_url = settings.ollama_base_url
         self.model = settings.llm_model
     
     async def generate_answer(self, query: str, context_chunks: List[Dict[str, Any]]) -> str:
-        """Generate answer using retrieved context"""
+        """Generate answer using retrieved context (raises LLMOverloaded when the queue is full)"""
         
-        # Prepare context
-        context = "\n\n".join([
-            f"Source: {chunk['url']}\nContent: {chunk['content']}"
-            for chunk in context_chunks
-        ])
-        
-        prompt = f"""Based on the following context, answer the question. If the answer cannot be found in the context, say "I don't have enough information to answer this question."
+        with track_stage("llm_prompt_build"):
+            # Prepare context
+            context = "\n\n".join([
+                f"Source: {chunk['url']}\nContent: {chunk['content']}"
+                for chunk in context_chunks
+            ])
+            
+            prompt = f"""Based on the following context, answer the question. If the answer cannot be found in the context, say "I don't have enough information to answer this question."
 
 Context:
 {context}
@@ -24,35 +26,51 @@ Context:
 Question: {query}
 
 Answer:"""
+            annotate(context_chunks=len(context_chunks), prompt_chars=len(prompt))
         
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/generate",
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "stream": False
-                    }
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return result.get("response", "Sorry, I couldn't generate an answer.")
-                else:
-                    return "Sorry, the language model is not available."
-                    
+            # Pooled, admission-controlled and coalesced (see llm_client.py)
+            result = await get_llm_client().generate({
+                "model": self.model,
+                "prompt": prompt,
+                "stream": False,
+                "keep_alive": settings.ollama_keep_alive
+            })
+            return result.get("response", "Sorry, I couldn't generate an answer.")
+        except LLMOverloaded:
+            raise
+        except LLMUnavailable:
+            return "Sorry, the language model is not available."
         except Exception as e:
             return f"Error generating answer: {str(e)}"
     
     async def check_model_availability(self) -> bool:
-        """Check if the LLM model is available"""
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                if response.status_code == 200:
-                    models = response.json().get("models", [])
-                    return any(model["name"].startswith(self.model) for model in models)
-                return False
-        except:
-            return False
+        """Check if the LLM model is available on any backend"""
+        async def has_model(http, base_url):
+            response = await http.get(f"{base_url}/api/tags", timeout=10.0)
+            models = response.json().get("models", []) if response.status_code == 200 else []
+            return any(model["name"].startswith(self.model) for model in models)
+        return any(await get_llm_client().each_backend(has_model))
+    
+    async def preload_model(self, timeout: float = 300.0) -> bool:
+        """Load the model into each backend's memory (a generate request without a prompt).
+
+        keep_alive keeps it resident between requests, so the first query
+        doesn't wait for the weights to load. True if any backend loaded it.
+        """
+        async def preload(http, base_url):
+            response = await http.post(
+                f"{base_url}/api/generate",
+                json={"model": self.model, "keep_alive": settings.ollama_keep_alive},
+                timeout=timeout
+            )
+            return response.status_code == 200
+        return any(await get_llm_client().each_backend(preload))
+    
+    async def is_model_loaded(self, timeout: float = 10.0) -> bool:
+        """Whether some backend currently has the model resident (Ollama's /api/ps)"""
+        async def loaded(http, base_url):
+            response = await http.get(f"{base_url}/api/ps", timeout=timeout)
+            models = response.json().get("models", []) if response.status_code == 200 else []
+            return any(model.get("name", "").startswith(self.model) for model in models)
+        return any(await get_llm_client().each_backend(loaded))
@@ -0,0 +1,369 @@
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from qdrant_client.models import Filter, PointStruct, ScoredPoint
+from src.config.settings import settings
+
+# Rows scored per matrix multiply in exact search; bounds the temporary score matrix
+_BLOCK_ROWS = 65536
+
+def _normalize(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class MemmapVectorIndex:
+    """In-process vector store for small and offline deployments.
+
+    Vectors live in an append-only float32 file read through np.memmap and
+    are normalised on write, so cosine similarity is a dot product. Ids and
+    payloads go to an append-only JSON-lines log; re-adding an id or logging
+    a delete tombstones the old row. Writers from several processes (API,
+    workers) serialise on a file lock and readers pick up new log lines on
+    their next search.
+
+    Search is exact NumPy top-k by default. With an IVF index built by
+    build_ann_index() and LOCAL_INDEX_ANN enabled, only the rows of the
+    LOCAL_INDEX_NPROBE closest clusters are scored.
+    """
+    name = "local"
+    concurrent_writes = False  # writers serialise on the file lock anyway
+    ordered_writes = True  # add_vectors() applies writes before returning
+
+    def __init__(self, path: str, dimension: Optional[int] = None):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.dimension = self._check_dimension(dimension)
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.log_path = os.path.join(path, "points.jsonl")
+        self.ivf_path = os.path.join(path, "ivf.npz")
+        self._lock_path = os.path.join(path, ".lock")
+        self._mutex = threading.RLock()
+
+        self._vectors = np.zeros((0, self.dimension), dtype=np.float32)
+        self._ids: List[Optional[str]] = []
+        self._payloads: List[Optional[Dict[str, Any]]] = []
+        self._live = np.zeros(0, dtype=bool)
+        self._row_of: Dict[str, int] = {}
+        self._log_offset = 0
+        self._columns: Dict[str, np.ndarray] = {}
+        self._ivf_centroids: Optional[np.ndarray] = None
+        self._ivf_assign = np.zeros(0, dtype=np.int32)
+
+        self._load_ivf()
+        self._refresh()
+
+    def _check_dimension(self, dimension: Optional[int]) -> int:
+        """Dimension is fixed when the index is created and recorded in meta.json"""
+        meta_path = os.path.join(self.path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                stored = json.load(f)["dimension"]
+            if dimension is not None and dimension != stored:
+                raise ValueError(f"{self.path} holds {stored}-d vectors, not {dimension}-d")
+            return stored
+        if dimension is None:
+            raise ValueError(f"{self.path} is not an index and no dimension was given")
+        with open(meta_path, "w") as f:
+            json.dump({"dimension": dimension}, f)
+        return dimension
+
+    def ping(self):
+        """Readiness probe: the index files are readable and the log applies cleanly"""
+        with self._mutex:
+            self._refresh()
+
+    @property
+    def count(self) -> int:
+        """Live (non-deleted) points"""
+        with self._mutex:
+            self._refresh()
+            return int(self._live.sum())
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _rows_on_disk(self) -> int:
+        if not os.path.exists(self.vectors_path):
+            return 0
+        return os.path.getsize(self.vectors_path) // (self.dimension * 4)
+
+    def _refresh(self):
+        """Apply log lines written since the last refresh (by any process)"""
+        size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        if size <= self._log_offset:
+            return
+        with open(self.log_path, "rb") as log:
+            log.seek(self._log_offset)
+            data = log.read(size - self._log_offset)
+        complete = data[:data.rfind(b"\n") + 1]  # a writer may be mid-line
+        if not complete:
+            return
+        self._log_offset += len(complete)
+
+        records = [json.loads(line) for line in complete.splitlines() if line.strip()]
+        rows = max([len(self._ids)] + [record["row"] + 1 for record in records if "row" in record])
+        if rows > len(self._ids):
+            grow = rows - len(self._ids)
+            self._ids.extend([None] * grow)
+            self._payloads.extend([None] * grow)
+            self._live = np.concatenate([self._live, np.zeros(grow, dtype=bool)])
+        for record in records:
+            previous = self._row_of.get(record["id"])
+            if previous is not None:
+                self._live[previous] = False
+                self._payloads[previous] = None
+            if "row" in record:
+                row = record["row"]
+                self._ids[row] = record["id"]
+                self._payloads[row] = record["payload"]
+                self._live[row] = True
+                self._row_of[record["id"]] = row
+            else:
+                self._row_of.pop(record["id"], None)
+
+        self._vectors = np.memmap(
+            self.vectors_path, dtype=np.float32, mode="r", shape=(self._rows_on_disk(), self.dimension)
+        )
+        self._columns = {}
+        self._assign_new_rows()
+
+    def add_vectors(self, ids: Sequence[str], vectors, payloads: Sequence[Dict[str, Any]], wait: bool = True):
+        """Append points; an id that already exists replaces its old row.
+
+        Writes are visible when this returns, so `wait` is accepted for
+        interface parity with Qdrant and ignored.
+        """
+        if not len(ids):
+            return
+        matrix = _normalize(vectors)
+        with self._mutex, self._file_lock():
+            first_row = self._rows_on_disk()
+            # Vectors first: a log line must never point past the end of the file
+            with open(self.vectors_path, "ab") as vector_file:
+                vector_file.write(matrix.tobytes())
+            lines = [
+                json.dumps({"row": first_row + i, "id": str(point_id), "payload": payload})
+                for i, (point_id, payload) in enumerate(zip(ids, payloads))
+            ]
+            with open(self.log_path, "a") as log:
+                log.write("\n".join(lines) + "\n")
+            self._refresh()
+
+    def upsert(self, points: List[PointStruct]):
+        self.add_vectors(
+            [point.id for point in points],
+            [point.vector for point in points],
+            [point.payload or {} for point in points]
+        )
+
+    def retrieve_vectors(self, ids: Sequence[str]) -> Dict[str, List[float]]:
+        """Stored (normalised) vectors of live points by id; unknown ids are left out"""
+        with self._mutex:
+            self._refresh()
+            rows = {point_id: self._row_of[point_id] for point_id in ids if point_id in self._row_of}
+            return {point_id: self._vectors[row].tolist() for point_id, row in rows.items()}
+
+    def scroll(self, offset: Optional[int], limit: int, with_vectors: bool = False):
+        """One page of live points from row `offset`: (ids, vectors or None, payloads, next_offset)"""
+        with self._mutex:
+            self._refresh()
+            start = offset or 0
+            live = self._live[:len(self._vectors)]
+            rows = np.flatnonzero(live[start:])[:limit] + start
+            ids = [self._ids[row] for row in rows]
+            payloads = [self._payloads[row] for row in rows]
+            vectors = np.asarray(self._vectors[rows]) if with_vectors else None
+        more = len(rows) == limit and live[int(rows[-1]) + 1:].any()
+        return ids, vectors, payloads, int(rows[-1]) + 1 if more else None
+
+    def iter_points(self, batch_size: int = 1000):
+        """Live points as (ids, vectors, payloads) batches, in row order"""
+        offset = None
+        while True:
+            ids, vectors, payloads, offset = self.scroll(offset, batch_size, with_vectors=True)
+            if ids:
+                yield ids, vectors, payloads
+            if offset is None:
+                return
+
+    def delete(self, ids: Sequence[str]):
+        """Tombstone points; their rows stay in the file but are never returned"""
+        with self._mutex, self._file_lock():
+            with open(self.log_path, "a") as log:
+                log.write("".join(json.dumps({"id": str(point_id)}) + "\n" for point_id in ids))
+            self._refresh()
+
+    def _column(self, key: str) -> np.ndarray:
+        """Payload field as an array over rows, for vectorised filtering"""
+        if key not in self._columns:
+            values = [payload.get(key) if payload else None for payload in self._payloads]
+            if key == "ingested_at":
+                self._columns[key] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            else:
+                self._columns[key] = np.array(values, dtype=object)
+        return self._columns[key]
+
+    def _filter_mask(self, query_filter: Optional[Filter]) -> np.ndarray:
+        mask = self._live.copy()
+        if query_filter is None:
+            return mask
+        if query_filter.should or query_filter.must_not:
+            raise ValueError("The local vector backend only supports 'must' filters")
+        for condition in query_filter.must or []:
+            column = self._column(condition.key)
+            if condition.match is not None:
+                allowed = getattr(condition.match, "any", None) or [condition.match.value]
+                mask &= np.isin(column, allowed)
+            if condition.range is not None:
+                bounds = condition.range
+                with np.errstate(invalid="ignore"):
+                    if bounds.gte is not None:
+                        mask &= column >= bounds.gte
+                    if bounds.gt is not None:
+                        mask &= column > bounds.gt
+                    if bounds.lte is not None:
+                        mask &= column <= bounds.lte
+                    if bounds.lt is not None:
+                        mask &= column < bounds.lt
+        return mask
+
+    def search(self, vectors: List[List[float]], limit: int,
+               query_filter: Optional[Filter] = None) -> List[List[ScoredPoint]]:
+        with self._mutex:
+            self._refresh()
+            matrix, ids, payloads = self._vectors, self._ids, self._payloads
+            # Rows on disk not yet in the log (a writer mid-append) stay masked out
+            mask = np.zeros(len(matrix), dtype=bool)
+            mask[:len(self._live)] = self._filter_mask(query_filter)[:len(matrix)]
+            use_ivf = settings.local_index_ann and self._ivf_centroids is not None
+
+        queries = _normalize(vectors)
+        if use_ivf:
+            rows_scores = []
+            for query in queries:
+                rows, scores = self._search_ivf(matrix, mask, query, limit)
+                if len(rows) < limit and mask.sum() > len(rows):
+                    # A selective filter left the probed clusters short; score every match instead
+                    rows, scores = self._search_exact(matrix, mask, query[None, :], limit)[0]
+                rows_scores.append((rows, scores))
+        else:
+            rows_scores = self._search_exact(matrix, mask, queries, limit)
+        return [
+            [ScoredPoint(id=ids[row], version=0, score=float(score), payload=payloads[row])
+             for row, score in zip(rows, scores)]
+            for rows, scores in rows_scores
+        ]
+
+    def _search_exact(self, matrix: np.ndarray, mask: np.ndarray, queries: np.ndarray, limit: int):
+        best_rows = [np.zeros(0, dtype=np.int64) for _ in queries]
+        best_scores = [np.zeros(0, dtype=np.float32) for _ in queries]
+        for start in range(0, len(matrix), _BLOCK_ROWS):
+            block_mask = mask[start:start + _BLOCK_ROWS]
+            if not block_mask.any():
+                continue
+            scores = np.asarray(matrix[start:start + _BLOCK_ROWS]) @ queries.T  # rows x queries
+            scores[~block_mask] = -np.inf
+            for i in range(len(queries)):
+                top = _top_k(scores[:, i], limit)
+                top = top[np.isfinite(scores[top, i])]
+                rows = np.concatenate([best_rows[i], top + start])
+                merged = np.concatenate([best_scores[i], scores[top, i]])
+                keep = _top_k(merged, limit)
+                best_rows[i], best_scores[i] = rows[keep], merged[keep]
+        return [_sorted(rows, scores) for rows, scores in zip(best_rows, best_scores)]
+
+    def _search_ivf(self, matrix: np.ndarray, mask: np.ndarray, query: np.ndarray, limit: int):
+        probes = _top_k(self._ivf_centroids @ query, settings.local_index_nprobe)
+        assign = self._ivf_assign[:len(mask)]
+        candidates = np.flatnonzero(np.isin(assign, probes) & mask[:len(assign)])
+        if not len(candidates):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        scores = np.asarray(matrix[candidates]) @ query
+        top = _top_k(scores, limit)
+        return _sorted(candidates[top], scores[top])
+
+    def build_ann_index(self, nlist: Optional[int] = None, iterations: int = 10,
+                        sample_size: int = 100_000, seed: int = 0) -> int:
+        """Cluster live vectors (spherical k-means) into an IVF index; returns nlist"""
+        with self._mutex:
+            self._refresh()
+            matrix = self._vectors
+            live_rows = np.flatnonzero(self._live[:len(matrix)])
+        if not len(live_rows):
+            raise ValueError("No vectors to index")
+        nlist = min(nlist or int(4 * np.sqrt(len(live_rows))), len(live_rows))
+
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(matrix[np.sort(rng.choice(live_rows, min(sample_size, len(live_rows)), replace=False))])
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+        for _ in range(iterations):
+            labels = _nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=nlist) == 0
+            sums[empty] = centroids[empty]  # keep unused centroids where they are
+            centroids = _normalize(sums)
+
+        assign = np.full(len(matrix), -1, dtype=np.int32)
+        for start in range(0, len(matrix), _BLOCK_ROWS):
+            assign[start:start + _BLOCK_ROWS] = _nearest(np.asarray(matrix[start:start + _BLOCK_ROWS]), centroids)
+
+        # Write-then-rename so readers never load a half-written index
+        tmp_path = self.ivf_path + ".tmp.npz"
+        np.savez(tmp_path, centroids=centroids, assign=assign)
+        os.replace(tmp_path, self.ivf_path)
+        with self._mutex:
+            self._ivf_centroids, self._ivf_assign = centroids, assign
+            self._assign_new_rows()
+        return nlist
+
+    def _load_ivf(self):
+        if os.path.exists(self.ivf_path):
+            with np.load(self.ivf_path) as ivf:
+                self._ivf_centroids, self._ivf_assign = ivf["centroids"], ivf["assign"]
+
+    def _assign_new_rows(self):
+        """Put rows appended since the IVF index was built into their nearest cluster"""
+        if self._ivf_centroids is None or len(self._ivf_assign) >= len(self._vectors):
+            return
+        start = len(self._ivf_assign)
+        new = _nearest(np.asarray(self._vectors[start:]), self._ivf_centroids)
+        self._ivf_assign = np.concatenate([self._ivf_assign, new])
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    return np.argmax(vectors @ centroids.T, axis=1).astype(np.int32)
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if len(scores) <= k:
+        return np.arange(len(scores))
+    return np.argpartition(-scores, k - 1)[:k]
+
+def _sorted(rows: np.ndarray, scores: np.ndarray):
+    order = np.argsort(-scores, kind="stable")
+    return rows[order], scores[order]
+
+_indexes: Dict[str, MemmapVectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_local_index(path: str, dimension: Optional[int] = None) -> MemmapVectorIndex:
+    """One index per directory per process, shared by every VectorStore"""
+    with _indexes_lock:
+        if path not in _indexes:
+            if dimension is None and not os.path.exists(os.path.join(path, "meta.json")):
+                dimension = settings.embedding_dimension
+            _indexes[path] = MemmapVectorIndex(path, dimension)
+        return _indexes[path]
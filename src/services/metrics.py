@@ -0,0 +1,91 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+)
+from prometheus_client import multiprocess
+from src.services.tracing import span, annotate
+
+# Latency buckets from sub-millisecond cache hits up to slow browser renders / LLM calls
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in each query/ingestion pipeline stage",
+    ["stage"],
+    buckets=_BUCKETS,
+)
+STAGE_ITEMS = Counter(
+    "rag_stage_items_total",
+    "Items processed per stage (texts embedded, chunks produced, points upserted, ...)",
+    ["stage"],
+)
+STAGE_ERRORS = Counter(
+    "rag_stage_errors_total",
+    "Exceptions raised inside a stage",
+    ["stage"],
+)
+CACHE_REQUESTS = Counter(
+    "rag_cache_requests_total",
+    "Cache lookups by tier and result",
+    ["tier", "result"],
+)
+
+# Label children are resolved once per stage so the hot path is a dict lookup
+_children: Dict[str, tuple] = {}
+
+def _stage(stage: str) -> tuple:
+    child = _children.get(stage)
+    if child is None:
+        child = (STAGE_SECONDS.labels(stage), STAGE_ITEMS.labels(stage), STAGE_ERRORS.labels(stage))
+        _children[stage] = child
+    return child
+
+@contextmanager
+def track_stage(stage: str, **attrs):
+    """Time a block and record it under rag_stage_duration_seconds{stage=...}.
+
+    When a debug trace is active the block is also recorded as a span.
+    """
+    seconds, _, errors = _stage(stage)
+    start = time.perf_counter()
+    with span(stage, **attrs):
+        try:
+            yield
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            seconds.observe(time.perf_counter() - start)
+
+def count_items(stage: str, amount: int):
+    """Count items handled by a stage (call inside its track_stage block)"""
+    if amount:
+        _stage(stage)[1].inc(amount)
+        annotate(items=amount)
+
+def record_error(stage: str):
+    """Count a failure that a stage handled without raising"""
+    _stage(stage)[2].inc()
+
+def record_cache(tier: str, hits: int = 0, misses: int = 0):
+    """Record cache hits/misses for a tier (embedding, content, ...)"""
+    if hits:
+        CACHE_REQUESTS.labels(tier, "hit").inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(tier, "miss").inc(misses)
+    annotate(**{f"{tier}_cache_hits": hits, f"{tier}_cache_misses": misses})
+
+def get_registry():
+    """Registry to expose; aggregates all worker processes when PROMETHEUS_MULTIPROC_DIR is set"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+def render_metrics():
+    """Serialize metrics in the Prometheus text format"""
+    return generate_latest(get_registry()), CONTENT_TYPE_LATEST
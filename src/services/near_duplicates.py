@@ -0,0 +1,111 @@
+import hashlib
+import re
+from typing import List, Optional
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, aliased
+from src.config.settings import settings
+from src.models.fingerprint import PageFingerprint
+from src.models.ingestion import URLIngestion
+
+SHINGLE_WORDS = 3
+MIN_SHINGLES = 32  # shorter texts give unstable fingerprints, so they are never deduplicated
+BANDS = 4  # of 16 bits: any two fingerprints within 3 bits agree on at least one band
+
+_WORD = re.compile(r"\w+")
+_BIT_WEIGHTS = np.array([1 << i for i in range(63, -1, -1)], dtype=np.uint64)
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash over word 3-shingles (None when the text is too short).
+
+    Similar texts map to fingerprints that differ in few bits. A changed
+    boilerplate line, a tracking footer or a print header changes a few
+    shingles and moves the fingerprint by a bit or two.
+    """
+    words = _WORD.findall(text.lower())
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    hashes = np.frombuffer(
+        b"".join(hashlib.blake2b(s.encode(), digest_size=8).digest() for s in shingles), dtype=">u8"
+    )
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1)  # big-endian: MSB first
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(shingles)
+    return int(_BIT_WEIGHTS[votes > 0].sum(dtype=np.uint64))
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def _bands(fingerprint: int):
+    return [(fingerprint >> (16 * i)) & 0xFFFF for i in range(BANDS)]
+
+def _to_signed(fingerprint: int) -> int:
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+def find_near_duplicate(db: Session, url_id: int, fingerprint: int) -> Optional[URLIngestion]:
+    """The closest completed, non-duplicate page within NEAR_DUPLICATE_MAX_DISTANCE bits.
+
+    Candidates come from the band indexes; only they are compared exactly.
+    """
+    bands = _bands(fingerprint)
+    candidates = (
+        db.query(PageFingerprint.simhash, URLIngestion)
+        .join(URLIngestion, URLIngestion.id == PageFingerprint.url_id)
+        .filter(
+            or_(*(getattr(PageFingerprint, f"band_{i}") == band for i, band in enumerate(bands))),
+            PageFingerprint.url_id != url_id,
+            PageFingerprint.duplicate_of_id.is_(None),
+            URLIngestion.status == "completed",
+        )
+        .all()
+    )
+    scored = [(hamming(fingerprint, _to_unsigned(value)), record) for value, record in candidates]
+    scored = [(distance, record) for distance, record in scored if distance <= settings.near_duplicate_max_distance]
+    return min(scored, key=lambda pair: (pair[0], pair[1].id))[1] if scored else None
+
+def record_fingerprint(db: Session, url_id: int, fingerprint: int, duplicate_of_id: Optional[int] = None):
+    """Store a page's fingerprint (committed with the caller's next commit)"""
+    db.merge(PageFingerprint(
+        url_id=url_id,
+        simhash=_to_signed(fingerprint),
+        duplicate_of_id=duplicate_of_id,
+        **{f"band_{i}": band for i, band in enumerate(_bands(fingerprint))}
+    ))
+
+def get_duplicate_of(db: Session, url_id: int) -> Optional[int]:
+    row = db.query(PageFingerprint.duplicate_of_id).filter(PageFingerprint.url_id == url_id).first()
+    return row[0] if row else None
+
+def detach_drifted_duplicates(db: Session, original_id: int, fingerprint: int) -> List[URLIngestion]:
+    """Unlink duplicates of a page whose new fingerprint no longer matches theirs.
+
+    Returns their records; they have no chunks of their own, so the caller
+    re-queues them (changes are committed with the caller's next commit).
+    """
+    rows = (
+        db.query(PageFingerprint, URLIngestion)
+        .join(URLIngestion, URLIngestion.id == PageFingerprint.url_id)
+        .filter(PageFingerprint.duplicate_of_id == original_id)
+        .all()
+    )
+    drifted = []
+    for row, record in rows:
+        if hamming(fingerprint, _to_unsigned(row.simhash)) > settings.near_duplicate_max_distance:
+            row.duplicate_of_id = None
+            drifted.append(record)
+    return drifted
+
+def expand_duplicate_urls(db: Session, urls: List[str]) -> List[str]:
+    """Add the original's URL for every near duplicate in urls, whose chunks live under the original"""
+    duplicate = aliased(URLIngestion)
+    originals = (
+        db.query(URLIngestion.url)
+        .join(PageFingerprint, PageFingerprint.duplicate_of_id == URLIngestion.id)
+        .join(duplicate, duplicate.id == PageFingerprint.url_id)
+        .filter(duplicate.url.in_(urls))
+        .all()
+    )
+    return list(dict.fromkeys([*urls, *(url for url, in originals)]))
@@ -0,0 +1,98 @@
+import time
+from typing import Optional
+from src.config.settings import settings
+from src.services.redis_client import get_redis
+
+# Token bucket + concurrency lease check in one atomic step.
+# KEYS[1] = bucket hash, KEYS[2] = lease sorted set
+# ARGV = rate (tokens/ms), burst, max_concurrency, lease_id, lease_ttl_ms, now_ms
+# Returns 0 when granted, otherwise the suggested wait in ms.
+_ACQUIRE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_concurrency = tonumber(ARGV[3])
+local lease_ttl = tonumber(ARGV[5])
+local now = tonumber(ARGV[6])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+if redis.call('ZCARD', KEYS[2]) >= max_concurrency then
+    local oldest = redis.call('ZRANGE', KEYS[2], 0, 0, 'WITHSCORES')
+    return math.max(1, math.min(tonumber(oldest[2]) - now, 1000))
+end
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+local wait = 0
+if tokens < 1 then
+    wait = math.ceil((1 - tokens) / rate)
+else
+    tokens = tokens - 1
+    redis.call('ZADD', KEYS[2], now + lease_ttl, ARGV[4])
+    redis.call('PEXPIRE', KEYS[2], lease_ttl)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate) + 60000)
+return wait
+"""
+
+class DomainScheduler:
+    """Per-domain rate limits and concurrency caps shared by all workers via Redis.
+
+    Workers call acquire() before fetching; a non-zero result is the number of
+    seconds to defer the task instead of blocking the worker on it.
+    """
+    def __init__(self):
+        self.redis_client = get_redis()
+        self.prefix = settings.domain_key_prefix
+        self.rate = settings.domain_rate_limit
+        self.burst = settings.domain_burst
+        self.max_concurrency = settings.domain_max_concurrency
+        self.lease_ttl_ms = settings.domain_lease_ttl * 1000
+        self._acquire = self.redis_client.register_script(_ACQUIRE_SCRIPT)
+
+    def _keys(self, domain: str):
+        return [f"{self.prefix}bucket:{domain}", f"{self.prefix}leases:{domain}"]
+
+    def acquire(self, domain: str, lease_id: str) -> float:
+        """Take a token and a concurrency slot; returns 0 if granted, else seconds to wait"""
+        try:
+            wait_ms = self._acquire(
+                keys=self._keys(domain),
+                args=[self.rate / 1000.0, self.burst, self.max_concurrency,
+                      lease_id, self.lease_ttl_ms, int(time.time() * 1000)]
+            )
+            return int(wait_ms) / 1000.0
+        except Exception:
+            # Fail open: politeness must never stop ingestion when Redis hiccups
+            return 0.0
+
+    def release(self, domain: str, lease_id: str) -> bool:
+        """Give back the concurrency slot taken by acquire()"""
+        try:
+            self.redis_client.zrem(self._keys(domain)[1], lease_id)
+            return True
+        except Exception:
+            return False
+
+    def penalize(self, domain: str, retry_after: Optional[float] = None) -> float:
+        """Drain the domain's bucket after a 429/503 so every worker backs off.
+
+        Returns the back-off applied in seconds.
+        """
+        backoff = retry_after if retry_after else settings.domain_penalty_seconds
+        try:
+            # Negative tokens refill at `rate`, i.e. nothing is granted for `backoff` seconds
+            key = self._keys(domain)[0]
+            pipe = self.redis_client.pipeline()
+            pipe.hset(key, mapping={
+                "tokens": 1 - backoff * self.rate,
+                "ts": int(time.time() * 1000),
+            })
+            pipe.pexpire(key, int(backoff * 1000) + 60000)
+            pipe.execute()
+        except Exception:
+            pass
+        return backoff
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from sqlalchemy import text
+from src.config.settings import settings
+from src.database.connection import engine
+from src.services.redis_client import get_redis, get_async_redis
+from src.services.llm_service import LLMService
+from src.services.vector_versions import get_active_model
+
+def _warm_embedding_model():
+    from src.services.embeddings import EmbeddingService
+    EmbeddingService(get_active_model()).warm_up(
+        settings.readiness_warmup_rounds, settings.readiness_warmup_batch_size
+    )
+
+async def _preload_llm():
+    if not await LLMService().preload_model():
+        raise RuntimeError(f"Ollama did not load {settings.llm_model}")
+
+async def _probe_redis():
+    await get_async_redis().ping()
+    await asyncio.to_thread(get_redis().ping)
+
+def _check_postgres():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+def _check_vector_store():
+    from src.services.vector_store import create_backend
+    create_backend().ping()
+
+async def _probe_llm():
+    if not await LLMService().is_model_loaded(timeout=settings.readiness_probe_timeout):
+        raise RuntimeError(f"{settings.llm_model} is not loaded")
+
+# Dependency probes run on /ready; each raises when the dependency isn't usable
+PROBES: Dict[str, Callable[[], Awaitable[Any]]] = {
+    "redis": _probe_redis,
+    "postgres": lambda: asyncio.to_thread(_check_postgres),
+    "vector_store": lambda: asyncio.to_thread(_check_vector_store),
+    "llm": _probe_llm,
+}
+
+async def _timed(step: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(step(), timeout)
+        result = {"ok": True}
+    except Exception as e:
+        result = {"ok": False, "error": str(e) or type(e).__name__}
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+class Readiness:
+    """Startup warm-up and dependency probes behind /ready.
+
+    Warm-up runs in the background until it succeeds: load the embedding
+    model and run a few batched encodes, then have Ollama load the LLM with
+    a keep-alive. After that /ready probes the Redis, Postgres and vector
+    store connections and checks the LLM is still resident. Probe results
+    are reused for READINESS_PROBE_TTL seconds, so frequent probing from a
+    load balancer costs little.
+    """
+    def __init__(self):
+        self.warm_up: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._probes: Optional[Tuple[float, Dict[str, Dict[str, Any]]]] = None
+        self._probe_lock: Optional[asyncio.Lock] = None
+
+    def _required(self, names):
+        return [name for name in names if name != "llm" or settings.readiness_require_llm]
+
+    @property
+    def warmed_up(self) -> bool:
+        return all(self.warm_up.get(step, {}).get("ok") for step in self._required(["embedding_model", "llm"]))
+
+    def start(self):
+        """Start (or restart) the warm-up in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run_warm_up())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    async def _run_warm_up(self):
+        steps = {"embedding_model": lambda: asyncio.to_thread(_warm_embedding_model), "llm": _preload_llm}
+        while True:
+            for name, step in steps.items():
+                if not self.warm_up.get(name, {}).get("ok"):
+                    self.warm_up[name] = await _timed(step)
+            # Optional steps get one try per run, so they can't keep this task alive
+            if all(self.warm_up[name]["ok"] for name in self._required(steps)):
+                return
+            await asyncio.sleep(settings.readiness_retry_interval)
+
+    async def _run_probes(self) -> Dict[str, Dict[str, Any]]:
+        if self._probe_lock is None:
+            self._probe_lock = asyncio.Lock()
+        async with self._probe_lock:
+            now = time.monotonic()
+            if self._probes is None or now - self._probes[0] >= settings.readiness_probe_ttl:
+                names = list(PROBES)
+                results = await asyncio.gather(*(
+                    _timed(PROBES[name], settings.readiness_probe_timeout) for name in names
+                ))
+                self._probes = (now, dict(zip(names, results)))
+            return self._probes[1]
+
+    async def check(self) -> Dict[str, Any]:
+        """Readiness report; "status" is "ready" only when traffic can be served"""
+        checks = await self._run_probes()
+        if self.warm_up.get("llm", {}).get("ok") and not checks["llm"]["ok"]:
+            # Evicted since the preload (keep-alive expired, Ollama restarted): load it again
+            self.warm_up["llm"] = {"ok": False, "error": "model no longer loaded"}
+            self.start()
+        if not self.warmed_up:
+            status = "warming_up"
+        elif all(checks[name]["ok"] for name in self._required(checks)):
+            status = "ready"
+        else:
+            status = "unavailable"
+        return {"status": status, "warm_up": self.warm_up, "checks": checks}
+
+readiness = Readiness()
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from src.config.settings import settings
+from src.services.redis_client import get_redis
+
+def next_interval(current: Optional[float], changed: Optional[bool]) -> float:
+    """Adaptive revisit interval in seconds.
+
+    Pages that changed since the last fetch are revisited sooner, stable
+    pages progressively less often, within [min, max].
+    """
+    if current is None or changed is None:
+        interval = settings.recrawl_initial_interval
+    elif changed:
+        interval = current * settings.recrawl_speedup_factor
+    else:
+        interval = current * settings.recrawl_backoff_factor
+    return max(settings.recrawl_min_interval, min(settings.recrawl_max_interval, interval))
+
+def record_fetch(url_record, content_hash: str, now: Optional[datetime] = None) -> Optional[bool]:
+    """Update a URLIngestion's change history after a real (non-cached) fetch.
+
+    Compares against the hash stored in Postgres, which outlives the content
+    cache. Returns whether the content changed (None on the first fetch).
+    The caller commits.
+    """
+    now = now or datetime.utcnow()
+    changed = None if url_record.content_hash is None else url_record.content_hash != content_hash
+    url_record.fetch_count = (url_record.fetch_count or 0) + 1
+    if changed:
+        url_record.change_count = (url_record.change_count or 0) + 1
+    url_record.recrawl_interval = int(next_interval(url_record.recrawl_interval, changed))
+    url_record.last_fetched_at = now
+    url_record.next_fetch_at = now + timedelta(seconds=url_record.recrawl_interval)
+    return changed
+
+class RecrawlBudget:
+    """Global cap on recrawl fetches per clock hour, shared through Redis"""
+    def __init__(self):
+        self.redis_client = get_redis()
+        self.limit = settings.recrawl_budget_per_hour
+
+    def _key(self, now: datetime) -> str:
+        return f"recrawl:budget:{now:%Y%m%d%H}"
+
+    def take(self, requested: int, now: Optional[datetime] = None) -> int:
+        """Reserve up to `requested` fetches from this hour's budget; returns how many were granted"""
+        if requested <= 0:
+            return 0
+        key = self._key(now or datetime.utcnow())
+        pipe = self.redis_client.pipeline()
+        pipe.incrby(key, requested)
+        pipe.expire(key, 7200)
+        used, _ = pipe.execute()
+        overflow = min(requested, max(0, used - self.limit))
+        if overflow:
+            self.redis_client.decrby(key, overflow)
+        return requested - overflow
@@ -0,0 +1,74 @@
+import redis
+import redis.asyncio as aioredis
+from typing import Dict, Any, Optional
+from src.config.settings import settings
+
+# One pool per process, shared by every cache user. redis-py checks the pid on
+# checkout, so a forked Celery child gets fresh connections automatically.
+# Blocking pools make a caller wait up to REDIS_POOL_TIMEOUT for a free
+# connection when all are in use, rather than failing at once.
+_pool: Optional[redis.ConnectionPool] = None
+_async_pool: Optional[aioredis.ConnectionPool] = None
+
+def _pool_kwargs() -> Dict[str, Any]:
+    return {
+        "max_connections": settings.redis_max_connections,
+        "timeout": settings.redis_pool_timeout,
+        "socket_timeout": settings.redis_socket_timeout,
+        "socket_connect_timeout": settings.redis_socket_timeout,
+        "health_check_interval": settings.redis_health_check_interval,
+        "decode_responses": True,
+    }
+
+def get_redis_pool() -> redis.ConnectionPool:
+    """Get the process-wide sync connection pool"""
+    global _pool
+    if _pool is None:
+        _pool = redis.BlockingConnectionPool.from_url(settings.redis_url, **_pool_kwargs())
+    return _pool
+
+def get_redis() -> redis.Redis:
+    """Get a sync client backed by the shared pool"""
+    return redis.Redis(connection_pool=get_redis_pool())
+
+def get_async_redis_pool() -> aioredis.ConnectionPool:
+    """Get the process-wide asyncio connection pool (used by the API)"""
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = aioredis.BlockingConnectionPool.from_url(settings.redis_url, **_pool_kwargs())
+    return _async_pool
+
+def get_async_redis() -> aioredis.Redis:
+    """Get an asyncio client backed by the shared pool"""
+    return aioredis.Redis(connection_pool=get_async_redis_pool())
+
+async def close_async_redis():
+    """Disconnect the asyncio pool, e.g. on API shutdown"""
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.disconnect()
+        _async_pool = None
+
+def _describe_pool(pool) -> Dict[str, Any]:
+    if isinstance(pool, redis.BlockingConnectionPool):
+        # Its queue holds idle connections plus None slots for ones not yet made
+        created = len(pool._connections)
+        available = sum(1 for connection in list(pool.pool.queue) if connection is not None)
+        in_use = created - available
+    else:
+        in_use = len(pool._in_use_connections)
+        available = len(pool._available_connections)
+    return {
+        "max_connections": pool.max_connections,
+        "created_connections": in_use + available,
+        "in_use_connections": in_use,
+        "available_connections": available,
+        "utilization": in_use / pool.max_connections if pool.max_connections else 0.0,
+    }
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Utilization of the shared pools in this process"""
+    return {
+        "sync": _describe_pool(_pool) if _pool is not None else None,
+        "async": _describe_pool(_async_pool) if _async_pool is not None else None,
+    }
@@ -1,14 +1,86 @@
 import asyncio
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, Error as PlaywrightError
 import trafilatura
 from bs4 import BeautifulSoup
 import httpx
+import codecs
 import hashlib
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
 from src.config.settings import settings
 from src.services.cache import CacheService
+from src.services.near_duplicates import simhash
+from src.services.metrics import track_stage, count_items, record_cache
+from src.services.tracing import annotate
 import re
 
+class RateLimitedError(Exception):
+    """The site answered 429/503; the domain should back off for retry_after seconds"""
+    def __init__(self, url: str, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(f"{url} returned {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class ContentRejectedError(Exception):
+    """The resource is too large or not a page we can extract; retrying won't help"""
+
+class HostUnavailableError(Exception):
+    """The host couldn't be reached, timed out or answered 500/502/504; worth retrying later"""
+
+# Server errors that say the host (or its gateway) is down rather than the page missing
+HOST_ERROR_STATUSES = (500, 502, 504)
+
+class Download(NamedTuple):
+    status_code: int
+    headers: httpx.Headers
+    text: Optional[str]  # None unless the status was 200
+    raw_hash: Optional[str]  # sha256 of the body bytes
+    size: int
+
+def _allowed_content_types() -> List[str]:
+    return [t.strip().lower() for t in settings.fetch_allowed_content_types.split(",") if t.strip()]
+
+async def download_page(client: httpx.AsyncClient, url: str) -> Download:
+    """GET a page, streaming the body.
+
+    The body is only read for a 200. The Content-Type and Content-Length
+    headers are checked before any of it is read. While streaming, bytes are
+    counted against FETCH_MAX_BYTES (after transfer decoding, so compressed
+    bombs count at full size). They are also decoded incrementally and
+    hashed, so the full body is never held as bytes.
+    """
+    async with client.stream("GET", url) as resp:
+        if resp.status_code != 200:
+            return Download(resp.status_code, resp.headers, None, None, 0)
+        
+        content_type = resp.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type and content_type not in _allowed_content_types():
+            raise ContentRejectedError(f"{url} has unsupported content type {content_type}")
+        declared = resp.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > settings.fetch_max_bytes:
+            raise ContentRejectedError(f"{url} is {declared} bytes (limit {settings.fetch_max_bytes})")
+        
+        try:
+            decoder = codecs.getincrementaldecoder(resp.charset_encoding or "utf-8")(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        digest = hashlib.sha256()
+        parts, size = [], 0
+        async for block in resp.aiter_bytes():
+            size += len(block)
+            if size > settings.fetch_max_bytes:
+                raise ContentRejectedError(f"{url} exceeds {settings.fetch_max_bytes} bytes")
+            digest.update(block)
+            parts.append(decoder.decode(block))
+        parts.append(decoder.decode(b"", final=True))
+        return Download(resp.status_code, resp.headers, "".join(parts), digest.hexdigest(), size)
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Only the delta-seconds form; HTTP-date values fall back to the default penalty
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
 class ContentProcessor:
     def __init__(self):
         self.chunk_size = settings.chunk_size
@@ -19,12 +91,19 @@ class ContentProcessor:
         """Generate hash for content"""
         return hashlib.sha256(content.encode()).hexdigest()
     
+    def fingerprint(self, content: str) -> Optional[int]:
+        """SimHash for near-duplicate detection (None for texts too short to compare)"""
+        with track_stage("fingerprint", content_chars=len(content)):
+            return simhash(content)
+    
     async def fetch_content(self, url: str, force_refresh: bool = False) -> Dict[str, Any]:
         """Fetch content with caching and change detection"""
         
         # Check cache first (unless force refresh)
         if not force_refresh:
-            cached_data = self.cache.get_content(url)
+            with track_stage("content_cache_lookup"):
+                cached_data = self.cache.get_content(url)
+                record_cache("content", hits=1 if cached_data else 0, misses=0 if cached_data else 1)
             if cached_data:
                 return {
                     "content": cached_data["content"],
@@ -32,45 +111,69 @@ class ContentProcessor:
                     "from_cache": True,
                     "content_changed": False
                 }
+            previous = None
+        else:
+            # Refetching anyway; the cached entry still lets an identical body skip extraction
+            previous = self.cache.get_content(url)
         
         # Fetch fresh content
         try:
-            content = await self._fetch_fresh_content(url)
+            with track_stage("fetch"):
+                content, raw_hash = await self._fetch_fresh_content(url, previous)
             content_hash = self._get_content_hash(content)
             
-            # Check if content has changed
-            cached_hash = self.cache.get_content_hash(url)
+            # Cache the new content and check if it changed (single pipelined round trip)
+            cached_hash = self.cache.swap_content(url, content, content_hash, raw_hash)
             content_changed = cached_hash != content_hash
             
-            # Cache the new content
-            self.cache.set_content(url, content, content_hash)
-            
             return {
                 "content": content,
                 "content_hash": content_hash,
+                "raw_hash": raw_hash,
                 "from_cache": False,
                 "content_changed": content_changed
             }
             
+        except (RateLimitedError, ContentRejectedError, HostUnavailableError):
+            raise
         except Exception as e:
             raise Exception(f"Couldn't fetch content from {url}: {str(e)}")
     
-    async def _fetch_fresh_content(self, url: str) -> str:
-        """Fetch fresh content from URL"""
+    async def _fetch_fresh_content(self, url: str, previous: Optional[Dict[str, Any]] = None) -> Tuple[str, Optional[str]]:
+        """Fetch fresh content from URL; returns (text, raw body hash or None for browser renders)"""
         try:
             # Quick attempt with httpx first since it's way faster
             async with httpx.AsyncClient(timeout=30.0) as client:
-                resp = await client.get(url)
-                if resp.status_code == 200:
-                    html_content = resp.text
+                with track_stage("fetch_http"):
+                    try:
+                        page = await download_page(client, url)
+                    except httpx.TransportError as e:
+                        # Connection refused, DNS failure, timeout: the browser would wait out the same
+                        raise HostUnavailableError(f"{url}: {type(e).__name__} {e}".strip()) from e
+                    annotate(status_code=page.status_code, bytes=page.size)
+                if page.status_code in (429, 503):
+                    # Rendering in a browser would just hit the same limit
+                    raise RateLimitedError(url, page.status_code, _parse_retry_after(page.headers.get("Retry-After")))
+                if page.status_code in HOST_ERROR_STATUSES:
+                    raise HostUnavailableError(f"{url} returned {page.status_code}")
+                if page.status_code == 200:
+                    if previous and previous.get("raw_hash") == page.raw_hash:
+                        # Same bytes as last time, so extraction would give the same text
+                        annotate(unchanged_body=True)
+                        return previous["content"], page.raw_hash
                     # trafilatura is pretty good at extracting main content
-                    extracted = trafilatura.extract(html_content)
+                    with track_stage("extract"):
+                        extracted = trafilatura.extract(page.text)
+                        annotate(chars=len(extracted) if extracted else 0)
                     if extracted and len(extracted.strip()) > 100:
-                        return extracted
+                        return extracted, page.raw_hash
             
             # If that didn't work, probably need JS rendering
-            return await self._scrape_with_browser(url)
+            with track_stage("fetch_browser"):
+                return await self._scrape_with_browser(url), None
             
+        except (RateLimitedError, ContentRejectedError, HostUnavailableError):
+            raise
         except Exception as e:
             raise Exception(f"Couldn't fetch content from {url}: {str(e)}")
     
@@ -82,7 +185,13 @@ class ContentProcessor:
             
             try:
                 # Wait for network to be mostly idle
-                await page.goto(url, wait_until="networkidle", timeout=30000)
+                try:
+                    await page.goto(url, wait_until="networkidle", timeout=30000)
+                except PlaywrightError as e:
+                    # Navigation timeouts and net::ERR_* failures mean the host isn't answering
+                    if "Timeout" in type(e).__name__ or "net::ERR_" in str(e):
+                        raise HostUnavailableError(f"{url}: {str(e).splitlines()[0]}") from e
+                    raise
                 html_content = await page.content()
                 
                 # Clean up the HTML with BeautifulSoup
@@ -107,7 +216,9 @@ class ContentProcessor:
     
     def chunk_content(self, content: str, url: str) -> List[Dict[str, Any]]:
         """Break content into smaller pieces for better search"""
-        text_chunks = self._split_into_chunks(content)
+        with track_stage("chunking", content_chars=len(content)):
+            text_chunks = self._split_into_chunks(content)
+            count_items("chunking", len(text_chunks))
         
         docs = []
         for idx, chunk in enumerate(text_chunks):
@@ -0,0 +1,166 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+# (ids, vectors, payloads) as yielded by a backend's iter_points()
+PointBatch = Tuple[List[str], np.ndarray, List[Dict[str, Any]]]
+
+# Side store for chunk text that isn't in the payload (SLIM_PAYLOADS), e.g. chunk_store.load_chunks/save_chunks
+LoadTexts = Callable[[Iterable[str]], Dict[str, str]]
+SaveTexts = Callable[[Dict[str, str]], None]
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _to_columns(payloads: List[Dict[str, Any]]) -> Dict[str, list]:
+    """Row payloads -> one list per field (None where a point lacks the field)"""
+    keys = sorted({key for payload in payloads for key in payload})
+    return {key: [payload.get(key) for payload in payloads] for key in keys}
+
+def _from_columns(columns: Dict[str, list], count: int) -> List[Dict[str, Any]]:
+    payloads = [{} for _ in range(count)]
+    for key, values in columns.items():
+        for payload, value in zip(payloads, values):
+            if value is not None:
+                payload[key] = value
+    return payloads
+
+def _rebatch(batches: Iterator[PointBatch], size: int) -> Iterator[PointBatch]:
+    ids, vectors, payloads = [], [], []
+    for batch_ids, batch_vectors, batch_payloads in batches:
+        ids.extend(batch_ids)
+        vectors.append(np.asarray(batch_vectors, dtype=np.float32))
+        payloads.extend(batch_payloads)
+        while len(ids) >= size:
+            matrix = np.concatenate(vectors)
+            yield ids[:size], matrix[:size], payloads[:size]
+            ids, vectors, payloads = ids[size:], [matrix[size:]], payloads[size:]
+    if ids:
+        yield ids, np.concatenate(vectors), payloads
+
+def export_snapshot(backend, out_dir: str, shard_size: int = 50_000, dtype: str = "float16",
+                    metadata: Optional[Dict[str, Any]] = None,
+                    load_texts: Optional[LoadTexts] = None) -> Dict[str, Any]:
+    """Stream every point of a vector backend into a snapshot directory.
+
+    Each shard is a raw .npy vector array (float16 halves the size at well
+    under 1e-3 cosine error) plus a gzipped columnar JSON file of ids and
+    payload fields. With load_texts, the text of points whose payload has no
+    content (slim payloads) goes into a gzipped id -> text file per shard.
+    manifest.json, written last, lists the shards with their SHA-256
+    checksums.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    shards, total = [], 0
+    for number, (ids, vectors, payloads) in enumerate(_rebatch(backend.iter_points(), shard_size)):
+        name = f"part-{number:05d}"
+        vectors_file, payloads_file = f"{name}.vectors.npy", f"{name}.payloads.json.gz"
+        np.save(os.path.join(out_dir, vectors_file), vectors.astype(dtype))
+        with gzip.open(os.path.join(out_dir, payloads_file), "wt", compresslevel=5) as f:
+            json.dump({"ids": ids, "columns": _to_columns(payloads)}, f)
+        shard = {
+            "count": len(ids),
+            "vectors": vectors_file,
+            "vectors_sha256": _sha256(os.path.join(out_dir, vectors_file)),
+            "payloads": payloads_file,
+            "payloads_sha256": _sha256(os.path.join(out_dir, payloads_file)),
+        }
+        slim_ids = [i for i, payload in zip(ids, payloads) if payload.get("content") is None]
+        if load_texts and slim_ids:
+            texts = {}
+            for start in range(0, len(slim_ids), 1000):  # keeps each lookup's IN list short
+                texts.update(load_texts(slim_ids[start:start + 1000]))
+            texts_file = f"{name}.texts.json.gz"
+            with gzip.open(os.path.join(out_dir, texts_file), "wt", compresslevel=5) as f:
+                json.dump(texts, f)
+            shard.update({
+                "texts": texts_file,
+                "texts_sha256": _sha256(os.path.join(out_dir, texts_file)),
+                "texts_missing": len(slim_ids) - len(texts),
+            })
+        shards.append(shard)
+        total += len(ids)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.time(),
+        "dimension": backend.dimension,
+        "dtype": dtype,
+        "count": total,
+        "shards": shards,
+        **(metadata or {}),
+    }
+    with open(os.path.join(out_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def read_manifest(snapshot_dir: str) -> Dict[str, Any]:
+    with open(os.path.join(snapshot_dir, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format_version')}")
+    return manifest
+
+def _read_shard(snapshot_dir: str, shard: Dict[str, Any]) -> Tuple[PointBatch, Dict[str, str]]:
+    for file_key in ("vectors", "payloads", "texts"):
+        if file_key not in shard:
+            continue  # no texts file: payloads hold the content
+        path = os.path.join(snapshot_dir, shard[file_key])
+        if _sha256(path) != shard[f"{file_key}_sha256"]:
+            raise ValueError(f"Checksum mismatch in {shard[file_key]}")
+    vectors = np.load(os.path.join(snapshot_dir, shard["vectors"])).astype(np.float32)
+    with gzip.open(os.path.join(snapshot_dir, shard["payloads"]), "rt") as f:
+        data = json.load(f)
+    texts = {}
+    if "texts" in shard:
+        with gzip.open(os.path.join(snapshot_dir, shard["texts"]), "rt") as f:
+            texts = json.load(f)
+    return (data["ids"], vectors, _from_columns(data["columns"], len(data["ids"]))), texts
+
+def import_snapshot(backend, snapshot_dir: str, batch_size: int = 1000, workers: int = 4,
+                    progress=None, save_texts: Optional[SaveTexts] = None) -> int:
+    """Bulk-load a snapshot with parallel batched upserts; returns points loaded.
+
+    Every shard's checksums are verified before any of its points are sent.
+    A shard's side-stored texts are saved (with save_texts) before its
+    points, so no point is searchable without its text. Refuses a snapshot
+    with side-stored texts when save_texts isn't given.
+    """
+    manifest = read_manifest(snapshot_dir)
+    if manifest["dimension"] != backend.dimension:
+        raise ValueError(
+            f"Snapshot has {manifest['dimension']}-d vectors, backend expects {backend.dimension}"
+        )
+    if save_texts is None and any("texts" in shard for shard in manifest["shards"]):
+        raise ValueError("Snapshot has slim-payload chunk texts but no text store to load them into")
+
+    def upsert(batch: PointBatch) -> int:
+        backend.add_vectors(*batch)
+        return len(batch[0])
+
+    loaded = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for shard in manifest["shards"]:
+            (ids, vectors, payloads), texts = _read_shard(snapshot_dir, shard)
+            if texts:
+                save_texts(texts)
+            batches = [
+                (ids[start:start + batch_size], vectors[start:start + batch_size], payloads[start:start + batch_size])
+                for start in range(0, len(ids), batch_size)
+            ]
+            loaded += sum(pool.map(upsert, batches))
+            if progress:
+                progress(loaded, manifest["count"])
+    return loaded
@@ -0,0 +1,38 @@
+from typing import Dict
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.models.ingestion import URLIngestion, IngestionStatusCount
+
+def get_status_counts(db: Session) -> Dict[str, int]:
+    """Per-status totals from the counters table (a handful of rows, constant time)"""
+    return {row.status: row.count for row in db.query(IngestionStatusCount).all()}
+
+def reconcile_status_counts(db: Session) -> Dict[str, int]:
+    """Recount url_ingestions and overwrite the counters, fixing any drift.
+
+    The counter rows are locked first, so transitions committing meanwhile
+    wait and then apply their delta on top of the fresh totals.
+    """
+    db.query(IngestionStatusCount).with_for_update().all()
+    actual = dict(
+        db.query(URLIngestion.status, func.count(URLIngestion.id))
+        .group_by(URLIngestion.status).all()
+    )
+    drift = {}
+    existing = {row.status: row for row in db.query(IngestionStatusCount).all()}
+    for status in set(actual) | set(existing):
+        count = actual.get(status, 0)
+        row = existing.get(status)
+        if row is None:
+            db.add(IngestionStatusCount(status=status, count=count))
+            drift[status] = count
+        elif row.count != count:
+            drift[status] = count - row.count
+            row.count = count
+    db.commit()
+    return drift
+
+def ensure_status_counts(db: Session):
+    """Seed the counters on first start (e.g. after upgrading an existing database)"""
+    if db.query(IngestionStatusCount).first() is None:
+        reconcile_status_counts(db)
@@ -0,0 +1,130 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from src.config.settings import settings
+
+# Active span for the current request/task; None means tracing is off (the common case)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("rag_current_span", default=None)
+
+class Span:
+    __slots__ = ("name", "attrs", "children", "_start", "duration_ms")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+        self.children: List["Span"] = []
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "duration_ms": round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            "attrs": self.attrs,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+def tracing_active() -> bool:
+    return _current_span.get() is not None
+
+@contextmanager
+def span(name: str, **attrs):
+    """Record a child span of the active trace; a no-op when no trace is active"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, attrs)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+def annotate(**attrs):
+    """Attach sizes/outcomes to the active span"""
+    current = _current_span.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+class SamplingProfiler:
+    """Samples one thread's stack on a timer and writes collapsed stacks.
+
+    The output is the folded format used by flamegraph.pl, speedscope and
+    inferno. Other work sharing the thread (e.g. concurrent requests on the
+    API event loop) shows up in the samples too.
+    """
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rag-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def dump(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+@contextmanager
+def start_trace(name: str, profile: bool = False, **attrs):
+    """Start a span tree for one request/task; yields the root span.
+
+    With profile=True the calling thread is also sampled and the collapsed
+    stacks are written under TRACE_PROFILE_DIR; the path is stored on the
+    root span as attrs["profile_path"].
+    """
+    trace_id = uuid.uuid4().hex[:16]
+    root = Span(name, {"trace_id": trace_id, **attrs})
+    token = _current_span.set(root)
+    profiler = None
+    if profile:
+        profiler = SamplingProfiler(
+            threading.get_ident(), settings.trace_profile_interval_ms / 1000.0
+        ).start()
+    try:
+        yield root
+    finally:
+        root.finish()
+        _current_span.reset(token)
+        if profiler is not None:
+            profiler.stop()
+            path = os.path.join(settings.trace_profile_dir, f"{name}-{trace_id}.folded")
+            try:
+                root.attrs["profile_path"] = profiler.dump(path)
+                root.attrs["profile_samples"] = sum(profiler.samples.values())
+            except OSError as e:
+                root.attrs["profile_error"] = str(e)
@@ -0,0 +1,57 @@
+from collections import OrderedDict
+from typing import List
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from src.config.settings import settings
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def get_domain(url: str) -> str:
+    """Host used for per-domain politeness (lowercased, without port or leading www.)"""
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    for pattern in settings.url_tracking_params.split(","):
+        pattern = pattern.strip().lower()
+        if pattern and (name.startswith(pattern[:-1]) if pattern.endswith("*") else name == pattern):
+            return True
+    return False
+
+def canonicalize_url(url: str) -> str:
+    """Canonical form used as the ingestion key.
+
+    Lowercases scheme and host, drops default ports, the fragment and
+    tracking parameters (URL_TRACKING_PARAMS), and sorts the remaining query
+    parameters, so variants of one link share a record.
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port is not None and _DEFAULT_PORTS.get(scheme) != parts.port:
+        netloc = f"{netloc}:{parts.port}"
+    if parts.username:
+        netloc = f"{parts.username}{':' + parts.password if parts.password else ''}@{netloc}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(key)
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+def ingestion_key(url: str) -> str:
+    """Form in which a URL is stored (record and chunk payloads): canonical unless URL_CANONICALIZE is off"""
+    return canonicalize_url(url) if settings.url_canonicalize else url
+
+def interleave_by_domain(urls: List[str]) -> List[str]:
+    """Round-robin URLs across domains so one site can't monopolise the queue"""
+    by_domain: "OrderedDict[str, List[str]]" = OrderedDict()
+    for url in urls:
+        by_domain.setdefault(get_domain(url), []).append(url)
+
+    interleaved = []
+    queues = [list(reversed(domain_urls)) for domain_urls in by_domain.values()]
+    while queues:
+        for queue in queues:
+            interleaved.append(queue.pop())
+        queues = [queue for queue in queues if queue]
+    return interleaved
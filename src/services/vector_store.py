@@ -1,15 +1,77 @@
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, PayloadSchemaType,
+    Filter, FieldCondition, MatchAny, Range, SearchRequest, ScoredPoint, Batch,
+    CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation
+)
+import contextvars
 import hashlib
-from typing import List, Dict, Any
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait as wait_for_futures
+from datetime import datetime
+from typing import Callable, List, Dict, Any, Optional, Sequence
+import numpy as np
 from src.config.settings import settings
+from src.services.url_utils import get_domain
+from src.services.chunk_store import save_chunks, load_chunks
+from src.services.vector_versions import model_slug, collection_for_model, get_active_model, get_migration
 from src.services.embeddings import EmbeddingService
+from src.services.metrics import track_stage, count_items, record_error
+from src.services.tracing import annotate
 
-class VectorStore:
-    def __init__(self):
-        self.client = QdrantClient(url=settings.qdrant_url)
-        self.collection_name = settings.qdrant_collection_name
-        self.embedding_service = EmbeddingService()
+# Payload fields searches can be filtered on, with their index types
+FILTER_FIELDS = {
+    "url": PayloadSchemaType.KEYWORD,
+    "domain": PayloadSchemaType.KEYWORD,
+    "ingested_at": PayloadSchemaType.INTEGER,  # unix seconds
+}
+
+def build_filter(urls: Optional[List[str]] = None, domains: Optional[List[str]] = None,
+                 ingested_after: Optional[datetime] = None,
+                 ingested_before: Optional[datetime] = None) -> Optional[Filter]:
+    """Qdrant filter for the optional search restrictions (None when unrestricted)"""
+    conditions = []
+    if urls:
+        conditions.append(FieldCondition(key="url", match=MatchAny(any=list(urls))))
+    if domains:
+        # Same normalisation as at ingest time, so "www.Example.com" matches "example.com"
+        normalized = [get_domain(d if "//" in d else f"//{d}") for d in domains]
+        conditions.append(FieldCondition(key="domain", match=MatchAny(any=normalized)))
+    if ingested_after or ingested_before:
+        conditions.append(FieldCondition(key="ingested_at", range=Range(
+            gte=int(ingested_after.timestamp()) if ingested_after else None,
+            lte=int(ingested_before.timestamp()) if ingested_before else None
+        )))
+    return Filter(must=conditions) if conditions else None
+
+# One client per process, so HTTP connections are pooled across requests
+# (and ":memory:" is one store rather than one per VectorStore)
+_client: Optional[QdrantClient] = None
+
+def get_qdrant_client() -> QdrantClient:
+    global _client
+    if _client is None:
+        # Accepts a server URL or ":memory:" for the embedded local mode
+        _client = QdrantClient(location=settings.qdrant_url)
+    return _client
+
+class QdrantBackend:
+    """Points stored in the Qdrant collection of one embedding model"""
+    name = "qdrant"
+    
+    def __init__(self, model: Optional[str] = None, dimension: Optional[int] = None):
+        self.client = get_qdrant_client()
+        self.model = model or settings.embedding_model
+        self.dimension = dimension or settings.embedding_dimension
+        self.collection_name = collection_for_model(self.model)
+        # The embedded ":memory:" mode isn't safe to write from several threads
+        # and has no payload indexes
+        self.embedded = settings.qdrant_url == ":memory:"
+        self.concurrent_writes = not self.embedded
+        # Whether one write-ahead log holds every point, so a wait=True write
+        # also covers earlier wait=False ones; read from the collection below
+        self.ordered_writes = True
         self._ensure_collection()
     
     def _ensure_collection(self):
@@ -20,60 +82,333 @@ class VectorStore:
             collection_names = [col.name for col in collections.collections]
             
             if self.collection_name not in collection_names:
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(
-                        size=384,  # all-MiniLM-L6-v2 embedding size
-                        distance=Distance.COSINE
+                if (settings.qdrant_collection_name in collection_names
+                        and self.model == settings.embedding_model):
+                    # Unversioned collection from before per-model collections
+                    self.collection_name = settings.qdrant_collection_name
+                else:
+                    self.client.create_collection(
+                        collection_name=self.collection_name,
+                        vectors_config=VectorParams(
+                            size=self.dimension,
+                            distance=Distance.COSINE
+                        )
                     )
-                )
+            info = self.client.get_collection(self.collection_name)
+            # An existing collection's vector size wins over the configured default
+            if isinstance(info.config.params.vectors, VectorParams):
+                self.dimension = info.config.params.vectors.size
+            # Each shard (and each replica) applies its own log
+            self.ordered_writes = (info.config.params.shard_number or 1) == 1 and \
+                (info.config.params.replication_factor or 1) == 1
+            self._ensure_payload_indexes(info.payload_schema or {})
         except Exception as e:
             # Collection might already exist, which is fine
             pass
     
+    def _ensure_payload_indexes(self, existing: Dict[str, Any]):
+        """Index the filterable payload fields.
+
+        With the indexes in place Qdrant plans filtered searches from their
+        cardinality and adds per-value links to the HNSW graph, so restricted
+        queries stay on the graph instead of falling back to a full scan.
+        The embedded mode ignores them (and warns on every call), so it is skipped.
+        """
+        if self.embedded:
+            return
+        for field, schema in FILTER_FIELDS.items():
+            if field not in existing:
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field,
+                    field_schema=schema
+                )
+    
+    def ping(self):
+        """Cheap round trip for readiness probes; raises when Qdrant is unreachable"""
+        self.client.get_collection(self.collection_name)
+    
+    @property
+    def count(self) -> int:
+        return self.client.count(collection_name=self.collection_name, exact=True).count
+    
+    def point_alias(self) -> bool:
+        """Atomically point the unversioned collection name at this collection.
+
+        For readers outside this app (the app itself follows the active model
+        in Redis). Returns False while a pre-versioning collection still
+        holds that name.
+        """
+        alias = settings.qdrant_collection_name
+        if alias in [col.name for col in self.client.get_collections().collections]:
+            return False
+        operations = []
+        if any(a.alias_name == alias for a in self.client.get_aliases().aliases):
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+        operations.append(CreateAliasOperation(
+            create_alias=CreateAlias(collection_name=self.collection_name, alias_name=alias)
+        ))
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+        return True
+    
+    def upsert(self, points: List[PointStruct]):
+        self.client.upsert(collection_name=self.collection_name, points=points)
+    
+    def add_vectors(self, ids: Sequence[str], vectors, payloads: Sequence[Dict[str, Any]], wait: bool = True):
+        """Bulk upsert in Qdrant's columnar batch form.
+
+        With wait=False Qdrant answers once the batch is in its write-ahead
+        log, before it is applied. A shard applies its log in order, so in a
+        single-shard, single-replica collection (ordered_writes) a later
+        wait=True write returns only after the earlier ones are applied.
+        """
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[1] != self.dimension:
+            raise ValueError(f"Expected {self.dimension}-d vectors, got shape {matrix.shape}")
+        # Shape is checked above, so skip the model's per-float validation; the
+        # array becomes JSON numbers in a single tolist() at the wire boundary
+        batch = Batch.model_construct(ids=list(ids), vectors=matrix.tolist(), payloads=list(payloads))
+        self.client.upsert(collection_name=self.collection_name, points=batch, wait=wait)
+    
+    def retrieve_vectors(self, ids: Sequence[str]) -> Dict[str, List[float]]:
+        """Stored vectors by point id, in one request; ids not in the collection are left out"""
+        points = self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=list(ids),
+            with_payload=False,
+            with_vectors=True
+        )
+        return {str(point.id).replace("-", ""): point.vector for point in points}
+    
+    def scroll(self, offset, limit: int, with_vectors: bool = False):
+        """One page of points: (ids, vectors or None, payloads, next_offset)"""
+        points, next_offset = self.client.scroll(
+            collection_name=self.collection_name,
+            limit=limit,
+            offset=offset,
+            with_payload=True,
+            with_vectors=with_vectors
+        )
+        vectors = np.asarray([point.vector for point in points], dtype=np.float32) if with_vectors else None
+        return (
+            [str(point.id).replace("-", "") for point in points],
+            vectors,
+            [point.payload or {} for point in points],
+            str(next_offset) if next_offset is not None else None
+        )
+    
+    def iter_points(self, batch_size: int = 1000):
+        """Scroll the whole collection as (ids, vectors, payloads) batches"""
+        offset = None
+        while True:
+            ids, vectors, payloads, offset = self.scroll(offset, batch_size, with_vectors=True)
+            if ids:
+                yield ids, vectors, payloads
+            if offset is None:
+                return
+    
+    def search(self, vectors: List[List[float]], limit: int,
+               query_filter: Optional[Filter] = None) -> List[List[ScoredPoint]]:
+        if len(vectors) == 1:
+            return [self.client.search(
+                collection_name=self.collection_name,
+                query_vector=vectors[0],
+                query_filter=query_filter,
+                limit=limit
+            )]
+        return self.client.search_batch(
+            collection_name=self.collection_name,
+            requests=[
+                SearchRequest(vector=vector, filter=query_filter, limit=limit, with_payload=True)
+                for vector in vectors
+            ]
+        )
+
+def create_backend(model: Optional[str] = None, dimension: Optional[int] = None):
+    """Vector backend selected by VECTOR_BACKEND ("qdrant" or "local") for a model's vectors.
+
+    Defaults to the active model; dimension is only needed to create a new
+    collection/index.
+    """
+    model = model or get_active_model()
+    if settings.vector_backend == "local":
+        from src.services.local_index import get_local_index
+        return get_local_index(os.path.join(settings.local_index_dir, model_slug(model)), dimension)
+    return QdrantBackend(model, dimension)
+
+def chunk_id(text: str) -> str:
+    """Point id of a chunk: the md5 of its text, so identical text always maps to one point"""
+    return hashlib.md5(text.encode()).hexdigest()
+
+def stored_vector_lookup(backend) -> Callable[[List[str]], List[Optional[List[float]]]]:
+    """Embedding fallback that reads a chunk's vector back from the backend by its point id"""
+    def lookup(texts: List[str]) -> List[Optional[List[float]]]:
+        ids = [chunk_id(text) for text in texts]
+        try:
+            found = backend.retrieve_vectors(ids)
+        except Exception:
+            # Unreachable or missing collection: the model recomputes instead
+            record_error("embedding_store_lookup")
+            return [None] * len(texts)
+        return [found.get(point_id) for point_id in ids]
+    return lookup
+
+class VectorStore:
+    """Embeds chunks and queries and stores/searches them in the configured backend"""
+    def __init__(self):
+        # Model and migration are read once, so one instance never mixes vector spaces
+        model = get_active_model()
+        self.embedding_service = EmbeddingService(model)
+        self.backend = create_backend(model, self.embedding_service.dimension)
+        migration = get_migration()
+        self.migration_model = migration["model"] if migration and migration["model"] != model else None
+    
     def add_documents(self, documents: List[Dict[str, Any]]):
-        """Add documents to vector store"""
-        points = []
-        for doc in documents:
-            text = doc["content"]
-            embedding = self.embedding_service.embed_text(text)
-            
-            # Create unique ID based on content hash
-            doc_id = hashlib.md5(text.encode()).hexdigest()
-            
-            point = PointStruct(
-                id=doc_id,
-                vector=embedding,
-                payload={
-                    "content": text,
+        """Embed chunks and store them, returning once every point is searchable.
+
+        Chunks go out in UPSERT_BATCH_SIZE batches. While a batch is being
+        written (up to UPSERT_PARALLELISM at once, acknowledged by Qdrant
+        before they are applied) the next one is embedded. The last batch is
+        sent with wait=True once the others are acknowledged. When the
+        backend has one write-ahead log (ordered_writes) it is applied after
+        them, so its return is the barrier. A collection with several shards
+        or replicas gives no such ordering, so there every batch waits.
+        """
+        if not documents:
+            return
+        ingested_at = int(time.time())
+        size = settings.upsert_batch_size
+        parallelism = settings.upsert_parallelism if self.backend.concurrent_writes else 1
+        stage = f"upsert_{self.backend.name}"
+        wait = settings.upsert_wait or not self.backend.ordered_writes
+        ids, payloads = [], []
+        with ThreadPoolExecutor(max_workers=parallelism) as pool:
+            pending = set()
+            for start in range(0, len(documents), size):
+                batch_ids, vectors, batch_payloads = self._prepare_batch(documents[start:start + size], ingested_at)
+                ids.extend(batch_ids)
+                payloads.extend(batch_payloads)
+                if start + size >= len(documents):
+                    for future in pending:
+                        future.result()
+                    with track_stage("upsert_barrier", points=len(ids)):
+                        self._write_batch(stage, batch_ids, vectors, batch_payloads, wait=True)
+                    break
+                if len(pending) >= parallelism:
+                    done, pending = wait_for_futures(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                # The span context is copied so the write shows up under this trace
+                pending.add(pool.submit(
+                    contextvars.copy_context().run, self._write_batch, stage, batch_ids, vectors, batch_payloads, wait
+                ))
+        
+        if self.migration_model:
+            self._write_to_migration_target(documents, ids, payloads)
+    
+    def _prepare_batch(self, documents: List[Dict[str, Any]], ingested_at: int):
+        """Embed one batch: (ids, float32 vectors, payloads). Slim-payload text is saved here."""
+        side_texts = {}
+        ids, payloads = [], []
+        with track_stage("upsert_embed"):
+            # Cache misses are read back from the collection before the model runs
+            embeddings = self.embedding_service.embed_batch(
+                [doc["content"] for doc in documents], stored=self._stored_vectors(self.backend)
+            )
+            for doc in documents:
+                text = doc["content"]
+                
+                # Create unique ID based on content hash
+                doc_id = chunk_id(text)
+                
+                payload = {
                     "url": doc["url"],
+                    "domain": get_domain(doc["url"]),
+                    "ingested_at": ingested_at,
                     "chunk_index": doc.get("chunk_index", 0),
                     "metadata": doc.get("metadata", {})
                 }
+                if settings.slim_payloads:
+                    side_texts[doc_id] = text
+                else:
+                    payload["content"] = text
+                ids.append(doc_id)
+                payloads.append(payload)
+        
+        # Text goes in first so a point is never searchable without it
+        if side_texts:
+            with track_stage("upsert_chunk_text"):
+                save_chunks(side_texts)
+                count_items("upsert_chunk_text", len(side_texts))
+        return ids, np.asarray(embeddings, dtype=np.float32), payloads
+    
+    def _write_batch(self, stage: str, ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]],
+                     wait: bool):
+        with track_stage(stage, points=len(ids)):
+            self.backend.add_vectors(ids, vectors, payloads, wait=wait)
+            count_items(stage, len(ids))
+    
+    def _write_to_migration_target(self, documents: List[Dict[str, Any]], ids: List[str],
+                                   payloads: List[Dict[str, Any]]):
+        """Dual-write during a model migration so the new collection never falls behind"""
+        with track_stage("upsert_migration_target", model=self.migration_model):
+            target_service = EmbeddingService(self.migration_model)
+            target = create_backend(self.migration_model, target_service.dimension)
+            vectors = target_service.embed_batch(
+                [doc["content"] for doc in documents], stored=self._stored_vectors(target)
             )
-            points.append(point)
+            target.add_vectors(ids, vectors, payloads)
+    
+    def _stored_vectors(self, backend):
+        return stored_vector_lookup(backend) if settings.embedding_store_fallback else None
+    
+    def search(self, query: str, limit: int = 5, query_filter: Optional[Filter] = None) -> List[Dict[str, Any]]:
+        """Search for similar documents, optionally restricted by a build_filter() filter"""
+        with track_stage("search_embed", query_chars=len(query)):
+            query_embedding = self.embedding_service.embed_text(query)
         
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=points
-        )
+        with track_stage(f"search_{self.backend.name}", limit=limit, filtered=query_filter is not None):
+            results = self.backend.search([query_embedding], limit, query_filter)[0]
+            annotate(results=len(results))
+        
+        return self._format_results(results)
     
-    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
-        """Search for similar documents"""
-        query_embedding = self.embedding_service.embed_text(query)
+    def search_batch(self, queries: List[str], limit: int = 5,
+                     query_filter: Optional[Filter] = None) -> List[List[Dict[str, Any]]]:
+        """Search several queries with one embedding batch and one backend request"""
+        if not queries:
+            return []
+        with track_stage("search_batch_embed", queries=len(queries)):
+            query_embeddings = self.embedding_service.embed_batch(queries)
         
-        results = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=query_embedding,
-            limit=limit
-        )
+        stage = f"search_batch_{self.backend.name}"
+        with track_stage(stage, queries=len(queries), limit=limit):
+            batches = self.backend.search(query_embeddings, limit, query_filter)
+            count_items(stage, len(queries))
         
+        return [self._format_results(results) for results in batches]
+    
+    def _format_results(self, results: List[ScoredPoint]) -> List[Dict[str, Any]]:
         return [
             {
-                "content": result.payload["content"],
+                # Qdrant servers return the md5 ids in UUID form; chunk_texts uses plain hex
+                "id": str(result.id).replace("-", ""),
+                # None for slim payloads until load_content() fills it in
+                "content": result.payload.get("content"),
                 "url": result.payload["url"],
                 "score": result.score,
                 "metadata": result.payload.get("metadata", {})
             }
             for result in results
         ]
+    
+    def load_content(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fill in text for slim-payload results with one batched side-store read"""
+        missing = [result["id"] for result in results if result["content"] is None]
+        if missing:
+            with track_stage("chunk_text_load", chunks=len(missing)):
+                texts = load_chunks(missing)
+            for result in results:
+                if result["content"] is None:
+                    result["content"] = texts.get(result["id"], "")
+        return results
@@ -0,0 +1,81 @@
+import hashlib
+import re
+import time
+from typing import Dict, Optional
+from src.config.settings import settings
+from src.services.redis_client import get_redis
+
+# Every embedding model gets its own collection, local index directory and
+# embedding-cache namespace, so vector spaces are never mixed. Which model
+# serves reads, and any migration in progress, is shared state in Redis:
+#   settings.vector_active_model_key  -> model name (absent: EMBEDDING_MODEL)
+#   settings.vector_migration_key     -> hash describing a re-embedding run
+
+def model_slug(model: str) -> str:
+    """Readable, collision-safe identifier for a model name"""
+    name = re.sub(r"[^a-z0-9]+", "-", model.rstrip("/").split("/")[-1].lower()).strip("-")
+    return f"{name}-{hashlib.md5(model.encode()).hexdigest()[:8]}"
+
+def collection_for_model(model: str) -> str:
+    return f"{settings.qdrant_collection_name}__{model_slug(model)}"
+
+def get_active_model() -> str:
+    """Model whose collection serves reads"""
+    try:
+        return get_redis().get(settings.vector_active_model_key) or settings.embedding_model
+    except Exception:
+        return settings.embedding_model
+
+def set_active_model(model: str):
+    get_redis().set(settings.vector_active_model_key, model)
+
+def get_migration() -> Optional[Dict[str, str]]:
+    """The re-embedding run in progress, if any.
+
+    Fields: model (target), source_model, status (running, paused, ready),
+    cursor (JSON scroll offset), migrated, skipped, started_at, updated_at,
+    chain (token of the task chain currently driving it).
+    """
+    try:
+        migration = get_redis().hgetall(settings.vector_migration_key)
+    except Exception:
+        return None
+    return migration or None
+
+def start_migration(model: str) -> Dict[str, str]:
+    active = get_active_model()
+    if model == active:
+        raise ValueError(f"{model} is already the active model")
+    current = get_migration()
+    if current and current["model"] != model:
+        raise ValueError(f"A migration to {current['model']} is already in progress")
+    if current:
+        return current
+    now = str(time.time())
+    migration = {
+        "model": model,
+        "source_model": active,
+        "status": "running",
+        "cursor": "null",
+        "migrated": "0",
+        "skipped": "0",
+        "started_at": now,
+        "updated_at": now,
+    }
+    get_redis().hset(settings.vector_migration_key, mapping=migration)
+    return migration
+
+def update_migration(**fields):
+    fields["updated_at"] = time.time()
+    get_redis().hset(settings.vector_migration_key, mapping={k: str(v) for k, v in fields.items()})
+
+def clear_migration():
+    get_redis().delete(settings.vector_migration_key)
+
+def advance_migration(cursor_json: str, migrated: int, skipped: int):
+    """Record one re-embedded batch"""
+    pipe = get_redis().pipeline()
+    pipe.hset(settings.vector_migration_key, mapping={"cursor": cursor_json, "updated_at": str(time.time())})
+    pipe.hincrby(settings.vector_migration_key, "migrated", migrated)
+    pipe.hincrby(settings.vector_migration_key, "skipped", skipped)
+    pipe.execute()
@@ -1,5 +1,14 @@
+import os
 from celery import Celery
+from celery.signals import worker_init, worker_process_shutdown
+from prometheus_client import start_http_server
+from prometheus_client import multiprocess
 from src.config.settings import settings
+from src.services.metrics import get_registry
+
+# Priority lanes: workers drain interactive before bulk (see queue_order_strategy)
+INTERACTIVE_QUEUE = "interactive"
+BULK_QUEUE = "bulk"
 
 # Create Celery app
 celery_app = Celery(
@@ -19,4 +28,40 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=300,  # 5 minutes
     worker_prefetch_multiplier=1,
+    task_default_queue=INTERACTIVE_QUEUE,
+    broker_transport_options={"queue_order_strategy": "priority"},
 )
+
+# Periodic jobs (run `celery -A src.workers.celery_app beat` alongside the workers)
+celery_app.conf.beat_schedule = {
+    "reconcile-status-counts": {
+        "task": "src.workers.tasks.reconcile_status_counts_task",
+        "schedule": float(settings.status_reconcile_interval),
+    },
+    # Watchdog: continues a re-embedding run whose task chain was lost
+    "resume-reembedding": {
+        "task": "src.workers.tasks.reembed_collection_task",
+        "schedule": float(settings.reembed_stall_seconds),
+        "kwargs": {"resume": True},
+    },
+}
+if settings.recrawl_enabled:
+    celery_app.conf.beat_schedule["enqueue-due-recrawls"] = {
+        "task": "src.workers.tasks.enqueue_due_recrawls_task",
+        "schedule": float(settings.recrawl_check_interval),
+    }
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    """Expose worker metrics on http://<worker>:WORKER_METRICS_PORT/metrics.
+
+    With the prefork pool, set PROMETHEUS_MULTIPROC_DIR so the metrics of all
+    child processes are aggregated; otherwise only the parent's are visible.
+    """
+    if settings.worker_metrics_port:
+        start_http_server(settings.worker_metrics_port, registry=get_registry())
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid or os.getpid())
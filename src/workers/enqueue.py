@@ -0,0 +1,18 @@
+from typing import Optional
+from src.workers.celery_app import celery_app, INTERACTIVE_QUEUE
+
+# Sent by name, so enqueuing (e.g. from the API) never imports the worker
+# code behind it: scraper, Playwright, trafilatura, embedding models
+PROCESS_URL_TASK = "src.workers.tasks.process_url_task"
+
+def enqueue_url(url: str, force_refresh: bool = False, lane: str = INTERACTIVE_QUEUE,
+                countdown: Optional[float] = None, task_id: Optional[str] = None, **task_kwargs):
+    """Queue process_url_task on a priority lane (interactive or bulk)"""
+    return celery_app.send_task(
+        PROCESS_URL_TASK,
+        args=[url, force_refresh],
+        kwargs={"lane": lane, **task_kwargs},
+        queue=lane,
+        countdown=countdown,
+        task_id=task_id
+    )
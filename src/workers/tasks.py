@@ -1,52 +1,173 @@
 import asyncio
 import hashlib
+import json
+import random
+import time
+import uuid
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Optional
+from celery import chord
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from src.workers.celery_app import celery_app
-from src.services.scraper import ContentProcessor
-from src.services.vector_store import VectorStore
+from src.config.settings import settings
+from src.workers.celery_app import celery_app, INTERACTIVE_QUEUE, BULK_QUEUE
+from src.workers.enqueue import enqueue_url
+from src.services.scraper import ContentProcessor, RateLimitedError, HostUnavailableError
+from src.services.vector_store import VectorStore, create_backend
+from src.services.embeddings import EmbeddingService
+from src.services.chunk_store import load_chunks
+from src.services.redis_client import get_redis
+from src.services.vector_versions import get_migration, advance_migration, update_migration
 from src.database.connection import SessionLocal
 from src.models.ingestion import URLIngestion
+from src.services.metrics import track_stage
+from src.services.tracing import start_trace
+from src.services.politeness import DomainScheduler
+from src.services.circuit_breaker import DomainCircuitBreaker, retry_delay
+from src.services.dead_letters import push_dead_letter
+from src.services.ingest_lease import IngestLease
+from src.services.url_utils import get_domain, interleave_by_domain
+from src.services.recrawl import record_fetch, RecrawlBudget
+from src.services.events import publish_status
+from src.services.status_counts import reconcile_status_counts
+from src.services.near_duplicates import find_near_duplicate, record_fingerprint, detach_drifted_duplicates
+from src.services.fanout import DocumentProgress
+
+def _defer(url: str, force_refresh: bool, wait: float, lane: str, holder: Optional[str] = None, **task_kwargs):
+    """Re-queue with a countdown instead of holding the worker (rate limit, open breaker, retry back-off).
+
+    The URL's in-flight lease passes from `holder` to the new task.
+    """
+    countdown = wait * random.uniform(1.0, 1.25)  # jitter so deferred tasks don't stampede
+    deferred = enqueue_url(url, force_refresh, lane=lane, countdown=countdown, **task_kwargs)
+    if holder:
+        IngestLease().hand_over(url, holder, deferred.id, countdown + settings.ingest_lease_ttl)
+    return {
+        "status": "deferred",
+        "retry_in": round(countdown, 3),
+        "deferred_task_id": deferred.id
+    }
+
+def _set_status(db: Session, url_record: URLIngestion, status: str,
+                batch_id: Optional[str] = None, **extra):
+    """Commit a status transition and publish it to watchers"""
+    url_record.status = status
+    db.commit()
+    publish_status(url_record.id, url_record.url, status, batch_id, **extra)
+
+def _fail(db: Session, url_record: Optional[URLIngestion], url: str, error: Exception, attempt: int,
+          lane: str, batch_id: Optional[str] = None):
+    """Mark the URL failed for good and add it to the dead-letter list"""
+    if url_record:
+        url_record.error_message = str(error)
+        _set_status(db, url_record, "failed", batch_id, error=str(error))
+    push_dead_letter(url, str(error), attempt + 1, lane, batch_id)
 
 @celery_app.task(bind=True)
-def process_url_task(self, url: str, force_refresh: bool = False):
-    """Celery task to process URL content with caching"""
+def process_url_task(self, url: str, force_refresh: bool = False,
+                     debug_trace: bool = False, debug_profile: bool = False,
+                     lane: str = INTERACTIVE_QUEUE, recrawl: bool = False,
+                     batch_id: Optional[str] = None, attempt: int = 0):
+    """Celery task to process URL content with caching.
+
+    With debug_trace (or debug_profile) the span tree is returned under
+    "trace" in the task result. If the URL's domain is over its rate or
+    concurrency limit, or its circuit breaker is open, the task re-queues
+    itself with a countdown. Host failures are retried with exponential
+    back-off; permanent failures go to the dead-letter list. The URL's
+    in-flight lease follows the task through deferrals and fan-out and is
+    released once the URL reaches a final state. Recrawls bypass the content
+    cache but still skip unchanged content.
+    """
+    task_kwargs = {"debug_trace": debug_trace, "debug_profile": debug_profile,
+                   "recrawl": recrawl, "batch_id": batch_id, "attempt": attempt}
+    domain = get_domain(url)
+    task_id = self.request.id
+    lease_id = task_id or url
+    breaker = DomainCircuitBreaker() if settings.circuit_breaker_enabled else None
+    if breaker:
+        # Probe identity is the URL, so a probe deferred by the rate limiter keeps its lease
+        wait = breaker.check(domain, url)
+        if wait:
+            return _defer(url, force_refresh, wait, lane, task_id, **task_kwargs)
+    scheduler = DomainScheduler() if settings.domain_politeness_enabled else None
+    if scheduler:
+        wait = scheduler.acquire(domain, lease_id)
+        if wait:
+            return _defer(url, force_refresh, wait, lane, task_id, **task_kwargs)
     
     # Use default database connection
     db = SessionLocal()
+    url_record = None
+    leases = IngestLease()
     try:
         url_record = db.query(URLIngestion).filter(URLIngestion.url == url).first()
         if url_record:
-            url_record.status = "processing"
-            db.commit()
+            _set_status(db, url_record, "processing", batch_id)
         
         # Process the URL
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         
+        trace = start_trace("ingest", profile=debug_profile, url=url) if (debug_trace or debug_profile) else nullcontext()
         try:
-            result = loop.run_until_complete(_process_url_async(url, db, force_refresh))
+            with trace as root:
+                with track_stage("ingest_task"):
+                    result = loop.run_until_complete(
+                        _process_url_async(url, db, force_refresh, recrawl, batch_id, lane, task_id)
+                    )
+            if root is not None:
+                result["trace"] = root.to_dict()
+            if breaker:
+                breaker.record_success(domain)
             return result
         finally:
             loop.close()
             
-    except Exception as e:
-        # Update status to failed
+    except RateLimitedError as e:
+        # The site pushed back: back off the whole domain and try again later
+        wait = scheduler.penalize(domain, e.retry_after) if scheduler else (e.retry_after or settings.domain_penalty_seconds)
+        if breaker:
+            breaker.record_success(domain)  # the host is up, just busy
         if url_record:
-            url_record.status = "failed"
-            url_record.error_message = str(e)
-            db.commit()
+            _set_status(db, url_record, "pending", batch_id, retry_in=wait)
+        return _defer(url, force_refresh, wait, lane, task_id, **task_kwargs)
+    except HostUnavailableError as e:
+        if breaker:
+            breaker.record_failure(domain)
+        if attempt < settings.retry_max_attempts:
+            wait = retry_delay(attempt + 1)
+            if url_record:
+                url_record.error_message = str(e)
+                _set_status(db, url_record, "pending", batch_id, retry_in=wait, attempt=attempt + 1, error=str(e))
+            deferred = _defer(url, force_refresh, wait, lane, task_id, **{**task_kwargs, "attempt": attempt + 1})
+            return {**deferred, "status": "retrying", "attempt": attempt + 1, "error": str(e)}
+        _fail(db, url_record, url, e, attempt, lane, batch_id)
+        raise
+    except Exception as e:
+        # Not a host failure: retrying won't change the outcome
+        if breaker:
+            breaker.record_success(domain)
+        _fail(db, url_record, url, e, attempt, lane, batch_id)
         raise
     finally:
+        if scheduler:
+            scheduler.release(domain, lease_id)
+        if task_id:
+            leases.release(url, task_id)  # no-op once handed to a deferred task or chord callback
         db.close()
 
-async def _process_url_async(url: str, db: Session, force_refresh: bool = False):
+async def _process_url_async(url: str, db: Session, force_refresh: bool = False, recrawl: bool = False,
+                             batch_id: Optional[str] = None, lane: str = INTERACTIVE_QUEUE,
+                             lease_id: Optional[str] = None):
     """Async function to process URL with content change detection"""
     processor = ContentProcessor()
     vector_store = VectorStore()
     
     try:
         # Fetch content with caching
-        content_data = await processor.fetch_content(url, force_refresh)
+        content_data = await processor.fetch_content(url, force_refresh or recrawl)
         content = content_data["content"]
         content_hash = content_data["content_hash"]
         from_cache = content_data["from_cache"]
@@ -58,11 +179,14 @@ async def _process_url_async(url: str, db: Session, force_refresh: bool = False)
         # Get URL record
         url_record = db.query(URLIngestion).filter(URLIngestion.url == url).first()
         
+        # Feed the recrawl scheduler with what this fetch observed
+        if url_record and not from_cache:
+            record_fetch(url_record, content_hash)
+        
         # Check if we need to reprocess
         if url_record and url_record.content_hash == content_hash and not force_refresh:
             # Content hasn't changed, mark as completed
-            url_record.status = "completed"
-            db.commit()
+            _set_status(db, url_record, "completed", batch_id, unchanged=True)
             return {
                 "status": "completed",
                 "message": "Content unchanged, skipped processing",
@@ -70,6 +194,25 @@ async def _process_url_async(url: str, db: Session, force_refresh: bool = False)
                 "from_cache": from_cache
             }
         
+        # Mirrors, print versions and tracking variants link to the page already indexed
+        if url_record and settings.near_duplicate_enabled:
+            fingerprint = processor.fingerprint(content)
+            if fingerprint is not None:
+                original = find_near_duplicate(db, url_record.id, fingerprint)
+                record_fingerprint(db, url_record.id, fingerprint, original.id if original else None)
+                if not original:
+                    _requeue_drifted_duplicates(db, url_record, fingerprint)
+                if original:
+                    url_record.content_hash = content_hash
+                    _set_status(db, url_record, "completed", batch_id, duplicate_of=original.id)
+                    return {
+                        "status": "completed",
+                        "message": "Near duplicate of an indexed page, skipped embedding",
+                        "duplicate_of": original.url,
+                        "content_hash": content_hash,
+                        "from_cache": from_cache
+                    }
+        
         # Content has changed or is new, process it
         documents = processor.chunk_content(content, url)
         
@@ -82,14 +225,16 @@ async def _process_url_async(url: str, db: Session, force_refresh: bool = False)
             # vector store cleanup for changed content
             pass
         
+        if url_record and settings.fanout_min_chunks and len(documents) >= settings.fanout_min_chunks:
+            return _fan_out(db, url_record, documents, content_hash, lane, batch_id, lease_id)
+        
         # Store in vector database
         vector_store.add_documents(documents)
         
         # Update database record
         if url_record:
-            url_record.status = "completed"
             url_record.content_hash = content_hash
-            db.commit()
+            _set_status(db, url_record, "completed", batch_id, chunks_created=len(documents))
         
         return {
             "status": "completed",
@@ -99,6 +244,8 @@ async def _process_url_async(url: str, db: Session, force_refresh: bool = False)
             "content_changed": content_changed
         }
         
+    except (RateLimitedError, HostUnavailableError):
+        raise
     except Exception as e:
         # Update status to failed
         url_record = db.query(URLIngestion).filter(URLIngestion.url == url).first()
@@ -107,3 +254,204 @@ async def _process_url_async(url: str, db: Session, force_refresh: bool = False)
             url_record.error_message = str(e)
             db.commit()
         raise
+
+def _requeue_drifted_duplicates(db: Session, url_record: URLIngestion, fingerprint: int):
+    """This page changed: duplicates that no longer match it are embedded on their own"""
+    drifted = detach_drifted_duplicates(db, url_record.id, fingerprint)
+    if not drifted:
+        return
+    db.commit()
+    leases = IngestLease()
+    for record in drifted:
+        task_id = str(uuid.uuid4())
+        if leases.claim(record.url, task_id) is not None:
+            continue  # already in flight; it will be fingerprinted again anyway
+        # force_refresh: its stored hash is current, but it has no chunks
+        enqueue_url(record.url, True, lane=BULK_QUEUE, task_id=task_id)
+
+def _fan_out(db: Session, url_record: URLIngestion, documents, content_hash: str, lane: str,
+             batch_id: Optional[str] = None, lease_id: Optional[str] = None):
+    """Embed a large document with parallel sub-tasks; a chord callback completes the record.
+
+    Batches stored by an earlier, partly failed run of the same content are
+    skipped. The record stays "processing" until finalize_document_task runs.
+    The URL's lease (held by lease_id) passes to the callback before the
+    chord is sent, so the callback can't finish before it owns the lease.
+    """
+    size = settings.fanout_batch_size
+    batches = [documents[start:start + size] for start in range(0, len(documents), size)]
+    done = DocumentProgress(url_record.id, content_hash).completed()
+    header = [
+        embed_chunks_task.si(url_record.id, content_hash, index, batch).set(queue=lane)
+        for index, batch in enumerate(batches) if index not in done
+    ]
+    finalize_task_id = str(uuid.uuid4())
+    callback = finalize_document_task.si(url_record.id, content_hash, len(documents), batch_id).set(
+        queue=lane, task_id=finalize_task_id
+    )
+    callback.link_error(document_failed_task.s(url_record.id, batch_id, finalize_task_id).set(queue=lane))
+    if lease_id:
+        # Only an existing lease moves: one that expired meanwhile isn't re-created
+        IngestLease().hand_over(url_record.url, lease_id, finalize_task_id, settings.ingest_lease_ttl,
+                                take_missing=False)
+    result = chord(header)(callback) if header else callback.apply_async()
+    publish_status(url_record.id, url_record.url, "processing", batch_id,
+                   subtasks=len(header), resumed_batches=len(done))
+    return {
+        "status": "fanned_out",
+        "chunks": len(documents),
+        "subtasks": len(header),
+        "resumed_batches": len(done),
+        "content_hash": content_hash,
+        "finalize_task_id": result.id
+    }
+
+@celery_app.task(autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def embed_chunks_task(url_id: int, content_hash: str, batch_index: int, documents):
+    """Embed and upsert one batch of a fanned-out document (no-op if an earlier run stored it)"""
+    progress = DocumentProgress(url_id, content_hash)
+    if progress.is_done(batch_index):
+        return {"batch": batch_index, "skipped": True}
+    with track_stage("fanout_batch", chunks=len(documents)):
+        VectorStore().add_documents(documents)
+    progress.mark_done(batch_index)
+    return {"batch": batch_index, "chunks": len(documents)}
+
+@celery_app.task(bind=True)
+def finalize_document_task(self, url_id: int, content_hash: str, chunks: int, batch_id: Optional[str] = None):
+    """Chord callback: every batch is stored, so the document is complete"""
+    db = SessionLocal()
+    try:
+        url_record = db.query(URLIngestion).filter(URLIngestion.id == url_id).first()
+        if url_record:
+            url_record.content_hash = content_hash
+            url_record.error_message = None
+            _set_status(db, url_record, "completed", batch_id, chunks_created=chunks)
+            IngestLease().release(url_record.url, self.request.id)
+        DocumentProgress(url_id, content_hash).clear()
+        return {"status": "completed", "chunks_created": chunks}
+    finally:
+        db.close()
+
+@celery_app.task
+def document_failed_task(request, exc, traceback, url_id: int, batch_id: Optional[str] = None,
+                         lease_id: Optional[str] = None):
+    """Chord error callback: mark the document failed, keeping finished batches for a resume.
+
+    lease_id is the chord callback's id, which holds the URL's lease.
+    """
+    db = SessionLocal()
+    try:
+        url_record = db.query(URLIngestion).filter(URLIngestion.id == url_id).first()
+        if url_record:
+            url_record.error_message = f"Embedding sub-task failed: {exc}"
+            _set_status(db, url_record, "failed", batch_id, error=url_record.error_message)
+            push_dead_letter(url_record.url, url_record.error_message, 1, batch_id=batch_id)
+            IngestLease().release(url_record.url, lease_id)
+    finally:
+        db.close()
+
+@celery_app.task
+def enqueue_due_recrawls_task():
+    """Periodic: queue completed URLs whose next_fetch_at has passed, within the hourly budget"""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        due = db.query(URLIngestion).filter(
+            URLIngestion.status == "completed",
+            # NULL: ingested before change tracking existed
+            or_(URLIngestion.next_fetch_at <= now, URLIngestion.next_fetch_at.is_(None))
+        ).order_by(URLIngestion.next_fetch_at.asc().nullslast()).limit(settings.recrawl_batch_size).all()
+        
+        granted = RecrawlBudget().take(len(due), now)
+        due = due[:granted]
+        if not due:
+            return {"queued": 0}
+        
+        # Push next_fetch_at out so the next beat doesn't queue them again; the
+        # task sets the real value, and a lost task just comes back later
+        for record in due:
+            record.next_fetch_at = now + timedelta(seconds=settings.recrawl_min_interval)
+        db.commit()
+        
+        leases = IngestLease()
+        queued = 0
+        for url in interleave_by_domain([record.url for record in due]):
+            task_id = str(uuid.uuid4())
+            if leases.claim(url, task_id) is not None:
+                continue  # already in flight from a user submission
+            enqueue_url(url, lane=BULK_QUEUE, recrawl=True, task_id=task_id)
+            queued += 1
+        return {"queued": queued, "in_flight": len(due) - queued}
+    finally:
+        db.close()
+
+@celery_app.task
+def reconcile_status_counts_task():
+    """Periodic: recount url_ingestions by status and correct counter drift"""
+    db = SessionLocal()
+    try:
+        return {"drift": reconcile_status_counts(db)}
+    finally:
+        db.close()
+
+@celery_app.task
+def reembed_collection_task(resume: bool = False, chain: Optional[str] = None):
+    """Re-embed one batch of the active collection into the migration target, then queue the next.
+
+    Progress lives in Redis, so the run survives worker restarts; beat calls
+    this with resume=True and it only continues a run that has stalled.
+    Each chain carries a token stored with the migration. A call without one
+    (a kick from the CLI or the watchdog) starts a new chain, and any older
+    chain stops at its next step, so only one chain re-queues itself.
+    """
+    redis_client = get_redis()
+    lock_key = f"{settings.vector_migration_key}:lock"
+    if not redis_client.set(lock_key, "1", nx=True, ex=600):
+        return {"status": "busy"}
+    started = time.perf_counter()
+    try:
+        # Read under the lock, so the cursor is never one another run has already consumed
+        migration = get_migration()
+        if not migration or migration["status"] != "running":
+            return {"status": migration["status"] if migration else "idle"}
+        if resume and time.time() - float(migration["updated_at"]) < settings.reembed_stall_seconds:
+            return {"status": "running"}
+        if chain is None:
+            chain = uuid.uuid4().hex
+            update_migration(chain=chain)
+        elif migration.get("chain") != chain:
+            return {"status": "superseded"}
+        with track_stage("reembed_batch"):
+            processed, done = _reembed_batch(migration)
+    finally:
+        redis_client.delete(lock_key)
+    
+    if done:
+        update_migration(status="ready")
+        return {"status": "ready", "processed": processed}
+    # Pace the chain to REEMBED_RATE_LIMIT chunks/sec
+    pace = processed / settings.reembed_rate_limit if settings.reembed_rate_limit > 0 else 0.0
+    reembed_collection_task.apply_async(kwargs={"chain": chain}, queue=BULK_QUEUE,
+                                        countdown=max(0.0, pace - (time.perf_counter() - started)))
+    return {"status": "running", "processed": processed}
+
+def _reembed_batch(migration):
+    """Embed the next page of source points with the target model from their stored text"""
+    source = create_backend(migration["source_model"])
+    target_service = EmbeddingService(migration["model"])
+    target = create_backend(migration["model"], target_service.dimension)
+    
+    ids, _, payloads, next_cursor = source.scroll(json.loads(migration["cursor"]), settings.reembed_batch_size)
+    # Slim payloads keep their text in the side store
+    side_texts = load_chunks([pid for pid, payload in zip(ids, payloads) if payload.get("content") is None])
+    batch = [
+        (pid, payload.get("content") or side_texts.get(pid), payload)
+        for pid, payload in zip(ids, payloads)
+    ]
+    batch = [item for item in batch if item[1]]
+    if batch:
+        vectors = target_service.embed_uncached([text for _, text, _ in batch])
+        target.add_vectors([pid for pid, _, _ in batch], vectors, [payload for _, _, payload in batch])
+    advance_migration(json.dumps(next_cursor), migrated=len(batch), skipped=len(ids) - len(batch))
+    return len(ids), next_cursor is None
@@ -1,6 +1,8 @@
 import pytest
+from unittest.mock import AsyncMock, Mock, patch
 from fastapi.testclient import TestClient
 from src.api.main import app
+from src.api.dependencies import get_db
 
 client = TestClient(app)
 
@@ -16,6 +18,12 @@ def test_health():
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
 
+def test_metrics():
+    """Test Prometheus metrics endpoint"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "rag_stage_duration_seconds" in response.text
+
 def test_ingest_url_invalid():
     """Test URL ingestion with invalid URL"""
     response = client.post("/api/ingest-url", json={"url": "invalid-url"})
@@ -25,3 +33,54 @@ def test_query_empty():
     """Test query with empty string"""
     response = client.post("/api/query", json={"query": ""})
     assert response.status_code == 400
+
+def test_duplicate_submission_attaches_to_in_flight_task():
+    """A URL that already has a task in flight is not queued again"""
+    db = Mock()
+    db.query.return_value.filter.return_value.first.return_value = Mock(id=3, status="processing")
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        with patch("src.api.routes.ingest.claim_async", AsyncMock(return_value="task-1")), \
+             patch("src.api.routes.ingest.enqueue_url") as enqueue:
+            response = client.post("/api/ingest-url", json={"url": "https://example.com/a?utm_source=x"})
+    finally:
+        app.dependency_overrides.clear()
+    
+    assert response.status_code == 200
+    assert response.json()["task_id"] == "task-1"
+    assert response.json()["status"] == "processing"
+    enqueue.assert_not_called()
+
+def test_query_filter_matches_canonical_urls():
+    """A URL filter spelled differently from the stored (canonical) URL still reaches its chunks and duplicates"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from src.api.dependencies import get_vector_store, get_llm_service
+    from src.database.connection import Base
+    from src.models.ingestion import URLIngestion
+    from src.services.near_duplicates import record_fingerprint
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    original, mirror = (URLIngestion(url=url, status="completed")
+                        for url in ("https://origin.example/a", "https://mirror.example/a?id=1"))
+    db.add_all([original, mirror])
+    db.commit()
+    record_fingerprint(db, mirror.id, 1, duplicate_of_id=original.id)
+    db.commit()
+    vector_store = Mock()
+    vector_store.search.return_value = []
+    vector_store.load_content.return_value = []
+    app.dependency_overrides.update({get_db: lambda: db, get_vector_store: lambda: vector_store,
+                                     get_llm_service: lambda: Mock()})
+    try:
+        with patch("src.api.routes.query.build_filter") as build_filter:
+            response = client.post("/api/query", json={
+                "query": "what?", "urls": ["HTTPS://Mirror.example:443/a?utm_source=news&id=1#intro"]
+            })
+    finally:
+        app.dependency_overrides.clear()
+    
+    assert response.status_code == 200
+    assert build_filter.call_args.kwargs["urls"] == ["https://mirror.example/a?id=1", "https://origin.example/a"]
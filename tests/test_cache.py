@@ -0,0 +1,34 @@
+from src.services.cache import CacheService, AsyncCacheService
+from src.services.redis_client import get_redis_pool, get_pool_stats
+
+def test_cache_services_share_pool():
+    """Every CacheService uses the same process-wide connection pool"""
+    first = CacheService()
+    second = CacheService()
+    assert first.redis_client.connection_pool is second.redis_client.connection_pool
+    assert first.redis_client.connection_pool is get_redis_pool()
+
+def test_async_cache_shares_pool():
+    """AsyncCacheService instances share the asyncio pool"""
+    assert AsyncCacheService().redis_client.connection_pool is AsyncCacheService().redis_client.connection_pool
+
+def test_pool_stats():
+    """Pool stats report configured size and usage"""
+    CacheService()
+    stats = get_pool_stats()["sync"]
+    assert stats["max_connections"] == get_redis_pool().max_connections
+    assert stats["in_use_connections"] == 0
+
+def test_pool_waits_for_a_free_connection():
+    """A full pool makes the caller wait for a connection instead of raising"""
+    import os
+    import threading
+    from unittest.mock import Mock, patch
+    from src.config.settings import settings
+    from src.services import redis_client
+    with patch.object(settings, "redis_max_connections", 1), patch.object(redis_client, "_pool", None):
+        pool = get_redis_pool()
+        pool.make_connection = lambda: Mock(pid=os.getpid(), can_read=Mock(return_value=False))
+        held = pool.get_connection("PING")
+        threading.Timer(0.1, pool.release, [held]).start()
+        assert pool.get_connection("PING") is held
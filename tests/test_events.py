@@ -0,0 +1,13 @@
+import json
+import asyncio
+from src.services.events import StatusEventHub
+
+def test_terminal_event_reaches_a_full_queue():
+    """A watcher that fell behind still gets the completed event, at the cost of a progress event"""
+    hub = StatusEventHub()
+    queue = asyncio.Queue(maxsize=2)
+    hub._watchers["url:1"].add(queue)
+    for status in ("processing", "embedding", "indexing", "completed"):
+        hub._dispatch(json.dumps({"url_id": 1, "url": "https://example.com/a", "status": status}))
+    
+    assert [queue.get_nowait()["status"] for _ in range(queue.qsize())] == ["embedding", "completed"]
@@ -0,0 +1,41 @@
+import asyncio
+import hashlib
+import httpx
+import pytest
+from src.config.settings import settings
+from src.services.scraper import download_page, ContentRejectedError
+
+def _download(handler):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await download_page(client, "https://example.com/page")
+    return asyncio.run(run())
+
+async def _blocks(*blocks):
+    for block in blocks:
+        yield block
+
+def test_streamed_body_is_decoded_and_hashed():
+    """Multi-byte characters split across blocks decode correctly; the hash covers the raw bytes"""
+    body = "<p>café ☕</p>".encode("utf-8")
+    result = _download(lambda request: httpx.Response(
+        200, headers={"Content-Type": "text/html; charset=utf-8"}, content=_blocks(body[:7], body[7:11], body[11:])
+    ))
+    assert result.text == "<p>café ☕</p>"
+    assert result.raw_hash == hashlib.sha256(body).hexdigest()
+    assert result.size == len(body)
+
+def test_unsupported_content_type_rejected():
+    """Non-page resources are rejected from the headers, before the body is read"""
+    with pytest.raises(ContentRejectedError, match="application/pdf"):
+        _download(lambda request: httpx.Response(200, headers={"Content-Type": "application/pdf"}, content=b"%PDF"))
+
+def test_oversized_body_rejected(monkeypatch):
+    """Bodies over the cap are rejected by declared length, or mid-stream without one"""
+    monkeypatch.setattr(settings, "fetch_max_bytes", 1000)
+    with pytest.raises(ContentRejectedError):
+        _download(lambda request: httpx.Response(200, headers={"Content-Type": "text/html"}, content=b"x" * 2000))
+    with pytest.raises(ContentRejectedError, match="exceeds"):
+        _download(lambda request: httpx.Response(
+            200, headers={"Content-Type": "text/html"}, content=_blocks(*[b"x" * 400] * 5)
+        ))
@@ -0,0 +1,86 @@
+import asyncio
+import httpx
+from src.config.settings import settings
+from src.services.llm_client import LLMClient, LLMOverloaded
+
+def _client(monkeypatch, base_urls, max_concurrency=2, queue_depth=32, delay=0.05):
+    monkeypatch.setattr(settings, "llm_max_concurrency", max_concurrency)
+    monkeypatch.setattr(settings, "llm_queue_max_depth", queue_depth)
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.host)
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json={"response": "ok"})
+
+    client = LLMClient(base_urls)
+    client.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client, calls
+
+def test_identical_requests_coalesce(monkeypatch):
+    """Concurrent identical prompts share one upstream generation"""
+    async def scenario():
+        client, calls = _client(monkeypatch, ["http://ollama"])
+        results = await asyncio.gather(*(client.generate({"prompt": "same"}) for _ in range(5)))
+        return results, calls
+
+    results, calls = asyncio.run(scenario())
+    assert all(result == {"response": "ok"} for result in results)
+    assert len(calls) == 1
+
+def test_admission_fast_fails_when_queue_full(monkeypatch):
+    """Beyond the slots and the wait queue, requests are rejected without waiting"""
+    async def scenario():
+        client, calls = _client(monkeypatch, ["http://ollama"], max_concurrency=1, queue_depth=1)
+        results = await asyncio.gather(
+            *(client.generate({"prompt": f"q{i}"}) for i in range(3)), return_exceptions=True
+        )
+        return results, calls
+
+    results, calls = asyncio.run(scenario())
+    assert [isinstance(result, LLMOverloaded) for result in results] == [False, False, True]
+    assert len(calls) == 2
+
+def test_least_loaded_routing(monkeypatch):
+    """Generations spread over backends instead of queueing on the first one"""
+    async def scenario():
+        client, calls = _client(monkeypatch, ["http://a", "http://b"], max_concurrency=1)
+        await asyncio.gather(*(client.generate({"prompt": f"q{i}"}) for i in range(2)))
+        return calls
+
+    assert sorted(asyncio.run(scenario())) == ["a", "b"]
+
+def test_only_connection_failures_mark_backend_unhealthy(monkeypatch):
+    """A refused connection takes the backend out of rotation; a read timeout does not"""
+    async def scenario(error):
+        client, _ = _client(monkeypatch, ["http://ollama"])
+
+        async def handler(request):
+            raise error("boom", request=request)
+
+        client.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            await client.generate({"prompt": "q"})
+        except httpx.TransportError:
+            pass
+        return client.backends[0].unhealthy_until > 0
+
+    assert asyncio.run(scenario(httpx.ConnectError))
+    assert not asyncio.run(scenario(httpx.ReadTimeout))
+
+def test_replaced_client_is_closed(monkeypatch):
+    """Rebuilding the shared client (new backends or a new loop) closes the old one's connection pool"""
+    from src.services import llm_client
+    monkeypatch.setattr(llm_client, "_client", None)
+    monkeypatch.setattr(settings, "ollama_base_urls", "http://a:11434")
+
+    async def rebuild():
+        first = llm_client.get_llm_client()
+        monkeypatch.setattr(settings, "ollama_base_urls", "http://b:11434")
+        second = llm_client.get_llm_client()
+        await asyncio.sleep(0)
+        return first, second
+
+    first, second = asyncio.run(rebuild())
+    assert first.http.is_closed and not second.http.is_closed
+    asyncio.run(llm_client.close_llm_client())
@@ -0,0 +1,47 @@
+import numpy as np
+from datetime import datetime, timezone
+from src.services.local_index import MemmapVectorIndex
+from src.services.vector_store import build_filter
+
+def _index(tmp_path, count=200, dim=8):
+    vectors = np.random.default_rng(0).normal(size=(count, dim))
+    index = MemmapVectorIndex(str(tmp_path), dim)
+    index.add_vectors(
+        [f"p{i}" for i in range(count)], vectors,
+        [{"url": f"https://site{i % 2}.com/{i}", "domain": f"site{i % 2}.com", "ingested_at": i} for i in range(count)]
+    )
+    return index, vectors
+
+def test_exact_search_and_filters(tmp_path):
+    """Nearest neighbour is the vector itself; filters restrict by payload"""
+    index, vectors = _index(tmp_path)
+    assert index.search([vectors[5]], 1)[0][0].id == "p5"
+    hits = index.search([vectors[5]], 10, build_filter(domains=["site0.com"]))[0]
+    assert hits and all(hit.payload["domain"] == "site0.com" for hit in hits)
+    recent = index.search([vectors[5]], 10, build_filter(ingested_after=datetime.fromtimestamp(150, timezone.utc)))[0]
+    assert len(recent) == 10 and all(hit.payload["ingested_at"] >= 150 for hit in recent)
+
+def test_tombstones_and_reopen(tmp_path):
+    """Deletes and re-adds survive reopening the files in another instance"""
+    index, vectors = _index(tmp_path)
+    index.delete(["p5"])
+    index.add_vectors(["p6"], [vectors[5]], [{"url": "https://site0.com/new"}])
+    reopened = MemmapVectorIndex(str(tmp_path), vectors.shape[1])
+    assert reopened.count == 199
+    top = reopened.search([vectors[5]], 1)[0][0]
+    assert top.id == "p6" and top.payload["url"] == "https://site0.com/new"
+
+def test_ivf_index(tmp_path, monkeypatch):
+    """The IVF index finds the exact match when its cluster is probed"""
+    from src.config.settings import settings
+    index, vectors = _index(tmp_path)
+    index.build_ann_index(nlist=4)
+    monkeypatch.setattr(settings, "local_index_ann", True)
+    monkeypatch.setattr(settings, "local_index_nprobe", 1)
+    assert index.search([vectors[7]], 1)[0][0].id == "p7"
+
+def test_reopen_without_dimension(tmp_path):
+    """A reader that doesn't know the dimension takes it from the index"""
+    index, vectors = _index(tmp_path, count=10)
+    reopened = MemmapVectorIndex(str(tmp_path))
+    assert reopened.dimension == 8 and reopened.search([vectors[3]], 1)[0][0].id == "p3"
@@ -0,0 +1,62 @@
+import random
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.database.connection import Base
+from src.models.ingestion import URLIngestion
+from src.services.near_duplicates import (simhash, hamming, find_near_duplicate, record_fingerprint,
+                                          detach_drifted_duplicates, expand_duplicate_urls)
+
+def _article(seed, words=600):
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(2000)]
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+def test_simhash_distance():
+    """Small edits move the fingerprint a few bits; different texts are far apart; short texts are skipped"""
+    article = _article(1)
+    print_version = "Print this page. " + article + " Copyright 2024, all rights reserved."
+    assert hamming(simhash(article), simhash(print_version)) <= 3
+    assert hamming(simhash(article), simhash(_article(2))) > 10
+    assert simhash("too short to fingerprint") is None
+
+def test_find_near_duplicate():
+    """Lookup finds completed originals through the band index, never the page itself or other duplicates"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    original, mirror, other = (URLIngestion(url=f"https://{name}.example/a", status="completed")
+                               for name in ("origin", "mirror", "other"))
+    db.add_all([original, mirror, other])
+    db.commit()
+    article = _article(3)
+    record_fingerprint(db, original.id, simhash(article))
+    record_fingerprint(db, other.id, simhash(_article(4)))
+    db.commit()
+
+    fingerprint = simhash(article + " Shared via newsletter")
+    assert find_near_duplicate(db, mirror.id, fingerprint).id == original.id
+    assert find_near_duplicate(db, original.id, simhash(article)) is None
+    record_fingerprint(db, mirror.id, fingerprint, duplicate_of_id=original.id)
+    db.commit()
+    original.status = "failed"
+    db.commit()
+    assert find_near_duplicate(db, other.id, fingerprint) is None
+
+def test_duplicate_links_follow_the_original():
+    """URL filters reach the original's chunks; a changed original releases duplicates it no longer matches"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    original, mirror = (URLIngestion(url=f"https://{name}.example/a", status="completed") for name in ("origin", "mirror"))
+    db.add_all([original, mirror])
+    db.commit()
+    article = _article(3)
+    record_fingerprint(db, original.id, simhash(article))
+    record_fingerprint(db, mirror.id, simhash(article + " Shared via newsletter"), duplicate_of_id=original.id)
+    db.commit()
+    
+    assert expand_duplicate_urls(db, [mirror.url]) == [mirror.url, original.url]
+    assert detach_drifted_duplicates(db, original.id, simhash(article)) == []
+    assert detach_drifted_duplicates(db, original.id, simhash(_article(4))) == [mirror]
+    db.commit()
+    assert expand_duplicate_urls(db, [mirror.url]) == [mirror.url]
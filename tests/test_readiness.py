@@ -0,0 +1,80 @@
+import asyncio
+from src.config.settings import settings
+from src.services import readiness as readiness_module
+from src.services.readiness import Readiness
+
+def _install(monkeypatch, failing=()):
+    calls = {"warm": 0, "preload": 0, "probes": 0}
+
+    def warm():
+        calls["warm"] += 1
+
+    async def preload():
+        calls["preload"] += 1
+
+    def probe(name):
+        async def run():
+            calls["probes"] += 1
+            if name in failing:
+                raise RuntimeError(f"{name} down")
+        return run
+
+    monkeypatch.setattr(readiness_module, "_warm_embedding_model", warm)
+    monkeypatch.setattr(readiness_module, "_preload_llm", preload)
+    monkeypatch.setattr(readiness_module, "PROBES", {name: probe(name) for name in readiness_module.PROBES})
+    return calls
+
+def test_not_ready_until_warmed_up(monkeypatch):
+    """Probes alone don't make a pod ready; the warm-up has to finish first"""
+    calls = _install(monkeypatch)
+    monkeypatch.setattr(settings, "readiness_probe_ttl", 0.0)
+    state = Readiness()
+
+    async def scenario():
+        before = await state.check()
+        await state._run_warm_up()
+        return before, await state.check()
+
+    before, after = asyncio.run(scenario())
+    assert before["status"] == "warming_up"
+    assert after["status"] == "ready"
+    assert calls["warm"] == 1 and calls["preload"] == 1
+
+def test_failing_probe_and_probe_cache(monkeypatch):
+    """A down dependency makes the pod unavailable; probe results are reused within the TTL"""
+    calls = _install(monkeypatch, failing=("postgres",))
+    monkeypatch.setattr(settings, "readiness_probe_ttl", 60.0)
+    state = Readiness()
+
+    async def scenario():
+        await state._run_warm_up()
+        first = await state.check()
+        second = await state.check()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["status"] == second["status"] == "unavailable"
+    assert first["checks"]["postgres"]["error"] == "postgres down"
+    assert calls["probes"] == len(readiness_module.PROBES)
+
+def test_llm_optional(monkeypatch):
+    """With READINESS_REQUIRE_LLM off, Ollama being down doesn't block traffic"""
+    _install(monkeypatch, failing=("llm",))
+    monkeypatch.setattr(settings, "readiness_require_llm", False)
+    state = Readiness()
+    state.warm_up["embedding_model"] = {"ok": True}
+    assert asyncio.run(state.check())["status"] == "ready"
+
+def test_optional_llm_is_not_retried(monkeypatch):
+    """An optional LLM that fails its preload doesn't keep the warm-up retrying"""
+    calls = _install(monkeypatch)
+    monkeypatch.setattr(settings, "readiness_require_llm", False)
+
+    async def preload():
+        calls["preload"] += 1
+        raise RuntimeError("ollama down")
+
+    monkeypatch.setattr(readiness_module, "_preload_llm", preload)
+    state = Readiness()
+    asyncio.run(asyncio.wait_for(state._run_warm_up(), timeout=5))
+    assert calls["preload"] == 1 and state.warmed_up
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from src.config.settings import settings
+from src.services.recrawl import next_interval, record_fetch
+
+def _record(content_hash=None, interval=None):
+    return SimpleNamespace(content_hash=content_hash, recrawl_interval=interval,
+                           fetch_count=0, change_count=0, last_fetched_at=None, next_fetch_at=None)
+
+def test_next_interval_adapts_and_clamps():
+    """Changed pages speed up, unchanged pages back off, within bounds"""
+    assert next_interval(None, None) == settings.recrawl_initial_interval
+    assert next_interval(8 * 3600, True) == 8 * 3600 * settings.recrawl_speedup_factor
+    assert next_interval(8 * 3600, False) == 8 * 3600 * settings.recrawl_backoff_factor
+    assert next_interval(settings.recrawl_min_interval, True) == settings.recrawl_min_interval
+    assert next_interval(settings.recrawl_max_interval, False) == settings.recrawl_max_interval
+
+def test_record_fetch_tracks_history():
+    """First fetch has no change signal; later fetches compare against the stored hash"""
+    now = datetime(2024, 1, 1)
+    record = _record()
+    assert record_fetch(record, "a", now) is None
+    assert record.recrawl_interval == settings.recrawl_initial_interval
+    assert record.next_fetch_at == now + timedelta(seconds=record.recrawl_interval)
+
+    record.content_hash = "a"
+    assert record_fetch(record, "a", now) is False
+    assert record.recrawl_interval == settings.recrawl_initial_interval * settings.recrawl_backoff_factor
+    assert record_fetch(record, "b", now) is True
+    assert (record.fetch_count, record.change_count) == (3, 1)
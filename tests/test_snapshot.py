@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from src.services.local_index import MemmapVectorIndex
+from src.services.snapshot import export_snapshot, import_snapshot
+
+def test_snapshot_roundtrip(tmp_path):
+    """Export then import reproduces ids, payloads and (float16-rounded) vectors"""
+    source = MemmapVectorIndex(str(tmp_path / "source"), 8)
+    vectors = np.random.default_rng(0).normal(size=(25, 8))
+    source.add_vectors([f"p{i}" for i in range(25)], vectors,
+                       [{"url": f"https://a.com/{i}", "chunk_index": i} for i in range(25)])
+    source.delete(["p3"])
+    
+    manifest = export_snapshot(source, str(tmp_path / "snap"), shard_size=10)
+    assert manifest["count"] == 24 and len(manifest["shards"]) == 3
+    
+    target = MemmapVectorIndex(str(tmp_path / "target"), 8)
+    assert import_snapshot(target, str(tmp_path / "snap"), batch_size=4, workers=2) == 24
+    hit = target.search([vectors[7]], 1)[0][0]
+    assert hit.id == "p7" and hit.payload == {"url": "https://a.com/7", "chunk_index": 7}
+    assert hit.score == pytest.approx(1.0, abs=1e-3)
+
+def test_snapshot_checksum(tmp_path):
+    """A corrupted shard is rejected before anything is loaded"""
+    source = MemmapVectorIndex(str(tmp_path / "source"), 4)
+    source.add_vectors(["a"], [[1, 0, 0, 0]], [{"url": "u"}])
+    manifest = export_snapshot(source, str(tmp_path / "snap"))
+    (tmp_path / "snap" / manifest["shards"][0]["vectors"]).write_bytes(b"corrupt")
+    target = MemmapVectorIndex(str(tmp_path / "target"), 4)
+    with pytest.raises(ValueError, match="Checksum"):
+        import_snapshot(target, str(tmp_path / "snap"))
+    assert target.count == 0
+
+def test_snapshot_slim_texts(tmp_path):
+    """Text kept outside the payloads travels with the snapshot and is stored before the points"""
+    source = MemmapVectorIndex(str(tmp_path / "source"), 4)
+    source.add_vectors(["slim", "fat"], [[1, 0, 0, 0], [0, 1, 0, 0]],
+                       [{"url": "u"}, {"url": "u", "content": "inline"}])
+    side_store = {"slim": "side text", "other": "unrelated"}
+    export_snapshot(source, str(tmp_path / "snap"),
+                    load_texts=lambda ids: {i: side_store[i] for i in ids if i in side_store})
+    
+    target = MemmapVectorIndex(str(tmp_path / "target"), 4)
+    with pytest.raises(ValueError, match="text store"):
+        import_snapshot(target, str(tmp_path / "snap"))
+    restored = {}
+    assert import_snapshot(target, str(tmp_path / "snap"), save_texts=restored.update) == 2
+    assert restored == {"slim": "side text"}
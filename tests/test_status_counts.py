@@ -0,0 +1,35 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from src.database.connection import Base
+from src.models.ingestion import URLIngestion
+from src.services.status_counts import get_status_counts, reconcile_status_counts
+
+def _session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+def test_counters_follow_transitions():
+    """Inserts, transitions (including on expired objects) and deletes update the counters"""
+    db = _session()
+    db.add_all([URLIngestion(url=f"https://example.com/{i}", status="pending") for i in range(3)])
+    db.commit()
+    record = db.query(URLIngestion).first()
+    db.commit()  # expires record, as between task steps
+    record.status = "processing"
+    db.commit()
+    record.status = "failed"
+    db.commit()
+    db.delete(db.query(URLIngestion).filter(URLIngestion.status == "pending").first())
+    db.commit()
+    assert get_status_counts(db) == {"pending": 1, "processing": 0, "failed": 1}
+
+def test_reconcile_fixes_drift():
+    """Reconcile overwrites drifted counters with real totals"""
+    db = _session()
+    db.add(URLIngestion(url="https://example.com/", status="completed"))
+    db.commit()
+    db.execute(text("UPDATE ingestion_status_counts SET count = 5 WHERE status = 'completed'"))
+    db.commit()
+    assert reconcile_status_counts(db) == {"completed": -4}
+    assert get_status_counts(db) == {"completed": 1}
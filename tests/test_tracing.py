@@ -0,0 +1,25 @@
+from src.services.tracing import start_trace, span, annotate, tracing_active
+from src.services.metrics import track_stage
+
+def test_span_is_noop_without_trace():
+    """Spans outside a trace record nothing"""
+    assert not tracing_active()
+    with span("orphan") as s:
+        annotate(size=1)
+    assert s is None
+
+def test_span_tree():
+    """Stages nest under the active trace with their attributes"""
+    with start_trace("query", limit=5) as root:
+        with track_stage("search_embed", query_chars=3):
+            with span("embed_model"):
+                annotate(items=1)
+        with track_stage("search_qdrant"):
+            annotate(results=2)
+    trace = root.to_dict()
+    assert trace["attrs"]["limit"] == 5
+    assert [c["name"] for c in trace["children"]] == ["search_embed", "search_qdrant"]
+    assert trace["children"][0]["children"][0]["attrs"] == {"items": 1}
+    assert trace["children"][1]["attrs"] == {"results": 2}
+    assert trace["duration_ms"] >= trace["children"][0]["duration_ms"]
+    assert not tracing_active()
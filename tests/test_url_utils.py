@@ -0,0 +1,23 @@
+from src.services.url_utils import get_domain, interleave_by_domain, canonicalize_url
+
+def test_get_domain():
+    """Domains ignore case, port and a leading www."""
+    assert get_domain("https://WWW.Example.com:8443/a?b=1") == "example.com"
+    assert get_domain("http://docs.example.com/") == "docs.example.com"
+
+def test_interleave_by_domain():
+    """Bulk lists are round-robined across domains, preserving per-domain order"""
+    urls = [
+        "https://a.com/1", "https://a.com/2", "https://a.com/3",
+        "https://b.com/1", "https://c.com/1", "https://b.com/2",
+    ]
+    assert interleave_by_domain(urls) == [
+        "https://a.com/1", "https://b.com/1", "https://c.com/1",
+        "https://a.com/2", "https://b.com/2", "https://a.com/3",
+    ]
+
+def test_canonicalize_url():
+    """Tracking parameters, default ports, fragments and parameter order don't create new records"""
+    assert canonicalize_url("HTTPS://Example.com:443/a?utm_source=x&b=2&a=1&fbclid=y#top") == "https://example.com/a?a=1&b=2"
+    assert canonicalize_url("http://example.com") == "http://example.com/"
+    assert canonicalize_url("http://example.com:8080/p?q=") == "http://example.com:8080/p?q="
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+import numpy as np
+from src.services.vector_store import build_filter, chunk_id, stored_vector_lookup
+
+def test_build_filter_unrestricted():
+    """No restrictions means no filter, so searches use the plain HNSW path"""
+    assert build_filter() is None
+
+def test_build_filter_conditions():
+    """Domains are normalised like at ingest time and times become unix seconds"""
+    after = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    query_filter = build_filter(domains=["WWW.Example.com", "https://docs.other.org/x"], ingested_after=after)
+    domain, ingested = query_filter.must
+    assert domain.key == "domain"
+    assert domain.match.any == ["example.com", "docs.other.org"]
+    assert ingested.key == "ingested_at"
+    assert ingested.range.gte == 1704067200 and ingested.range.lte is None
+
+def test_stored_vectors_skip_the_model():
+    """Cache misses found in the vector store are not re-encoded, and go back into the cache"""
+    from src.services.embeddings import EmbeddingService
+    model = Mock()
+    model.encode.side_effect = lambda texts: np.ones((len(texts), 3))
+    backend = Mock()
+    backend.retrieve_vectors.return_value = {chunk_id("seen"): [0.1, 0.2, 0.3]}
+    with patch("src.services.embeddings._load_model", return_value=model), \
+         patch("src.services.embeddings.CacheService") as cache:
+        cache.return_value.get_embeddings_batch.return_value = [None, None]
+        service = EmbeddingService("test-model")
+        vectors = service.embed_batch(["seen", "new"], stored=stored_vector_lookup(backend))
+    
+    assert vectors == [[0.1, 0.2, 0.3], [1.0, 1.0, 1.0]]
+    model.encode.assert_called_once_with(["new"])
+    cache.return_value.set_embeddings_batch.assert_any_call(["seen"], [[0.1, 0.2, 0.3]])
+
+def test_add_documents_writes_batches_then_barrier():
+    """Upserts go out in batches as float32 arrays without waiting; the last one waits and so covers them all"""
+    from src.config.settings import settings
+    from src.services.vector_store import VectorStore
+    backend = Mock(concurrent_writes=True, ordered_writes=True)
+    backend.name = "qdrant"
+    service = Mock()
+    service.embed_batch.side_effect = lambda texts, stored=None: [[0.1, 0.2, 0.3]] * len(texts)
+    documents = [{"content": f"chunk {i}", "url": "https://example.com/a", "chunk_index": i} for i in range(5)]
+    with patch("src.services.vector_store.get_active_model", return_value="test-model"), \
+         patch("src.services.vector_store.get_migration", return_value=None), \
+         patch("src.services.vector_store.EmbeddingService", return_value=service), \
+         patch("src.services.vector_store.create_backend", return_value=backend), \
+         patch.object(settings, "upsert_batch_size", 2), patch.object(settings, "upsert_wait", False):
+        VectorStore().add_documents(documents)
+        calls = backend.add_vectors.call_args_list
+        assert [len(call.args[0]) for call in calls] == [2, 2, 1]
+        assert [call.kwargs["wait"] for call in calls] == [False, False, True]
+        assert all(call.args[1].dtype == np.float32 for call in calls)
+        assert [point_id for call in calls for point_id in call.args[0]] == [chunk_id(doc["content"]) for doc in documents]
+        
+        # Several shards apply their logs independently, so no write can stand in for the others
+        backend.reset_mock()
+        backend.ordered_writes = False
+        VectorStore().add_documents(documents)
+        assert [call.kwargs["wait"] for call in backend.add_vectors.call_args_list] == [True, True, True]
+
+def test_existing_collection_sets_dimension():
+    """An existing collection's vector size and sharding are used, not EMBEDDING_DIMENSION (e.g. after a model swap)"""
+    from types import SimpleNamespace
+    from qdrant_client.models import Distance, VectorParams
+    from src.services.vector_store import QdrantBackend, collection_for_model
+    client = Mock()
+    client.get_collections.return_value = SimpleNamespace(
+        collections=[SimpleNamespace(name=collection_for_model("other-model"))]
+    )
+    client.get_collection.return_value = SimpleNamespace(
+        config=SimpleNamespace(params=SimpleNamespace(vectors=VectorParams(size=8, distance=Distance.COSINE),
+                                                      shard_number=2, replication_factor=1)),
+        payload_schema={}
+    )
+    with patch("src.services.vector_store.get_qdrant_client", return_value=client):
+        backend = QdrantBackend("other-model")
+    
+    assert backend.dimension == 8 and not backend.ordered_writes
+    client.create_collection.assert_not_called()
@@ -0,0 +1,14 @@
+from src.services.cache import CacheService
+from src.services.vector_versions import model_slug, collection_for_model
+
+def test_model_slug():
+    """Slugs are readable, stable and differ for models sharing a short name"""
+    slug = model_slug("sentence-transformers/all-MiniLM-L6-v2")
+    assert slug.startswith("all-minilm-l6-v2-")
+    assert slug == model_slug("sentence-transformers/all-MiniLM-L6-v2")
+    assert model_slug("org-a/encoder") != model_slug("org-b/encoder")
+    assert collection_for_model("org-a/encoder").endswith("__" + model_slug("org-a/encoder"))
+
+def test_embedding_cache_namespaced_by_model():
+    """Two models never share embedding cache keys"""
+    assert CacheService("org/model-a").embedding_prefix != CacheService("org/model-b").embedding_prefix